@@ -1,22 +1,39 @@
+import asyncio
+import logging
 import time
 import threading
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from src.core.audit import EthicalAuditLog
 from src.core.holon import Holon
-from src.core.communication import CommunicationProtocol, Priority, MessageType
+from src.core.holon_table import HolonTable
+from src.core.communication import AsyncMessageBus, CommunicationProtocol, OverflowPolicy, Priority, MessageType
+from src.core.task_ledger import next_task_id
+from src.core.tracing import tracer
 from src.core.ethics import EthicalHolon, SixPillarsEthicalFramework
 from src.system_management.advanced_restructuring import AdvancedRestructuringManager
+from src.system_management.restructuring import AdvancedPerformanceMetrics
 from src.task_management.advanced_allocator import AdvancedTaskAllocator
+from src.task_management.executor import WorkStealingExecutor
+from src.task_management.pipeline import TaskPipeline
+from src.task_management.task_queue import SchedulingPolicy
 from src.task_management.task_generator import RealWorldScenarioGenerator
 from src.events.external_events import ExternalEventGenerator, ConstraintManager
 from src.visualization.dashboard_server import run_dashboard
 from src.analysis.performance_analyzer import PerformanceAnalyzer
 
 class AdvancedAdaptiveHolonManager:
-    def __init__(self, comm_protocol: CommunicationProtocol):
+    def __init__(self, comm_protocol: CommunicationProtocol, executor: Optional[WorkStealingExecutor] = None):
         self.holons: List[Holon] = []
+        # Execution goes through these wrappers; everything else works on the plain holons
+        self.ethical_holons: Dict[str, EthicalHolon] = {}
         self.comm_protocol = comm_protocol
         self.ethical_framework = SixPillarsEthicalFramework()
-        self.performance_metrics = AdvancedPerformanceMetrics()
+        # Every ethical decision is recorded here and served on the dashboard's /audit route
+        self.audit_log = EthicalAuditLog(self.ethical_framework.criteria)
+        self.ethical_framework.audit_log = self.audit_log
+        # Fleet-wide columns shared by the allocator, restructuring and the dashboard
+        self.holon_table = HolonTable()
+        self.performance_metrics = AdvancedPerformanceMetrics(self.holon_table)
         self.restructuring_manager = None
         self.task_allocator = None
         self.event_generator = None
@@ -24,15 +41,27 @@ class AdvancedAdaptiveHolonManager:
         self.performance_analyzer = PerformanceAnalyzer()
         self.current_cycle = 0
         self.current_scenario = ""
+        # Optional thread pool for inbox processing; without it holons are drained one at a time
+        self.executor = executor
+        # Pipeline stages run in worker threads: screening only needs the ethics framework and
+        # its audit log, while allocation and execution both move tasks around the holarchy
+        self.ethics_lock = threading.Lock()
+        self.holarchy_lock = threading.Lock()
 
     def add_holon(self, holon: Holon):
-        ethical_holon = EthicalHolon(holon, self.ethical_framework)
-        self.holons.append(ethical_holon)
+        self.holon_table.attach(holon)
+        self.ethical_holons[holon.id] = EthicalHolon(holon, self.ethical_framework)
+        self.holons.append(holon)
         if len(self.holons) > 1:
             if not self.restructuring_manager:
-                self.restructuring_manager = AdvancedRestructuringManager(self.holons, self.performance_metrics)
+                self.restructuring_manager = AdvancedRestructuringManager(self.holons, self.performance_metrics,
+                                                                          self.holon_table)
             if not self.task_allocator:
-                self.task_allocator = AdvancedTaskAllocator(self.holons, self.performance_metrics)
+                self.task_allocator = AdvancedTaskAllocator(self.holons, self.performance_metrics,
+                                                            capability_registry=self.comm_protocol.capability_registry,
+                                                            table=self.holon_table,
+                                                            # Within a priority, due (old or small) tasks go first
+                                                            policy=SchedulingPolicy.EARLIEST_DEADLINE)
             if not self.event_generator:
                 self.event_generator = ExternalEventGenerator(self.holons)
 
@@ -40,14 +69,63 @@ class AdvancedAdaptiveHolonManager:
         task = {"type": task_type, "content": content, "priority": priority}
         ethical_assessment = self.ethical_framework.assess_task(task)
         if ethical_assessment['approved']:
-            chosen_holon = self.task_allocator.allocate_task(task)
-            if chosen_holon:
-                chosen_holon.state.setdefault('pending_tasks', []).append(task_type)
-                chosen_holon.send_message(chosen_holon.id, MessageType.TASK, task, priority)
-            else:
-                print(f"No suitable holon found for task {task_type}")
+            self._allocate(task_type, content, priority)
         else:
-            print(f"Task {task_type} rejected due to ethical concerns: {ethical_assessment['reason']}")
+            # assess_task has already recorded the decision in the audit log
+            tracer.info("manager", "Task %s rejected due to ethical concerns: %s",
+                        task_type, ethical_assessment['reason'])
+
+    def submit_tasks(self, tasks: List[Dict[str, Any]]):
+        # Screen a whole cycle's tasks in one pass, then allocate only the approved ones
+        self.allocate_tasks(self.screen_tasks(tasks))
+
+    # The three steps below are also the stages of the TaskPipeline that main() runs
+
+    def screen_tasks(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with self.ethics_lock:
+            assessment = self.ethical_framework.assess_batch(tasks)
+        approved_tasks = []
+        for task, approved, reason in zip(tasks, assessment.approved.tolist(), assessment.reasons):
+            if approved:
+                approved_tasks.append(self._new_task(task["type"], task, task["priority"]))
+            else:
+                tracer.info("manager", "Task %s rejected due to ethical concerns: %s", task['type'], reason)
+        return approved_tasks
+
+    def allocate_tasks(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Assign the tasks together so they spread across holons instead of all
+        # landing on whichever holon looked best before any of them were placed
+        dispatched = []
+        with self.holarchy_lock:
+            for task, chosen_holon in zip(tasks, self.task_allocator.allocate_batch(tasks)):
+                if self._dispatch(task, chosen_holon):
+                    dispatched.append(task)
+        return dispatched
+
+    def execute_tasks(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # The tasks are already in the holons' inboxes; a cycle processes them
+        with self.holarchy_lock:
+            self.process_cycle()
+        return tasks
+
+    def _allocate(self, task_type: str, content: Dict[str, Any], priority: Priority):
+        task = self._new_task(task_type, content, priority)
+        self._dispatch(task, self.task_allocator.allocate_task(task))
+
+    @staticmethod
+    def _new_task(task_type: str, content: Dict[str, Any], priority: Priority) -> Dict[str, Any]:
+        return {"id": next_task_id(), "type": task_type, "content": content, "priority": priority}
+
+    def _dispatch(self, task: Dict[str, Any], chosen_holon) -> bool:
+        if chosen_holon:
+            chosen_holon.assign_task(task['id'], task['type'])
+            # The verdict travels with the task, so it isn't assessed again on the way to execution
+            with self.ethics_lock:
+                verdict = self.ethical_framework.stamp(task)
+            chosen_holon.send_message(chosen_holon.id, MessageType.TASK, task, task['priority'], verdict)
+            return True
+        tracer.warning("manager", "No suitable holon found for task %s", task['type'])
+        return False
 
     def process_cycle(self):
         # Generate and apply new events
@@ -57,13 +135,18 @@ class AdvancedAdaptiveHolonManager:
                 self.constraint_manager.apply_constraints(holon, [event])
 
         # Process messages and tasks
-        for holon in self.holons:
-            if holon.state.get('operational', True):  # Only process if the holon is operational
-                while True:
-                    message = holon.receive_message()
-                    if not message:
-                        break
-                    self._process_message(holon, message)
+        if self.executor is not None:
+            self.executor.process(self.holons, self._execute_concurrently, self._merge_task, self._process_message,
+                                  active=lambda holon: holon.state.get('operational', True))
+        else:
+            for holon in self.holons:
+                if holon.state.get('operational', True):  # Only process if the holon is operational
+                    while True:
+                        messages = holon.receive_messages()
+                        if not messages:
+                            break
+                        for message in messages:
+                            self._process_message(holon, message)
 
         # Update and remove resolved events
         resolved_events = self.event_generator.update_events(self.current_cycle)
@@ -84,30 +167,64 @@ class AdvancedAdaptiveHolonManager:
             self.restructuring_manager.restructure()
             self.performance_analyzer.log_restructuring(self.current_cycle)
 
+        self.comm_protocol.mark_cycle(self.current_cycle)
         self.current_cycle += 1
+        with self.ethics_lock:
+            self.audit_log.mark_cycle(self.current_cycle)
 
     def _process_message(self, holon: Holon, message):
         if message.type == MessageType.TASK:
-            ethical_assessment = self.ethical_framework.assess_task(message.content)
-            if ethical_assessment['approved']:
-                result = holon.execute_task(message.content)
-                holon.send_message(message.sender_id, MessageType.RESULT, result)
-                task_completion_time = time.time() - message.timestamp
-                self.performance_metrics.update_task_completion_time(message.content['type'], task_completion_time)
-                self.performance_metrics.update_task_success(message.content['type'], result['status'] == 'success')
-                holon.state['pending_tasks'].remove(message.content['type'])
-            else:
-                print(f"Holon {holon.name} rejected task due to ethical concerns: {ethical_assessment['reason']}")
+            # EthicalHolon only re-assesses the task if its verdict no longer verifies
+            with self.ethics_lock:
+                result = self.ethical_holons[holon.id].execute_task(message.content, message.verdict)
+            self._finish_task(holon, holon, message, result)
         elif message.type == MessageType.RESULT:
-            print(f"{holon.name} received result: {message.content}")
+            tracer.debug("manager", "%s received result: %s", holon.name, message.content)
         elif message.type == MessageType.RESTRUCTURE:
-            print(f"{holon.name} restructured: {message.content}")
-            holon.capabilities = message.content['new_capabilities']
+            update = message.content['structure'][holon.id]
+            tracer.debug("manager", "%s restructured: %s", holon.name, update)
+            holon.capabilities = list(update['new_capabilities'])
             # Handle parent and children updates here
 
+    def _execute_concurrently(self, holon: Holon, message):
+        # Runs on an executor worker: checking a verdict is read-only, but a full assessment
+        # updates the framework's cache and audit log, so that is left to _merge_task
+        if self.ethical_framework.verify(message.content, message.verdict):
+            return holon.execute_task(message.content)
+        return None
+
+    def _merge_task(self, owner: Holon, executor: Holon, message, result):
+        with self.ethics_lock:
+            if result is None:
+                result = self.ethical_holons[executor.id].execute_task(message.content, message.verdict)
+            else:
+                # Records the verified decision in the audit log, in message order
+                self.ethical_framework.approves(message.content, message.verdict, executor.id)
+        self._finish_task(owner, executor, message, result)
+
+    def _finish_task(self, owner: Holon, executor: Holon, message, result: Dict[str, Any]):
+        # A stolen task is still on its original holon's ledger
+        owner.complete_task(message.content['id'])
+        if result['status'] == 'rejected':
+            tracer.info("manager", "Holon %s rejected task due to ethical concerns: %s",
+                        executor.name, result['reason'])
+            return
+        executor.send_message(message.sender_id, MessageType.RESULT, result)
+        # Inbox wait plus execution: generator timestamps count simulation steps, not seconds
+        inbox_latency = time.time() - message.timestamp
+        self.performance_metrics.update_task_completion_time(message.content['type'], inbox_latency)
+        self.performance_metrics.update_task_success(message.content['type'], result['status'] == 'success')
+
 def main():
-    comm_protocol = CommunicationProtocol()
-    holon_manager = AdvancedAdaptiveHolonManager(comm_protocol)
+    # Keep recent message events for the dashboard without printing every message
+    tracer.configure(level=logging.INFO, record_messages=True)
+
+    # The simulation loop is single-threaded, so use the lock-free bus. Bounded
+    # inboxes keep crisis bursts and failed holons from growing without limit.
+    comm_protocol = CommunicationProtocol(AsyncMessageBus(), inbox_capacity=100,
+                                          overflow=OverflowPolicy.SPILL_TO_PARENT)
+    # Inbox processing runs on a small pool; idle holons steal tasks from busy relatives
+    holon_manager = AdvancedAdaptiveHolonManager(comm_protocol, WorkStealingExecutor(max_workers=4))
 
     # Create a diverse swarm with capabilities matching our scenarios
     leader = Holon("Leader", ["coordinate", "delegate", "situation_assessment"], comm_protocol)
@@ -138,44 +255,38 @@ def main():
     dashboard_thread = threading.Thread(target=run_dashboard, args=(holon_manager,))
     dashboard_thread.start()
 
-    # Run the system for several cycles with varying workloads and task types
-    scenarios = ["Data Processing", "Manufacturing", "Emergency Response", "Dynamic Scenario"]
+    # Run each scenario through the staged pipeline: generation and ethical screening
+    # overlap with allocation and execution instead of running in lock-step cycles
+    scenarios = [("Data Processing", data_processing_generator),
+                 ("Manufacturing", manufacturing_generator),
+                 ("Emergency Response", emergency_response_generator),
+                 ("Dynamic Scenario", dynamic_generator)]
     scenario_duration = 50
-    for cycle in range(200):
-        holon_manager.current_cycle = cycle
-        holon_manager.current_scenario = scenarios[cycle // scenario_duration]
+    for scenario, generator in scenarios:
+        holon_manager.current_scenario = scenario
+        print(f"\nScenario: {scenario} (from cycle {holon_manager.current_cycle + 1})")
 
-        print(f"\nCycle {cycle + 1} - Scenario: {holon_manager.current_scenario}")
-        
-        # Generate tasks based on the current scenario
-        if cycle < 50:
-            tasks = data_processing_generator.generate_tasks(1)
-        elif cycle < 100:
-            tasks = manufacturing_generator.generate_tasks(1)
-        elif cycle < 150:
-            tasks = emergency_response_generator.generate_tasks(1)
-        else:
-            tasks = dynamic_generator.generate_tasks(1)
+        # The generator is paced so the dashboard can follow along
+        pipeline = TaskPipeline(generator, holon_manager.screen_tasks, holon_manager.allocate_tasks,
+                                holon_manager.execute_tasks, interval=0.5)
+        asyncio.run(pipeline.run(scenario_duration))
 
-        # Submit generated tasks
-        for task in tasks:
-            holon_manager.submit_task(task["type"], task, task["priority"])
+        print("\nPipeline stages:")
+        for stage, metrics in pipeline.metrics().items():
+            print(f"{stage}: {metrics['items_out']} tasks out, {metrics['throughput']:.1f} tasks/s, "
+                  f"busy {metrics['utilization']:.0%}, queue high water {metrics['queue_high_water']}")
+        latency = holon_manager.performance_metrics.get_latency_percentiles()
+        print(f"Inbox latency: p50 {latency[50] * 1000:.1f} ms, p95 {latency[95] * 1000:.1f} ms, "
+              f"p99 {latency[99] * 1000:.1f} ms")
 
-        holon_manager.process_cycle()
+        print("\nCurrent System Structure and Performance:")
+        for holon in holon_manager.holons:
+            print(f"{holon.name}: Capabilities={holon.capabilities}, "
+                  f"Parent={holon.parent.name if holon.parent else 'None'}, "
+                  f"Children={[child.name for child in holon.children]}")
 
-        # Print current system structure and performance every 20 cycles
-        if cycle % 20 == 0:
-            print("\nCurrent System Structure and Performance:")
-            for holon in holon_manager.holons:
-                print(f"{holon.name}: Capabilities={holon.capabilities}, "
-                      f"Parent={holon.parent.name if holon.parent else 'None'}, "
-                      f"Children={[child.name for child in holon.children]}")
-            
-            performance = holon_manager.restructuring_manager.evaluate_system_performance()
-            print(f"Overall System Performance: {performance:.2f}")
-
-        # Add a small delay to slow down the simulation for better visualization
-        time.sleep(0.5)
+        performance = holon_manager.restructuring_manager.evaluate_system_performance()
+        print(f"Overall System Performance: {performance:.2f}")
 
     # After all cycles, analyze and visualize the results
     holon_manager.performance_analyzer.analyze()
@@ -183,6 +294,8 @@ def main():
     holon_manager.performance_analyzer.plot_task_type_performance()
     holon_manager.performance_analyzer.plot_holon_performance()
 
+    holon_manager.executor.shutdown()
+
     # Wait for the dashboard thread to finish
     dashboard_thread.join()
 
@@ -0,0 +1,220 @@
+import functools
+import pickle
+import time
+import zlib
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence
+import numpy as np
+
+class AuditChunk:
+    # Sealed block of audit rows: zlib-compressed columns plus a zone map that lets queries skip it
+    def __init__(self, columns: Dict[str, np.ndarray], compression_level: int):
+        self.rows = len(columns['cycle'])
+        self.dtypes = {name: (column.dtype.str, column.shape[1:]) for name, column in columns.items()}
+        self.compressed = {name: zlib.compress(np.ascontiguousarray(column).tobytes(), compression_level)
+                           for name, column in columns.items()}
+        self.min_cycle = int(columns['cycle'].min())
+        self.max_cycle = int(columns['cycle'].max())
+        self.min_time = float(columns['time'].min())
+        self.max_time = float(columns['time'].max())
+        self.holons: FrozenSet[int] = frozenset(np.unique(columns['holon']).tolist())
+        self.task_types: FrozenSet[int] = frozenset(np.unique(columns['task_type']).tolist())
+        self.rule_versions: FrozenSet[int] = frozenset(np.unique(columns['rule_version']).tolist())
+
+    def column(self, name: str) -> np.ndarray:
+        dtype, shape = self.dtypes[name]
+        return np.frombuffer(zlib.decompress(self.compressed[name]), dtype=dtype).reshape((self.rows, *shape))
+
+    def nbytes(self) -> int:
+        return sum(len(data) for data in self.compressed.values())
+
+class EthicalAuditLog:
+    # Append-only, columnar log of ethical decisions; full blocks are sealed into AuditChunks and only
+    # the newest max_chunks are kept. Strings are dictionary-encoded, with -1 for "none".
+    def __init__(self, criteria: Sequence[str], chunk_size: int = 8192, max_chunks: int = 256,
+                 compression_level: int = 1):
+        self.criteria = tuple(criteria)
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.compression_level = compression_level
+        self.chunks: List[AuditChunk] = []
+        self.rotated = 0
+        self.current_cycle = 0
+        self.strings: List[str] = []
+        self.codes: Dict[str, int] = {}
+        self._new_block()
+
+    def mark_cycle(self, cycle: int):
+        self.current_cycle = cycle
+
+    def __len__(self) -> int:
+        return sum(chunk.rows for chunk in self.chunks) + self.size
+
+    def record(self, task_type: Optional[str], holon_id: Optional[str], approved: bool, rule_version: int,
+               scores: Sequence[float], reason: Optional[str] = None, cycle: Optional[int] = None,
+               timestamp: Optional[float] = None):
+        row = self.size
+        block = self.block
+        block['cycle'][row] = self.current_cycle if cycle is None else cycle
+        block['time'][row] = time.time() if timestamp is None else timestamp
+        block['task_type'][row] = self._code(task_type)
+        block['holon'][row] = self._code(holon_id)
+        block['approved'][row] = approved
+        block['rule_version'][row] = rule_version
+        block['reason'][row] = self._code(reason)
+        block['scores'][row] = scores
+        self.size = row + 1
+        if self.size == self.chunk_size:
+            self._seal()
+
+    def record_batch(self, task_types: Iterable[Optional[str]], holon_id: Optional[str], approved: np.ndarray,
+                     rule_version: int, scores: np.ndarray, reasons: Iterable[Optional[str]],
+                     cycle: Optional[int] = None, timestamp: Optional[float] = None):
+        task_codes = np.fromiter((self._code(task_type) for task_type in task_types), dtype=np.int32,
+                                 count=len(approved))
+        reason_codes = np.fromiter((self._code(reason) for reason in reasons), dtype=np.int32, count=len(approved))
+        now = time.time() if timestamp is None else timestamp
+        cycle = self.current_cycle if cycle is None else cycle
+        holon = self._code(holon_id)
+        start = 0
+        while start < len(approved):
+            # Fill the active block, sealing it whenever it runs full
+            row = self.size
+            n = min(len(approved) - start, self.chunk_size - row)
+            block = self.block
+            block['cycle'][row:row + n] = cycle
+            block['time'][row:row + n] = now
+            block['task_type'][row:row + n] = task_codes[start:start + n]
+            block['holon'][row:row + n] = holon
+            block['approved'][row:row + n] = approved[start:start + n]
+            block['rule_version'][row:row + n] = rule_version
+            block['reason'][row:row + n] = reason_codes[start:start + n]
+            block['scores'][row:row + n] = scores[start:start + n]
+            self.size = row + n
+            start += n
+            if self.size == self.chunk_size:
+                self._seal()
+
+    def query(self, start_cycle: Optional[int] = None, end_cycle: Optional[int] = None,
+              since: Optional[float] = None, until: Optional[float] = None, holon_id: Optional[str] = None,
+              task_type: Optional[str] = None, rule_version: Optional[int] = None,
+              approved: Optional[bool] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        # Rows matching every filter (ranges inclusive) as columns, newest last; `limit` keeps the newest
+        holon = self.codes.get(holon_id, -2) if holon_id is not None else None
+        task = self.codes.get(task_type, -2) if task_type is not None else None
+        parts: List[Dict[str, np.ndarray]] = []
+        for chunk in self.chunks:
+            if ((start_cycle is not None and chunk.max_cycle < start_cycle) or
+                    (end_cycle is not None and chunk.min_cycle > end_cycle) or
+                    (since is not None and chunk.max_time < since) or
+                    (until is not None and chunk.min_time > until) or
+                    (holon is not None and holon not in chunk.holons) or
+                    (task is not None and task not in chunk.task_types) or
+                    (rule_version is not None and rule_version not in chunk.rule_versions)):
+                continue
+            parts.append(self._select(chunk.column, chunk.rows, start_cycle, end_cycle, since, until,
+                                      holon, task, rule_version, approved))
+        if self.size:
+            active = {name: column[:self.size] for name, column in self.block.items()}
+            parts.append(self._select(active.__getitem__, self.size, start_cycle, end_cycle, since, until,
+                                      holon, task, rule_version, approved))
+        parts = [part for part in parts if part is not None]
+        if parts:
+            columns = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+        else:
+            columns = {name: column[:0] for name, column in self.block.items()}
+        if limit is not None:
+            columns = {name: column[len(column) - min(limit, len(column)):] for name, column in columns.items()}
+        return self._decode(columns)
+
+    def summary(self, **filters) -> Dict[str, Dict[str, int]]:
+        # Approved/rejected counts per holon for the dashboard
+        columns = self.query(**filters)
+        summary: Dict[str, Dict[str, int]] = {}
+        holons = np.asarray(columns['holon'], dtype=object)
+        for holon_id in dict.fromkeys(columns['holon']):
+            mask = holons == holon_id
+            approvals = int(columns['approved'][mask].sum())
+            summary[str(holon_id)] = {'approved': approvals, 'rejected': int(mask.sum()) - approvals}
+        return summary
+
+    def nbytes(self) -> int:
+        return sum(chunk.nbytes() for chunk in self.chunks)
+
+    def dump(self, path: str):
+        with open(path, 'wb') as f:
+            pickle.dump(self, f, protocol=5)
+
+    @staticmethod
+    def load(path: str) -> 'EthicalAuditLog':
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def _code(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def _decode(self, columns: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        # -1 indexes the trailing None
+        lookup = np.array(self.strings + [None], dtype=object)
+        decoded: Dict[str, Any] = dict(columns)
+        for name in ('task_type', 'holon', 'reason'):
+            decoded[name] = lookup[columns[name]].tolist()
+        decoded['criteria'] = self.criteria
+        return decoded
+
+    @staticmethod
+    def _select(column, rows: int, start_cycle, end_cycle, since, until, holon, task, rule_version,
+                approved) -> Optional[Dict[str, np.ndarray]]:
+        # Filter columns are also output columns, so decompress each one at most once
+        column = functools.lru_cache(maxsize=None)(column)
+        mask = np.ones(rows, dtype=bool)
+        if start_cycle is not None or end_cycle is not None:
+            cycles = column('cycle')
+            if start_cycle is not None:
+                mask &= cycles >= start_cycle
+            if end_cycle is not None:
+                mask &= cycles <= end_cycle
+        if since is not None or until is not None:
+            times = column('time')
+            if since is not None:
+                mask &= times >= since
+            if until is not None:
+                mask &= times <= until
+        for name, value in (('holon', holon), ('task_type', task), ('rule_version', rule_version),
+                            ('approved', approved)):
+            if value is not None:
+                mask &= column(name) == value
+        if not mask.any():
+            return None
+        names = ('cycle', 'time', 'task_type', 'holon', 'approved', 'rule_version', 'reason', 'scores')
+        return {name: column(name)[mask] for name in names}
+
+    def _new_block(self):
+        n = self.chunk_size
+        self.block = {
+            'cycle': np.zeros(n, dtype=np.int64),
+            'time': np.zeros(n, dtype=np.float64),
+            'task_type': np.zeros(n, dtype=np.int32),
+            'holon': np.zeros(n, dtype=np.int32),
+            'approved': np.zeros(n, dtype=bool),
+            'rule_version': np.zeros(n, dtype=np.int64),
+            'reason': np.zeros(n, dtype=np.int32),
+            'scores': np.zeros((n, len(self.criteria)), dtype=np.float32),
+        }
+        self.size = 0
+
+    def _seal(self):
+        if not self.size:
+            return
+        self.chunks.append(AuditChunk({name: column[:self.size] for name, column in self.block.items()},
+                                      self.compression_level))
+        if len(self.chunks) > self.max_chunks:
+            # Rotate out the oldest chunk
+            del self.chunks[0]
+            self.rotated += 1
+        self._new_block()
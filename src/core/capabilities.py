@@ -0,0 +1,97 @@
+import itertools
+from typing import Container, Dict, Iterable, KeysView, Optional, Tuple
+from src.core.indexed_heap import IndexedHeap
+
+# Capabilities are interned to bit positions so holons can summarise a whole
+# subtree's capabilities in one int (see Holon.subtree_mask)
+_capability_bits: Dict[str, int] = {}
+
+def capability_bit(capability: str) -> int:
+    bit = _capability_bits.get(capability)
+    if bit is None:
+        bit = _capability_bits[capability] = 1 << len(_capability_bits)
+    return bit
+
+def known_capability_bit(capability: str) -> int:
+    # 0 for capabilities no holon has ever had, without interning them
+    return _capability_bits.get(capability, 0)
+
+def capability_mask(capabilities: Iterable[str]) -> int:
+    mask = 0
+    for capability in capabilities:
+        mask |= capability_bit(capability)
+    return mask
+
+class CapabilityRegistry:
+    # Inverted index from capability to holons, kept current by Holon's setters
+    def __init__(self):
+        # Insertion-ordered dicts used as sets, so lookups are one dict hit and iteration is deterministic
+        self.holons_by_capability: Dict[str, Dict['Holon', None]] = {}
+        self.operational_by_capability: Dict[str, Dict['Holon', None]] = {}
+        # Holons by (not operational, workload / capacity, registration order), so least_loaded is a peek
+        self.load_by_capability: Dict[str, IndexedHeap] = {}
+        self._order: Dict['Holon', int] = {}
+        self._orders = itertools.count()
+
+    def register(self, holon: 'Holon'):
+        for capability in holon.capabilities:
+            self.add(holon, capability)
+
+    def unregister(self, holon: 'Holon'):
+        for capability in holon.capabilities:
+            self.remove(holon, capability)
+
+    def add(self, holon: 'Holon', capability: str):
+        self.holons_by_capability.setdefault(capability, {})[holon] = None
+        if holon.state.get('operational', True):
+            self.operational_by_capability.setdefault(capability, {})[holon] = None
+        self.load_by_capability.setdefault(capability, IndexedHeap()).push(holon, self._load_key(holon))
+
+    def remove(self, holon: 'Holon', capability: str):
+        self.holons_by_capability.get(capability, {}).pop(holon, None)
+        self.operational_by_capability.get(capability, {}).pop(holon, None)
+        heap = self.load_by_capability.get(capability)
+        if heap is not None:
+            heap.remove(holon)
+
+    def set_operational(self, holon: 'Holon', operational: bool):
+        for capability in holon.capabilities:
+            if operational:
+                self.operational_by_capability.setdefault(capability, {})[holon] = None
+            else:
+                self.operational_by_capability.get(capability, {}).pop(holon, None)
+        self.update_load(holon)
+
+    def update_load(self, holon: 'Holon'):
+        # O(log H) per capability of the holon
+        key = self._load_key(holon)
+        for capability in holon.capabilities:
+            heap = self.load_by_capability.get(capability)
+            if heap is not None and holon in heap:
+                heap.update(holon, key)
+
+    def least_loaded(self, capability: str, operational_only: bool = False,
+                     among: Optional[Container['Holon']] = None) -> Optional['Holon']:
+        # Operational holons sort first, so a non-operational top means there are none
+        heap = self.load_by_capability.get(capability)
+        holon = heap.peek() if heap is not None else None
+        if holon is not None and among is not None and holon not in among:
+            # The registry spans the whole protocol; scan only when its top is outside `among`
+            holon = min((candidate for candidate in self.holons_with(capability) if candidate in among),
+                        key=self._load_key, default=None)
+        if holon is not None and operational_only and not holon.state.get('operational', True):
+            return None
+        return holon
+
+    def holons_with(self, capability: str, operational_only: bool = False) -> KeysView:
+        index = self.operational_by_capability if operational_only else self.holons_by_capability
+        return index.get(capability, {}).keys()
+
+    def capabilities(self) -> KeysView:
+        return self.holons_by_capability.keys()
+
+    def _load_key(self, holon: 'Holon') -> Tuple[bool, float, int]:
+        order = self._order.get(holon)
+        if order is None:
+            order = self._order[holon] = next(self._orders)
+        return (not holon.state.get('operational', True), holon.workload / holon.capacity, order)
@@ -0,0 +1,83 @@
+import pickle
+import struct
+from types import MappingProxyType
+from typing import List, Optional, Tuple
+from src.core.communication import Message, MessageType, Priority
+from src.core.ethics import EthicalVerdict
+
+# id, type, priority, timestamp, sender length, receiver length, flags
+_HEADER = struct.Struct('<QBBdHHB')
+_NO_ID = 0xFFFF
+_HAS_VERDICT = 1
+# rule version, digest
+_VERDICT = struct.Struct('<Q8s')
+
+def _pack_id(holon_id: Optional[str]) -> bytes:
+    return b'' if holon_id is None else holon_id.encode()
+
+def encode_message(message: Message) -> bytes:
+    sender = _pack_id(message.sender_id)
+    receiver = _pack_id(message.receiver_id)
+    content = message.content
+    if isinstance(content, MappingProxyType):
+        content = dict(content)
+    verdict = message.verdict
+    return b''.join((
+        _HEADER.pack(message.id, message.type.value, message.priority.value, message.timestamp,
+                     _NO_ID if message.sender_id is None else len(sender),
+                     _NO_ID if message.receiver_id is None else len(receiver),
+                     0 if verdict is None else _HAS_VERDICT),
+        sender, receiver,
+        b'' if verdict is None else _VERDICT.pack(verdict.rule_version, verdict.digest),
+        pickle.dumps(content, protocol=5)
+    ))
+
+def decode_message(data: bytes) -> Message:
+    msg_id, msg_type, priority, timestamp, sender_len, receiver_len, flags = _HEADER.unpack_from(data)
+    offset = _HEADER.size
+    sender_id = receiver_id = None
+    if sender_len != _NO_ID:
+        sender_id = bytes(data[offset:offset + sender_len]).decode()
+        offset += sender_len
+    if receiver_len != _NO_ID:
+        receiver_id = bytes(data[offset:offset + receiver_len]).decode()
+        offset += receiver_len
+    verdict = None
+    if flags & _HAS_VERDICT:
+        verdict = EthicalVerdict(*_VERDICT.unpack_from(data, offset))
+        offset += _VERDICT.size
+    # Bypass __init__ so the message keeps its original id and timestamp
+    message = Message.__new__(Message)
+    message.id = msg_id
+    message.sender_id = sender_id
+    message.receiver_id = receiver_id
+    message.type = MessageType(msg_type)
+    message.priority = Priority(priority)
+    message.timestamp = timestamp
+    message.verdict = verdict
+    message.content = pickle.loads(data[offset:])
+    return message
+
+_COUNT = struct.Struct('<I')
+_ID_LENGTH = struct.Struct('<H')
+
+def encode_frame(receiver_ids: List[str], message: Message) -> bytes:
+    # A frame is the receiver list followed by the message, so a multicast is encoded once
+    parts = [_COUNT.pack(len(receiver_ids))]
+    for receiver_id in receiver_ids:
+        encoded = receiver_id.encode()
+        parts.append(_ID_LENGTH.pack(len(encoded)))
+        parts.append(encoded)
+    parts.append(encode_message(message))
+    return b''.join(parts)
+
+def decode_frame(frame: bytes) -> Tuple[List[str], Message]:
+    count = _COUNT.unpack_from(frame)[0]
+    offset = _COUNT.size
+    receiver_ids = []
+    for _ in range(count):
+        length = _ID_LENGTH.unpack_from(frame, offset)[0]
+        offset += _ID_LENGTH.size
+        receiver_ids.append(bytes(frame[offset:offset + length]).decode())
+        offset += length
+    return receiver_ids, decode_message(frame[offset:])
@@ -1,7 +1,16 @@
+from abc import ABC, abstractmethod
 from enum import Enum, auto
-from typing import Dict, Any, List, Optional
-from queue import PriorityQueue
+from typing import Dict, Any, List, Optional, Set, Tuple
+from queue import PriorityQueue, Empty, Full
+from types import MappingProxyType
+import asyncio
+import heapq
+import itertools
+import time
 import uuid
+from src.core.capabilities import CapabilityRegistry
+from src.core.routing import RoutingTable
+from src.core.tracing import tracer
 
 class MessageType(Enum):
     TASK = auto()
@@ -16,71 +25,563 @@ class Priority(Enum):
     HIGH = 3
     URGENT = 4
 
+# Message and holon ids are process-local integers; the random prefix keeps
+# their UUID views unique across runs and the kind tag keeps them apart.
+_ID_NAMESPACE = uuid.uuid4().int >> 64
+_message_ids = itertools.count(1)
+MESSAGE_ID_KIND = 0
+HOLON_ID_KIND = 1
+
+def id_to_uuid(local_id: int, kind: int = MESSAGE_ID_KIND) -> uuid.UUID:
+    # The top byte of the low half holds the kind; sharded ids stay well below it
+    return uuid.UUID(int=(_ID_NAMESPACE << 64) | (kind << 56) | local_id)
+
 class Message:
+    __slots__ = ('id', 'sender_id', 'receiver_id', 'type', 'content', 'priority', 'timestamp', 'verdict')
+
     def __init__(self, sender_id: str, receiver_id: str, msg_type: MessageType, 
-                 content: Dict[str, Any], priority: Priority = Priority.MEDIUM):
-        self.id = str(uuid.uuid4())
+                 content: Dict[str, Any], priority: Priority = Priority.MEDIUM, verdict=None):
+        self.id = next(_message_ids)
         self.sender_id = sender_id
         self.receiver_id = receiver_id
         self.type = msg_type
         self.content = content
         self.priority = priority
+        self.timestamp = time.time()
+        # Optional src.core.ethics.EthicalVerdict stamped on an approved task
+        self.verdict = verdict
+
+    @property
+    def uuid(self) -> uuid.UUID:
+        return id_to_uuid(self.id)
 
     def __lt__(self, other):
+        # Equal priorities fall back to the send sequence, i.e. FIFO
+        if self.priority is other.priority:
+            return self.id < other.id
         return self.priority.value < other.priority.value
 
-class MessageBus:
+class OverflowPolicy(Enum):
+    BLOCK = auto()            # Wait for space (AsyncMessageBus.send_message raises asyncio.QueueFull instead)
+    DROP_LOWEST = auto()      # Evict the lowest-priority, newest message; drop the incoming one if it ranks lowest
+    SPILL_TO_PARENT = auto()  # CommunicationProtocol re-delivers to the receiver's parent
+    REJECT = auto()           # CommunicationProtocol answers the sender with a failed RESULT
+
+def _task_id(entry: tuple) -> Optional[int]:
+    message = entry[2]
+    if message.type is MessageType.TASK and isinstance(message.content, dict):
+        return message.content.get('id')
+    return None
+
+class _TaskIndex:
+    # Pending TASK entries of one inbox heap by task id. Taken entries stay in the
+    # heap and are skipped when they surface, so taking a task needs no scan.
     def __init__(self):
+        self.tasks: Dict[int, tuple] = {}
+        self.taken: Set[int] = set()
+
+    def live(self, heap: List[tuple]) -> int:
+        return len(heap) - len(self.taken)
+
+    def push(self, heap: List[tuple], entry: tuple):
+        if entry[1] in self.taken:
+            # The message is coming back before its taken entry surfaced
+            self.compact(heap)
+        heapq.heappush(heap, entry)
+        task_id = _task_id(entry)
+        if task_id is not None:
+            self.tasks[task_id] = entry
+
+    def pop(self, heap: List[tuple]) -> tuple:
+        while True:
+            entry = heapq.heappop(heap)
+            if entry[1] in self.taken:
+                self.taken.discard(entry[1])
+                continue
+            self.forget(entry)
+            return entry
+
+    def pop_all(self, heap: List[tuple]) -> List[tuple]:
+        # A sorted list is a valid heap, so sorting once beats len(heap) pops
+        heap.sort()
+        entries = [entry for entry in heap if entry[1] not in self.taken] if self.taken else heap[:]
+        heap.clear()
+        self.tasks.clear()
+        self.taken.clear()
+        return entries
+
+    def take(self, heap: List[tuple], task_id: int) -> Optional[tuple]:
+        entry = self.tasks.pop(task_id, None)
+        if entry is None:
+            return None
+        self.taken.add(entry[1])
+        if 2 * len(self.taken) > len(heap):
+            self.compact(heap)
+        return entry
+
+    def forget(self, entry: tuple):
+        task_id = _task_id(entry)
+        if task_id is not None and self.tasks.get(task_id) is entry:
+            del self.tasks[task_id]
+
+    def compact(self, heap: List[tuple]):
+        heap[:] = [entry for entry in heap if entry[1] not in self.taken]
+        heapq.heapify(heap)
+        self.taken.clear()
+
+    def rebuild(self, heap: List[tuple]):
+        self.tasks = {task_id: entry for entry in heap if (task_id := _task_id(entry)) is not None}
+        self.taken = set()
+
+class _PriorityInbox(PriorityQueue):
+    # PriorityQueue whose size, gets and puts go through the inbox's task index
+    def __init__(self, maxsize: int, index: _TaskIndex):
+        self.index = index
+        super().__init__(maxsize)
+
+    def _qsize(self):
+        return self.index.live(self.queue)
+
+    def _put(self, entry):
+        self.index.push(self.queue, entry)
+
+    def _get(self):
+        return self.index.pop(self.queue)
+
+class _InboxLimits(ABC):
+    # Capacity, overflow policy and queue-depth bookkeeping shared by the buses
+    def _init_limits(self):
+        self.capacities: Dict[str, Optional[int]] = {}
+        self.overflow_policies: Dict[str, OverflowPolicy] = {}
+        self.high_water: Dict[str, int] = {}
+        self.dropped: Dict[str, int] = {}
+        self.task_indexes: Dict[str, _TaskIndex] = {}
+
+    def _register_limits(self, holon_id: str, capacity: Optional[int], overflow: OverflowPolicy):
+        self.capacities[holon_id] = capacity
+        self.overflow_policies[holon_id] = overflow
+        self.high_water[holon_id] = 0
+        self.dropped[holon_id] = 0
+        self.task_indexes[holon_id] = _TaskIndex()
+
+    @abstractmethod
+    def depth(self, holon_id: str) -> int:
+        ...
+
+    def overflow_policy(self, holon_id: str) -> Optional[OverflowPolicy]:
+        return self.overflow_policies.get(holon_id)
+
+    def high_water_mark(self, holon_id: str) -> int:
+        return self.high_water.get(holon_id, 0)
+
+    def is_saturated(self, holon_id: str, threshold: float = 1.0) -> bool:
+        capacity = self.capacities.get(holon_id)
+        return capacity is not None and self.depth(holon_id) >= threshold * capacity
+
+    def _note_depth(self, holon_id: str, depth: int):
+        if depth > self.high_water[holon_id]:
+            self.high_water[holon_id] = depth
+
+    def _drop_lowest(self, holon_id: str, heap: List[tuple], entry: tuple) -> bool:
+        # Entries sort as (-priority, id, message), so the largest one is the lowest-priority, newest message
+        self.dropped[holon_id] += 1
+        task_index = self.task_indexes[holon_id]
+        if task_index.taken:
+            task_index.compact(heap)
+        worst = max(heap)
+        if entry > worst:
+            return False
+        index = heap.index(worst)
+        heap[index] = heap[-1]
+        heap.pop()
+        heapq.heapify(heap)
+        task_index.forget(worst)
+        return True
+
+class MessageBus(_InboxLimits):
+    def __init__(self, block_timeout: float = 5.0):
+        # How long a sender waits on a full BLOCK inbox before queue.Full is raised
+        self.block_timeout = block_timeout
         self.queues: Dict[str, PriorityQueue] = {}
+        self._init_limits()
 
-    def register_holon(self, holon_id: str):
+    def register_holon(self, holon_id: str, capacity: Optional[int] = None,
+                       overflow: OverflowPolicy = OverflowPolicy.REJECT):
         if holon_id not in self.queues:
-            self.queues[holon_id] = PriorityQueue()
+            # PriorityQueue only enforces its maxsize itself when senders should block
+            maxsize = capacity if capacity and overflow is OverflowPolicy.BLOCK else 0
+            self._register_limits(holon_id, capacity, overflow)
+            self.queues[holon_id] = _PriorityInbox(maxsize, self.task_indexes[holon_id])
 
-    def send_message(self, message: Message):
-        if message.receiver_id in self.queues:
-            self.queues[message.receiver_id].put((-message.priority.value, message))
-        else:
-            print(f"Error: Receiver {message.receiver_id} not registered")
+    def depth(self, holon_id: str) -> int:
+        queue = self.queues.get(holon_id)
+        return queue.qsize() if queue is not None else 0
+
+    def send_message(self, message: Message) -> bool:
+        queue = self.queues.get(message.receiver_id)
+        if queue is None:
+            tracer.warning("communication", "Receiver %s not registered", message.receiver_id)
+            return False
+        return self._put(message.receiver_id, queue, (-message.priority.value, message.id, message))
+
+    def multicast(self, message: Message, receiver_ids: List[str]) -> int:
+        # The same entry (and message) is shared by every inbox
+        entry = (-message.priority.value, message.id, message)
+        delivered = 0
+        for receiver_id in receiver_ids:
+            queue = self.queues.get(receiver_id)
+            if queue is None:
+                tracer.warning("communication", "Receiver %s not registered", receiver_id)
+                continue
+            if self._put(receiver_id, queue, entry):
+                delivered += 1
+        return delivered
+
+    def _put(self, holon_id: str, queue: _PriorityInbox, entry: tuple) -> bool:
+        capacity = self.capacities[holon_id]
+        policy = self.overflow_policies[holon_id]
+        if capacity is not None and policy is not OverflowPolicy.BLOCK and queue.qsize() >= capacity:
+            if policy is not OverflowPolicy.DROP_LOWEST:
+                return False
+            with queue.mutex:
+                if not self._drop_lowest(holon_id, queue.queue, entry):
+                    return False
+        try:
+            queue.put(entry, timeout=self.block_timeout)
+        except Full:
+            raise Full(f"Inbox of {holon_id} stayed full for {self.block_timeout}s") from None
+        self._note_depth(holon_id, queue.qsize())
+        return True
+
+    def take_task(self, holon_id: str, task_id: int) -> Optional[Message]:
+        queue = self.queues.get(holon_id)
+        if queue is None:
+            return None
+        with queue.mutex:
+            entry = queue.index.take(queue.queue, task_id)
+            if entry is None:
+                return None
+            queue.not_full.notify()
+        return entry[2]
 
     def get_message(self, receiver_id: str) -> Optional[Message]:
         if receiver_id in self.queues and not self.queues[receiver_id].empty():
-            return self.queues[receiver_id].get()[1]
+            return self.queues[receiver_id].get()[2]
         return None
 
-class CommunicationProtocol:
+    def drain(self, receiver_id: str, max_n: Optional[int] = None) -> List[Message]:
+        queue = self.queues.get(receiver_id)
+        messages = []
+        if queue is None:
+            return messages
+        while max_n is None or len(messages) < max_n:
+            try:
+                messages.append(queue.get_nowait()[2])
+            except Empty:
+                break
+        return messages
+
+    def __getstate__(self):
+        # PriorityQueues hold locks; keep just their size limit and live entries
+        state = self.__dict__.copy()
+        state['queues'] = {holon_id: (queue.maxsize, [entry for entry in queue.queue
+                                                      if entry[1] not in queue.index.taken])
+                           for holon_id, queue in self.queues.items()}
+        state['task_indexes'] = {}
+        return state
+
+    def __setstate__(self, state):
+        queues = state.pop('queues')
+        self.__dict__.update(state)
+        self.queues = {}
+        for holon_id, (maxsize, entries) in queues.items():
+            index = self.task_indexes[holon_id] = _TaskIndex()
+            queue = self.queues[holon_id] = _PriorityInbox(maxsize, index)
+            queue.queue.extend(entries)
+            index.rebuild(queue.queue)
+
+class AsyncMessageBus(_InboxLimits):
+    # MessageBus for a single thread / event loop: inboxes are plain heaps, so nothing takes a lock,
+    # and coroutines can await wait_message and put_message instead of polling or overflowing
     def __init__(self):
-        self.message_bus = MessageBus()
+        self.queues: Dict[str, List[tuple]] = {}
+        self._ready: Dict[str, asyncio.Event] = {}
+        self._space: Dict[str, asyncio.Event] = {}
+        self._init_limits()
 
-    def register_holon(self, holon: 'Holon'):
-        self.message_bus.register_holon(holon.id)
+    def register_holon(self, holon_id: str, capacity: Optional[int] = None,
+                       overflow: OverflowPolicy = OverflowPolicy.REJECT):
+        if holon_id not in self.queues:
+            self.queues[holon_id] = []
+            self._register_limits(holon_id, capacity, overflow)
 
-    def send_message(self, sender: 'Holon', receiver_id: str, msg_type: MessageType, 
-                     content: Dict[str, Any], priority: Priority = Priority.MEDIUM):
-        message = Message(sender.id, receiver_id, msg_type, content, priority)
+    def depth(self, holon_id: str) -> int:
+        queue = self.queues.get(holon_id)
+        return self.task_indexes[holon_id].live(queue) if queue is not None else 0
+
+    def send_message(self, message: Message) -> bool:
+        queue = self.queues.get(message.receiver_id)
+        if queue is None:
+            tracer.warning("communication", "Receiver %s not registered", message.receiver_id)
+            return False
+        if self._put(message.receiver_id, queue, (-message.priority.value, message.id, message)):
+            return True
+        if self.overflow_policies[message.receiver_id] is OverflowPolicy.BLOCK:
+            raise asyncio.QueueFull(f"Inbox of {message.receiver_id} is full; await put_message() to wait for space")
+        return False
+
+    async def put_message(self, message: Message) -> bool:
+        while self.is_saturated(message.receiver_id):
+            event = self._space.setdefault(message.receiver_id, asyncio.Event())
+            event.clear()
+            await event.wait()
+        return self.send_message(message)
+
+    def multicast(self, message: Message, receiver_ids: List[str]) -> int:
+        entry = (-message.priority.value, message.id, message)
+        delivered = 0
+        for receiver_id in receiver_ids:
+            queue = self.queues.get(receiver_id)
+            if queue is None:
+                tracer.warning("communication", "Receiver %s not registered", receiver_id)
+                continue
+            if self._put(receiver_id, queue, entry):
+                delivered += 1
+        return delivered
+
+    def _put(self, holon_id: str, queue: List[tuple], entry: tuple) -> bool:
+        capacity = self.capacities[holon_id]
+        task_index = self.task_indexes[holon_id]
+        if capacity is not None and task_index.live(queue) >= capacity:
+            if self.overflow_policies[holon_id] is not OverflowPolicy.DROP_LOWEST:
+                return False
+            if not self._drop_lowest(holon_id, queue, entry):
+                return False
+        task_index.push(queue, entry)
+        self._note_depth(holon_id, task_index.live(queue))
+        event = self._ready.get(holon_id)
+        if event is not None:
+            event.set()
+        return True
+
+    def get_message(self, receiver_id: str) -> Optional[Message]:
+        queue = self.queues.get(receiver_id)
+        if queue and self.task_indexes[receiver_id].live(queue):
+            message = self.task_indexes[receiver_id].pop(queue)[2]
+            self._signal_space(receiver_id)
+            return message
+        return None
+
+    def drain(self, receiver_id: str, max_n: Optional[int] = None) -> List[Message]:
+        queue = self.queues.get(receiver_id)
+        if not queue:
+            return []
+        task_index = self.task_indexes[receiver_id]
+        if max_n is None or max_n >= task_index.live(queue):
+            messages = [entry[2] for entry in task_index.pop_all(queue)]
+        else:
+            messages = [task_index.pop(queue)[2] for _ in range(max_n)]
+        self._signal_space(receiver_id)
+        return messages
+
+    def take_task(self, holon_id: str, task_id: int) -> Optional[Message]:
+        queue = self.queues.get(holon_id)
+        entry = self.task_indexes[holon_id].take(queue, task_id) if queue else None
+        if entry is None:
+            return None
+        self._signal_space(holon_id)
+        return entry[2]
+
+    async def wait_message(self, receiver_id: str) -> Message:
+        while True:
+            message = self.get_message(receiver_id)
+            if message is not None:
+                return message
+            event = self._ready.setdefault(receiver_id, asyncio.Event())
+            event.clear()
+            await event.wait()
+
+    def _signal_space(self, receiver_id: str):
+        event = self._space.get(receiver_id)
+        if event is not None:
+            event.set()
+
+    def __getstate__(self):
+        # Pending waiters belong to the running event loop and aren't part of a snapshot
+        state = self.__dict__.copy()
+        state['_ready'] = {}
+        state['_space'] = {}
+        return state
+
+class CommunicationProtocol:
+    def __init__(self, message_bus=None, inbox_capacity: Optional[int] = None,
+                 overflow: OverflowPolicy = OverflowPolicy.REJECT, journal=None):
+        self.message_bus = message_bus if message_bus is not None else MessageBus()
+        self.routing_table = RoutingTable()
+        self.capability_registry = CapabilityRegistry()
+        self.inbox_capacity = inbox_capacity
+        self.overflow = overflow
+        # Optional src.core.journal.MessageJournal
+        self.journal = journal
+        # A sharded bus applies this protocol's overflow handling to messages arriving from other shards;
+        # the sending side has journaled them already
+        bind = getattr(self.message_bus, 'bind', None)
+        if bind is not None:
+            bind(self._route)
+
+    def __getstate__(self):
+        # A journal wraps an open file; reattach one after restoring a snapshot
+        state = self.__dict__.copy()
+        state['journal'] = None
+        return state
+
+    def mark_cycle(self, cycle: int):
+        if self.journal is not None:
+            self.journal.commit_cycle(cycle)
+
+    def register_holon(self, holon: 'Holon', capacity: Optional[int] = None,
+                       overflow: Optional[OverflowPolicy] = None):
+        self.message_bus.register_holon(holon.id,
+                                        capacity if capacity is not None else self.inbox_capacity,
+                                        overflow or self.overflow)
+        self.routing_table.add(holon)
+        self.capability_registry.register(holon)
+
+    def deliver(self, message: Message, receiver_id: Optional[str] = None) -> bool:
+        # Journaled only once a bus has accepted it, under the holon that actually got it
+        accepted = self._route(message, receiver_id)
+        if accepted is not None and self.journal is not None:
+            self.journal.record(message, None if message.receiver_id is not None else [accepted])
+        return accepted is not None
+
+    def _route(self, message: Message, receiver_id: Optional[str] = None) -> Optional[str]:
+        # Multicast messages are shared by all receivers, so they stay unaddressed and are routed by `receiver_id`
+        if receiver_id is None:
+            receiver_id = message.receiver_id
+            if self.message_bus.send_message(message):
+                return receiver_id
+        elif self.message_bus.multicast(message, [receiver_id]):
+            return receiver_id
+        policy = self.message_bus.overflow_policy(receiver_id)
+        if policy is None:
+            return None
+        if policy is OverflowPolicy.SPILL_TO_PARENT:
+            path = self.routing_table.path(receiver_id)
+            if path and len(path) > 1:
+                tracer.debug("communication", "Inbox of %s is full, spilling message %s to %s",
+                             receiver_id, message.id, path[-2])
+                if message.receiver_id is None:
+                    return self._route(message, path[-2])
+                self._hand_over_task(message, path[-2])
+                message.receiver_id = path[-2]
+                return self._route(message)
+        self._reject(message, receiver_id)
+        return None
+
+    def move_task(self, source_id: str, target_id: str, task_id: int) -> bool:
+        # Re-addresses a still-pending TASK message; False if it's gone or the target has no room
+        if self.message_bus.is_saturated(target_id):
+            return False
+        message = self.message_bus.take_task(source_id, task_id)
+        if message is None:
+            return False
+        message.receiver_id = target_id
+        if self.message_bus.send_message(message):
+            return True
+        message.receiver_id = source_id
         self.message_bus.send_message(message)
-        print(f"Sent {msg_type.name} from {sender.name} to {receiver_id}: {content}")
+        return False
+
+    def _hand_over_task(self, message: Message, target_id: str):
+        # A spilled task is completed by whoever processes it, so its ledger entry goes along
+        if message.type is not MessageType.TASK or not isinstance(message.content, dict):
+            return
+        task_id = message.content.get('id')
+        holder = self.routing_table.get(message.receiver_id)
+        target = self.routing_table.get(target_id)
+        if task_id is not None and holder is not None and target is not None:
+            holder.transfer_task(task_id, target)
+
+    def _reject(self, message: Message, receiver_id: str):
+        tracer.warning("communication", "Inbox of %s is full, rejected message %s", receiver_id, message.id)
+        if message.sender_id is None or message.sender_id == receiver_id:
+            return
+        task_type = message.content.get('type') if isinstance(message.content, (dict, MappingProxyType)) else None
+        notice = Message(receiver_id, message.sender_id, MessageType.RESULT, {
+            "status": "failure",
+            "result": f"Inbox of {receiver_id} is full",
+            "rejected_message_id": message.id,
+            "type": task_type
+        }, Priority.HIGH)
+        # Best effort: a notice that doesn't fit either is dropped rather than bounced again
+        if self.message_bus.send_message(notice) and self.journal is not None:
+            self.journal.record(notice)
+
+    def send_message(self, sender: 'Holon', receiver_id: str, msg_type: MessageType, 
+                     content: Dict[str, Any], priority: Priority = Priority.MEDIUM, verdict=None) -> bool:
+        message = Message(sender.id, receiver_id, msg_type, content, priority, verdict)
+        delivered = self.deliver(message)
+        if tracer.message_tracing:
+            tracer.trace_message("sent" if delivered else "overflowed", message, sender.name)
+        return delivered
 
     def receive_message(self, receiver: 'Holon') -> Optional[Message]:
         message = self.message_bus.get_message(receiver.id)
-        if message:
-            print(f"{receiver.name} received {message.type.name}: {message.content}")
+        if message and tracer.message_tracing:
+            tracer.trace_message("received", message, receiver.name)
+        return message
+
+    def receive_messages(self, receiver: 'Holon', max_n: Optional[int] = None) -> List[Message]:
+        messages = self.message_bus.drain(receiver.id, max_n)
+        if tracer.message_tracing:
+            for message in messages:
+                tracer.trace_message("received", message, receiver.name)
+        return messages
+
+    def multicast(self, sender: Optional['Holon'], receiver_ids: List[str], msg_type: MessageType,
+                  content: Dict[str, Any], priority: Priority = Priority.MEDIUM) -> Message:
+        # One read-only message is shared by all receivers; its receiver_id is None
+        message = Message(sender.id if sender else None, None, msg_type, MappingProxyType(content), priority)
+        accepted = []
+        for receiver_id in receiver_ids:
+            holder = self._route(message, receiver_id)
+            if holder is not None:
+                accepted.append(holder)
+        if accepted and self.journal is not None:
+            self.journal.record(message, accepted)
+        delivered = len(accepted)
+        if tracer.message_tracing:
+            tracer.trace_message(f"multicast to {delivered}", message, sender.name if sender else "system")
         return message
 
     def broadcast(self, sender: 'Holon', receivers: List['Holon'], msg_type: MessageType, 
-                  content: Dict[str, Any], priority: Priority = Priority.MEDIUM):
-        for receiver in receivers:
-            self.send_message(sender, receiver.id, msg_type, content, priority)
-
-    def route_message(self, message: Message, holons: List['Holon']):
-        for holon in holons:
-            if holon.id == message.receiver_id:
-                self.message_bus.send_message(message)
-                return
-            if message.receiver_id in [child.id for child in holon.children]:
-                self.route_message(message, holon.children)
-                return
-        print(f"Error: Unable to route message to {message.receiver_id}")
+                  content: Dict[str, Any], priority: Priority = Priority.MEDIUM) -> Message:
+        return self.multicast(sender, [receiver.id for receiver in receivers], msg_type, content, priority)
+
+    def broadcast_subtree(self, sender: Optional['Holon'], root: 'Holon', msg_type: MessageType,
+                          content: Dict[str, Any], priority: Priority = Priority.MEDIUM,
+                          include_root: bool = True) -> Message:
+        receiver_ids = []
+        stack = [root] if include_root else list(reversed(root.children))
+        while stack:
+            holon = stack.pop()
+            receiver_ids.append(holon.id)
+            stack.extend(reversed(holon.children))
+        return self.multicast(sender, receiver_ids, msg_type, content, priority)
+
+    def route_message(self, message: Message, holons: List['Holon'] = None):
+        # `holons` is kept for backwards compatibility; the routing table covers the whole holarchy
+        if message.receiver_id in self.routing_table:
+            if self.message_bus.send_message(message) and self.journal is not None:
+                self.journal.record(message)
+        else:
+            tracer.warning("communication", "Unable to route message to %s", message.receiver_id)
+
+    def next_hop(self, sender_id: str, receiver_id: str) -> Optional[str]:
+        return self.routing_table.next_hop(sender_id, receiver_id)
+
+    def path(self, holon_id: str) -> Optional[Tuple[str, ...]]:
+        return self.routing_table.path(holon_id)
 
 # Example usage
 if __name__ == "__main__":
@@ -1,12 +1,214 @@
-from typing import Dict, Any
+from abc import ABC, abstractmethod
+import hashlib
+import hmac
+import itertools
+import secrets
+import time
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+import numpy as np
+from src.core.communication import Priority
+
+_rule_versions = itertools.count(1)
+# Rule dicts passed to evaluate_action, compiled once per distinct content
+_compiled_rules: Dict[Tuple, 'EthicalRules'] = {}
+
+class EthicalRules:
+    # Immutable, compiled rule set; changing the rules compiles a new one with a new `version`,
+    # which anything derived from the rules (such as the decision cache) is keyed on
+    __slots__ = ('forbidden_impacts', 'allowed_methods', 'version')
+
+    def __init__(self, forbidden_impacts: Iterable[str], allowed_methods: Iterable[str]):
+        self.forbidden_impacts = frozenset(forbidden_impacts)
+        self.allowed_methods = frozenset(allowed_methods)
+        self.version = next(_rule_versions)
+
+    @classmethod
+    def compile(cls, ethical_rules: Dict[str, Any]) -> 'EthicalRules':
+        return cls(ethical_rules['forbidden_impacts'], ethical_rules['allowed_methods'])
+
+class EthicalVerdict:
+    # Proof that a task was approved: a keyed hash of the rule version and task signature, so it
+    # only verifies with the issuing framework, for an unchanged task and rule set
+    __slots__ = ('rule_version', 'digest', 'signature', 'task', 'issuer')
+
+    def __init__(self, rule_version: int, digest: bytes, signature: Optional[Tuple] = None,
+                 task: Optional[Dict[str, Any]] = None, issuer: Optional[bytes] = None):
+        self.rule_version = rule_version
+        self.digest = digest
+        # Set once the digest has been checked (or made) in this process, so later checks skip the hash
+        self.signature = signature
+        self.task = task
+        self.issuer = issuer
+
+    def __eq__(self, other):
+        return (isinstance(other, EthicalVerdict) and self.rule_version == other.rule_version
+                and self.digest == other.digest)
+
+    def __hash__(self):
+        return hash((self.rule_version, self.digest))
+
+class Assessment:
+    __slots__ = ('approved', 'reason', 'scores')
+
+    def __init__(self, approved: bool, reason: Optional[str], scores: Tuple[float, ...]):
+        self.approved = approved
+        self.reason = reason
+        self.scores = scores
+
+class BatchAssessment:
+    # Parallel results of EthicalFramework.assess_batch, one row per task
+    def __init__(self, criteria: Tuple[str, ...], approved: np.ndarray, reasons: List[Optional[str]],
+                 scores: np.ndarray):
+        self.criteria = criteria
+        self.approved = approved
+        self.reasons = reasons
+        self.scores = scores
+
+    def __len__(self) -> int:
+        return len(self.approved)
+
+    def select(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [task for task, approved in zip(tasks, self.approved.tolist()) if approved]
 
 class EthicalFramework:
+    # Score columns reported by assess_task/assess_batch
+    CRITERIA = ('impact', 'method')
+    # Task fields a decision depends on; assessments are cached per distinct signature
+    SIGNATURE_FIELDS = ('type', 'impact', 'method')
+
+    def __init__(self, rules: Optional[EthicalRules] = None, cache_size: int = 4096):
+        self.rules = rules if rules is not None else EthicalRules.compile(self.get_ethical_rules())
+        self.cache_size = cache_size
+        self.criteria = self.CRITERIA
+        self.signature_fields = self.SIGNATURE_FIELDS
+        self.decisions: Dict[Tuple, Assessment] = {}
+        self._decisions_version = self.rules.version
+        self._verdict_key = secrets.token_bytes(16)
+        # Optional src.core.audit.EthicalAuditLog that assess_task, assess_batch and approves record into
+        self.audit_log = None
+
+    def update_rules(self, ethical_rules: Dict[str, Any]):
+        self.rules = EthicalRules.compile(ethical_rules)
+
+    def evaluate(self, action: Dict[str, Any]) -> bool:
+        return self._assessment(action).approved
+
+    def assess_task(self, task: Dict[str, Any], holon_id: Optional[str] = None) -> Dict[str, Any]:
+        assessment = self._assessment(task)
+        if self.audit_log is not None:
+            self._audit(task, assessment, holon_id)
+        return {'approved': assessment.approved, 'reason': assessment.reason,
+                'scores': dict(zip(self.criteria, assessment.scores))}
+
+    def assess_batch(self, tasks: List[Dict[str, Any]], holon_id: Optional[str] = None) -> BatchAssessment:
+        # Tasks with the same signature share one assessment; expand back with one gather
+        rows: Dict[Tuple, int] = {}
+        unique: List[Assessment] = []
+        inverse = np.empty(len(tasks), dtype=np.int64)
+        for i, task in enumerate(tasks):
+            key = self._signature(task)
+            row = rows.get(key)
+            if row is None:
+                row = rows[key] = len(unique)
+                unique.append(self._assessment(task))
+            inverse[i] = row
+        approved = np.array([assessment.approved for assessment in unique], dtype=bool)
+        scores = np.array([assessment.scores for assessment in unique], dtype=np.float64)
+        scores = scores.reshape(len(unique), len(self.criteria))
+        reasons = [assessment.reason for assessment in unique]
+        batch = BatchAssessment(self.criteria, approved[inverse], [reasons[row] for row in inverse.tolist()],
+                                scores[inverse])
+        if self.audit_log is not None:
+            self.audit_log.record_batch([task.get('type') for task in tasks], holon_id, batch.approved,
+                                        self.rules.version, batch.scores, batch.reasons)
+        return batch
+
+    def stamp(self, task: Dict[str, Any]) -> Optional[EthicalVerdict]:
+        # A verdict for approved tasks, to send along so later stages can skip re-assessment
+        if not self._assessment(task).approved:
+            return None
+        signature = self._signature(task)
+        return EthicalVerdict(self.rules.version, self._digest(self.rules.version, signature), signature, task,
+                              self._verdict_key)
+
+    def verify(self, task: Dict[str, Any], verdict: Optional[EthicalVerdict]) -> bool:
+        if verdict is None or verdict.rule_version != self.rules.version:
+            return False
+        if verdict.issuer is self._verdict_key:
+            # Hashed here already: the same task object, or an equal signature, is enough
+            return task is verdict.task or self._signature(task) == verdict.signature
+        # Decoded from another process: check the keyed digest once, then trust it like a local verdict
+        signature = self._signature(task)
+        if not hmac.compare_digest(verdict.digest, self._digest(verdict.rule_version, signature)):
+            return False
+        verdict.signature, verdict.task, verdict.issuer = signature, task, self._verdict_key
+        return True
+
+    def approves(self, task: Dict[str, Any], verdict: Optional[EthicalVerdict] = None,
+                 holon_id: Optional[str] = None) -> bool:
+        # Trust a valid verdict; anything else (missing, stale rules, changed task) is assessed again
+        if self.verify(task, verdict):
+            if self.audit_log is not None:
+                self._audit(task, self.decisions.get(verdict.signature), holon_id)
+            return True
+        assessment = self._assessment(task)
+        if self.audit_log is not None:
+            self._audit(task, assessment, holon_id)
+        return assessment.approved
+
+    def _audit(self, task: Dict[str, Any], assessment: Optional[Assessment], holon_id: Optional[str]):
+        if assessment is None:
+            # Approved on a verdict whose assessment has since left the cache
+            self.audit_log.record(task.get('type'), holon_id, True, self.rules.version,
+                                  [float('nan')] * len(self.criteria))
+        else:
+            self.audit_log.record(task.get('type'), holon_id, assessment.approved, self.rules.version,
+                                  assessment.scores, assessment.reason)
+
+    def _digest(self, rule_version: int, signature: Tuple) -> bytes:
+        payload = repr((rule_version, signature)).encode()
+        return hashlib.blake2b(payload, digest_size=8, key=self._verdict_key).digest()
+
+    def _signature(self, action: Dict[str, Any]) -> Tuple:
+        return tuple(map(action.get, self.signature_fields))
+
+    def _assessment(self, action: Dict[str, Any]) -> Assessment:
+        # Assessments are memoized per signature for the current rule version
+        if self._decisions_version != self.rules.version:
+            self.decisions.clear()
+            self._decisions_version = self.rules.version
+        key = self._signature(action)
+        assessment = self.decisions.get(key)
+        if assessment is None:
+            if len(self.decisions) >= self.cache_size:
+                self.decisions.clear()
+            assessment = self.decisions[key] = self._assess(action)
+        return assessment
+
+    def _assess(self, action: Dict[str, Any]) -> Assessment:
+        impact_ok = not ('impact' in action and action['impact'] in self.rules.forbidden_impacts)
+        method_ok = 'method' in action and action['method'] in self.rules.allowed_methods
+        if not impact_ok:
+            reason = f"Forbidden impact: {action['impact']}"
+        elif not method_ok:
+            reason = f"Method not allowed: {action.get('method')}"
+        else:
+            reason = None
+        return Assessment(impact_ok and method_ok, reason, (float(impact_ok), float(method_ok)))
+
     @staticmethod
-    def evaluate_action(action: Dict[str, Any], ethical_rules: Dict[str, Any]) -> bool:
+    def evaluate_action(action: Dict[str, Any], ethical_rules) -> bool:
+        # Accepts compiled EthicalRules or the plain dict from get_ethical_rules
+        if isinstance(ethical_rules, dict):
+            key = (tuple(ethical_rules['forbidden_impacts']), tuple(ethical_rules['allowed_methods']))
+            compiled = _compiled_rules.get(key)
+            if compiled is None:
+                compiled = _compiled_rules[key] = EthicalRules.compile(ethical_rules)
+            ethical_rules = compiled
         # Basic ethical evaluation
-        if 'impact' in action and action['impact'] in ethical_rules['forbidden_impacts']:
+        if 'impact' in action and action['impact'] in ethical_rules.forbidden_impacts:
             return False
-        if 'method' in action and action['method'] in ethical_rules['allowed_methods']:
+        if 'method' in action and action['method'] in ethical_rules.allowed_methods:
             return True
         # Default to caution
         return False
@@ -18,13 +220,142 @@ class EthicalFramework:
             'allowed_methods': ['communicate', 'process_data', 'make_decision']
         }
 
+class PillarEvaluator(ABC):
+    # One of the Six Pillars: cheaper pillars run first, and only `fields` feed the decision cache
+    name = 'pillar'
+    cost = 1.0
+    fields: Tuple[str, ...] = ()
+
+    @abstractmethod
+    def evaluate(self, task: Dict[str, Any], rules: EthicalRules) -> Tuple[float, Optional[str]]:
+        # A score in [0, 1], plus a reason when the pillar vetoes the task outright
+        ...
+
+class TrustworthinessEvaluator(PillarEvaluator):
+    name = 'trustworthiness'
+    fields = ('method',)
+
+    def evaluate(self, task, rules):
+        method = task.get('method')
+        if method is None:
+            return 0.75, None
+        if method not in rules.allowed_methods:
+            return 0.0, f"Method not allowed: {method}"
+        return 1.0, None
+
+class RespectEvaluator(PillarEvaluator):
+    name = 'respect'
+    fields = ('impact',)
+
+    def evaluate(self, task, rules):
+        if task.get('impact') == 'violate_privacy' and 'violate_privacy' in rules.forbidden_impacts:
+            return 0.0, "Violates privacy"
+        return 1.0, None
+
+class ResponsibilityEvaluator(PillarEvaluator):
+    name = 'responsibility'
+    fields = ('type',)
+
+    def evaluate(self, task, rules):
+        # Work that can't be attributed to a task type can't be accounted for
+        if not task.get('type'):
+            return 0.0, "Task has no type"
+        return 1.0, None
+
+class FairnessEvaluator(PillarEvaluator):
+    name = 'fairness'
+    cost = 2.0
+    fields = ('priority',)
+
+    def evaluate(self, task, rules):
+        # Urgent work pre-empts everyone else's tasks
+        return (0.75 if task.get('priority') is Priority.URGENT else 1.0), None
+
+class CaringEvaluator(PillarEvaluator):
+    name = 'caring'
+    cost = 2.0
+    fields = ('impact',)
+
+    def evaluate(self, task, rules):
+        impact = task.get('impact')
+        if impact is not None and impact in rules.forbidden_impacts:
+            return 0.0, f"Forbidden impact: {impact}"
+        return 1.0, None
+
+class CitizenshipEvaluator(PillarEvaluator):
+    name = 'citizenship'
+    fields = ('impact',)
+
+    def evaluate(self, task, rules):
+        if task.get('impact') == 'environmental_damage' and 'environmental_damage' in rules.forbidden_impacts:
+            return 0.0, "Causes environmental damage"
+        return 1.0, None
+
+class PillarStats:
+    __slots__ = ('evaluations', 'vetoes', 'seconds')
+
+    def __init__(self):
+        self.evaluations = 0
+        self.vetoes = 0
+        self.seconds = 0.0
+
+class SixPillarsEthicalFramework(EthicalFramework):
+    # Pillars run cheapest-first and stop at the first veto (later ones stay NaN); otherwise a task
+    # is approved when its mean pillar score reaches approval_threshold
+    def __init__(self, evaluators: Optional[List[PillarEvaluator]] = None, approval_threshold: float = 0.5,
+                 rules: Optional[EthicalRules] = None, cache_size: int = 4096):
+        super().__init__(rules, cache_size)
+        self.approval_threshold = approval_threshold
+        self.evaluators: List[PillarEvaluator] = []
+        self.stats: Dict[str, PillarStats] = {}
+        for evaluator in evaluators if evaluators is not None else [
+                TrustworthinessEvaluator(), RespectEvaluator(), ResponsibilityEvaluator(),
+                FairnessEvaluator(), CaringEvaluator(), CitizenshipEvaluator()]:
+            self.add_evaluator(evaluator)
+
+    def add_evaluator(self, evaluator: PillarEvaluator):
+        self.evaluators.append(evaluator)
+        self.stats[evaluator.name] = PillarStats()
+        self.criteria = tuple(e.name for e in self.evaluators)
+        # sorted() is stable, so equal costs keep the order they were added in
+        self._order = sorted(range(len(self.evaluators)), key=lambda i: self.evaluators[i].cost)
+        fields = dict.fromkeys(field for e in self.evaluators for field in e.fields)
+        self.signature_fields = tuple(fields)
+        # Recompiling bumps the rule version, which drops cached decisions and outstanding verdicts
+        self.rules = EthicalRules(self.rules.forbidden_impacts, self.rules.allowed_methods)
+
+    def _assess(self, action: Dict[str, Any]) -> Assessment:
+        scores = [float('nan')] * len(self.evaluators)
+        for i in self._order:
+            evaluator = self.evaluators[i]
+            stats = self.stats[evaluator.name]
+            start = time.perf_counter()
+            score, veto = evaluator.evaluate(action, self.rules)
+            stats.seconds += time.perf_counter() - start
+            stats.evaluations += 1
+            scores[i] = score
+            if veto is not None:
+                stats.vetoes += 1
+                return Assessment(False, veto, tuple(scores))
+        overall = sum(scores) / len(scores) if scores else 1.0
+        if overall < self.approval_threshold:
+            return Assessment(False, f"Overall pillar score {overall:.2f} below {self.approval_threshold}",
+                              tuple(scores))
+        return Assessment(True, None, tuple(scores))
+
 class EthicalHolon:
-    def __init__(self, base_holon: 'Holon'):
+    def __init__(self, base_holon: 'Holon', ethical_framework: Optional[EthicalFramework] = None):
         self.base_holon = base_holon
-        self.ethical_framework = EthicalFramework()
+        self.ethical_framework = ethical_framework if ethical_framework is not None else EthicalFramework()
+
+    def __getattr__(self, name):
+        # Everything but the ethics gate is the wrapped holon's
+        if name == 'base_holon':
+            raise AttributeError(name)
+        return getattr(self.base_holon, name)
 
-    def execute_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
-        if self.ethical_framework.evaluate_action(task, self.ethical_framework.get_ethical_rules()):
+    def execute_task(self, task: Dict[str, Any], verdict: Optional[EthicalVerdict] = None) -> Dict[str, Any]:
+        if self.ethical_framework.approves(task, verdict, self.base_holon.id):
             return self.base_holon.execute_task(task)
         else:
             return {"status": "rejected", "reason": "Ethical concerns"}
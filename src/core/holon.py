@@ -1,39 +1,192 @@
+import itertools
+import sys
 import uuid
-from typing import List, Dict, Any
-from src.core.communication import CommunicationProtocol, MessageType, Priority
+from typing import List, Dict, Any, Optional
+from src.core.capabilities import capability_bit, capability_mask, known_capability_bit
+from src.core.communication import CommunicationProtocol, MessageType, Priority, HOLON_ID_KIND, id_to_uuid
+from src.core.task_ledger import TaskLedger
+
+_holon_ids = itertools.count(1)
+# A resource limit of 0 still leaves this much capacity, so load ratios stay finite and just sort last
+MIN_CAPACITY = 1e-3
 
 class Holon:
-    def __init__(self, name: str, capabilities: List[str], comm_protocol: CommunicationProtocol):
-        self.id = str(uuid.uuid4())
+    def __init__(self, name: str, capabilities: List[str], comm_protocol: Optional[CommunicationProtocol] = None):
+        self._local_id = next(_holon_ids)
+        # Interned so the many dict lookups keyed by holon id hit the identity fast path
+        self.id = sys.intern(f"holon-{self._local_id}")
         self.name = name
-        self.capabilities = capabilities
+        self._capabilities = list(capabilities)
+        self._capability_mask = capability_mask(self._capabilities)
+        # Union of the capability bits of this holon and everything below it
+        self.subtree_mask = self._capability_mask
         self.parent = None
         self.children: List[Holon] = []
         self.state: Dict[str, Any] = {}
+        self.ledger = TaskLedger()
+        # Row in a HolonTable, set by HolonTable.attach
+        self.table = None
+        self.row = None
         self.comm_protocol = comm_protocol
-        self.comm_protocol.register_holon(self)
+        if comm_protocol is not None:
+            comm_protocol.register_holon(self)
+
+    # Capabilities are indexed by the protocol's CapabilityRegistry, so change
+    # them through these methods (or by assigning the property), not in place
+    @property
+    def capabilities(self) -> List[str]:
+        return self._capabilities
+
+    @capabilities.setter
+    def capabilities(self, capabilities: List[str]):
+        registry = self._capability_registry()
+        if registry is not None:
+            registry.unregister(self)
+        self._capabilities = list(capabilities)
+        if registry is not None:
+            registry.register(self)
+        self._capability_mask = capability_mask(self._capabilities)
+        self._update_subtree_mask()
+
+    def add_capability(self, capability: str):
+        if capability not in self._capabilities:
+            self._capabilities.append(capability)
+            registry = self._capability_registry()
+            if registry is not None:
+                registry.add(self, capability)
+            self._capability_mask |= capability_bit(capability)
+            self._update_subtree_mask()
+
+    def remove_capability(self, capability: str):
+        if capability in self._capabilities:
+            self._capabilities.remove(capability)
+            registry = self._capability_registry()
+            if registry is not None:
+                registry.remove(self, capability)
+            self._capability_mask &= ~capability_bit(capability)
+            self._update_subtree_mask()
+
+    def set_operational(self, operational: bool):
+        self.state['operational'] = operational
+        if self.table is not None:
+            self.table.set(self.row, 'operational', operational)
+        registry = self._capability_registry()
+        if registry is not None:
+            registry.set_operational(self, operational)
+
+    def set_resource_limit(self, resource_type: str, limit: Optional[float]):
+        key = f'{resource_type}_limit'
+        if limit is None:
+            self.state.pop(key, None)
+        else:
+            self.state[key] = limit
+        if self.table is not None and key in self.table.COLUMNS:
+            self.table.set(self.row, key, float('nan') if limit is None else limit)
+        registry = self._capability_registry()
+        if registry is not None:
+            registry.update_load(self)
+
+    @property
+    def capacity(self) -> float:
+        # Share of normal throughput left under resource limitations; the tightest limit wins
+        limits = [value for key, value in self.state.items() if key.endswith('_limit')]
+        return max(min(limits), MIN_CAPACITY) if limits else 1.0
+
+    # Pending tasks are mirrored into the HolonTable workload column and the registry's
+    # least-loaded heaps, so go through these
+    @property
+    def workload(self) -> int:
+        return len(self.ledger)
+
+    def assign_task(self, task_id: int, task_type: str, enqueued_at: Optional[float] = None):
+        self.ledger.add(task_id, task_type, enqueued_at)
+        self._sync_workload()
+
+    def complete_task(self, task_id: int) -> Optional[str]:
+        entry = self.ledger.pop(task_id)
+        self._sync_workload()
+        return entry[0] if entry is not None else None
+
+    def migrate_task(self, task_id: int, target: 'Holon') -> bool:
+        # The pending TASK message moves with the ledger entry, so the target both runs and completes it
+        if task_id not in self.ledger:
+            return False
+        if self.comm_protocol is not None and not self.comm_protocol.move_task(self.id, target.id, task_id):
+            return False
+        return self.transfer_task(task_id, target)
+
+    def transfer_task(self, task_id: int, target: 'Holon') -> bool:
+        # Ledger entry only, for a message that is already on its way to `target`
+        entry = self.ledger.pop(task_id)
+        if entry is None:
+            return False
+        target.assign_task(task_id, *entry)
+        self._sync_workload()
+        return True
+
+    def _sync_workload(self):
+        if self.table is not None:
+            self.table.set(self.row, 'workload', len(self.ledger))
+        registry = self._capability_registry()
+        if registry is not None:
+            registry.update_load(self)
+
+    def _capability_registry(self):
+        return self.comm_protocol.capability_registry if self.comm_protocol is not None else None
+
+    def _update_subtree_mask(self):
+        # Walk up until a summary stops changing; ancestors above it are already correct
+        holon = self
+        while holon is not None:
+            mask = holon._capability_mask
+            for child in holon.children:
+                mask |= child.subtree_mask
+            if mask == holon.subtree_mask and holon is not self:
+                break
+            holon.subtree_mask = mask
+            holon = holon.parent
+
+    def can_handle(self, task_type: str) -> bool:
+        return bool(self.subtree_mask & known_capability_bit(task_type))
 
     def add_child(self, child: 'Holon'):
+        ancestor = self
+        while ancestor is not None:
+            if ancestor is child:
+                raise ValueError(f"Adding {child.name} under {self.name} would create a cycle")
+            ancestor = ancestor.parent
         self.children.append(child)
         child.parent = self
+        if self.comm_protocol is not None:
+            self.comm_protocol.routing_table.attach(child, self)
+        self._update_subtree_mask()
 
     def remove_child(self, child: 'Holon'):
         self.children.remove(child)
         child.parent = None
+        if self.comm_protocol is not None:
+            self.comm_protocol.routing_table.detach(child)
+        self._update_subtree_mask()
 
     def execute_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
         # Basic task execution logic
-        if task['type'] in self.capabilities:
+        bit = known_capability_bit(task['type'])
+        if self._capability_mask & bit:
             # Simulate task execution
             result = f"Executed task {task['type']} successfully"
             return {"status": "success", "result": result}
-        else:
-            # If not capable, try to delegate to children
+        elif self.subtree_mask & bit:
+            # If not capable, delegate only into branches that summarise the capability
             for child in self.children:
-                result = child.execute_task(task)
-                if result['status'] == 'success':
-                    return result
-            return {"status": "failure", "result": "No capable holon found for the task"}
+                if child.subtree_mask & bit:
+                    result = child.execute_task(task)
+                    if result['status'] == 'success':
+                        return result
+        return {"status": "failure", "result": "No capable holon found for the task"}
+
+    @property
+    def uuid(self) -> uuid.UUID:
+        return id_to_uuid(self._local_id, HOLON_ID_KIND)
 
     def update_state(self, new_state: Dict[str, Any]):
         self.state.update(new_state)
@@ -44,18 +197,23 @@ class Holon:
     def __str__(self):
         return f"Holon(id={self.id}, name={self.name}, capabilities={self.capabilities})"
 
-    def send_message(self, receiver_id: str, msg_type: MessageType, content: Dict[str, Any], priority: Priority = Priority.MEDIUM):
-        self.comm_protocol.send_message(self, receiver_id, msg_type, content, priority)
+    def send_message(self, receiver_id: str, msg_type: MessageType, content: Dict[str, Any],
+                     priority: Priority = Priority.MEDIUM, verdict=None):
+        return self.comm_protocol.send_message(self, receiver_id, msg_type, content, priority, verdict)
 
     def receive_message(self):
         return self.comm_protocol.receive_message(self)
 
+    def receive_messages(self, max_n: int = None):
+        return self.comm_protocol.receive_messages(self, max_n)
+
     def process_messages(self):
         while True:
-            message = self.receive_message()
-            if not message:
+            messages = self.receive_messages()
+            if not messages:
                 break
-            if message.type == MessageType.TASK:
-                result = self.execute_task(message.content)
-                self.send_message(message.sender_id, MessageType.RESULT, result)
-            # Handle other message types as needed
+            for message in messages:
+                if message.type == MessageType.TASK:
+                    result = self.execute_task(message.content)
+                    self.send_message(message.sender_id, MessageType.RESULT, result)
+                # Handle other message types as needed
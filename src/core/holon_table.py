@@ -0,0 +1,90 @@
+from typing import Dict, List
+import numpy as np
+from src.core.holon import MIN_CAPACITY
+
+class HolonTable:
+    # Struct-of-arrays store for fleet-wide holon state, one row per attached holon (`holon.row`),
+    # so readers take whole NumPy columns; resource limits are NaN while unconstrained
+    RESOURCES = ('cpu', 'memory', 'network')
+    COLUMNS = {
+        'workload': (np.int64, 0),
+        'operational': (np.bool_, True),
+        'cpu_limit': (np.float64, np.nan),
+        'memory_limit': (np.float64, np.nan),
+        'network_limit': (np.float64, np.nan),
+        'energy': (np.float64, 0.0),
+        'energy_samples': (np.int64, 0),
+        'utilization': (np.float64, 0.0),
+        'utilization_samples': (np.int64, 0),
+    }
+
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self.holons: List['Holon'] = []
+        self.rows: Dict[str, int] = {}
+        self._columns = {name: np.full(capacity, default, dtype=dtype)
+                         for name, (dtype, default) in self.COLUMNS.items()}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        # A live view over the used rows
+        return self._columns[column][:self.size]
+
+    def attach(self, holon: 'Holon') -> int:
+        if holon.id in self.rows:
+            return self.rows[holon.id]
+        if self.size == len(self._columns['workload']):
+            self._grow()
+        row = self.size
+        self.size += 1
+        self.holons.append(holon)
+        self.rows[holon.id] = row
+        holon.table = self
+        holon.row = row
+        self._columns['workload'][row] = holon.workload
+        self._columns['operational'][row] = holon.state.get('operational', True)
+        for resource in self.RESOURCES:
+            self._columns[f'{resource}_limit'][row] = holon.state.get(f'{resource}_limit', np.nan)
+        return row
+
+    def rows_of(self, holons: List['Holon']) -> np.ndarray:
+        return np.fromiter((self.rows[holon.id] for holon in holons), dtype=np.int64, count=len(holons))
+
+    def capacity(self, rows: np.ndarray) -> np.ndarray:
+        # Vectorized Holon.capacity: the tightest resource limit, 1.0 where unconstrained
+        limits = self._columns['cpu_limit'][rows]
+        for resource in self.RESOURCES[1:]:
+            limits = np.fmin(limits, self._columns[f'{resource}_limit'][rows])
+        return np.where(np.isnan(limits), 1.0, np.maximum(limits, MIN_CAPACITY))
+
+    def set(self, row: int, column: str, value):
+        self._columns[column][row] = value
+
+    def record_energy(self, holon_id: str, energy: float):
+        self._update_mean(holon_id, 'energy', energy)
+
+    def record_utilization(self, holon_id: str, utilization: float):
+        self._update_mean(holon_id, 'utilization', utilization)
+
+    def _update_mean(self, holon_id: str, column: str, value: float):
+        row = self.rows.get(holon_id)
+        if row is None:
+            return
+        samples = self._columns[f'{column}_samples']
+        samples[row] += 1
+        self._columns[column][row] += (value - self._columns[column][row]) / samples[row]
+
+    def __getstate__(self):
+        # Only the used rows go into a snapshot; views, so they can be pickled out-of-band
+        state = self.__dict__.copy()
+        state['_columns'] = {name: column[:self.size] for name, column in self._columns.items()}
+        return state
+
+    def _grow(self):
+        for name, (dtype, default) in self.COLUMNS.items():
+            column = self._columns[name]
+            grown = np.full(max(len(column) * 2, 16), default, dtype=dtype)
+            grown[:len(column)] = column
+            self._columns[name] = grown
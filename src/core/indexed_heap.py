@@ -0,0 +1,79 @@
+from typing import Any, Dict, Hashable, List, Optional
+
+class IndexedHeap:
+    # Binary min-heap that tracks item positions, so keys can change and items leave in O(log n);
+    # keys must never tie, so items themselves are never compared
+    def __init__(self):
+        self.heap: List[List[Any]] = []
+        self.positions: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self.positions
+
+    def push(self, item: Hashable, key: Any):
+        if item in self.positions:
+            self.update(item, key)
+            return
+        self.heap.append([key, item])
+        self.positions[item] = len(self.heap) - 1
+        self._sift_up(len(self.heap) - 1)
+
+    def update(self, item: Hashable, key: Any):
+        i = self.positions[item]
+        old_key = self.heap[i][0]
+        self.heap[i][0] = key
+        if key < old_key:
+            self._sift_up(i)
+        else:
+            self._sift_down(i)
+
+    def remove(self, item: Hashable):
+        i = self.positions.pop(item, None)
+        if i is None:
+            return
+        last = self.heap.pop()
+        if i < len(self.heap):
+            self.heap[i] = last
+            self.positions[last[1]] = i
+            self._sift_up(i)
+            self._sift_down(self.positions[last[1]])
+
+    def key(self, item: Hashable) -> Any:
+        return self.heap[self.positions[item]][0]
+
+    def peek(self) -> Optional[Hashable]:
+        return self.heap[0][1] if self.heap else None
+
+    def _sift_up(self, i: int):
+        heap = self.heap
+        entry = heap[i]
+        while i:
+            parent = (i - 1) >> 1
+            if not entry[0] < heap[parent][0]:
+                break
+            heap[i] = heap[parent]
+            self.positions[heap[i][1]] = i
+            i = parent
+        heap[i] = entry
+        self.positions[entry[1]] = i
+
+    def _sift_down(self, i: int):
+        heap = self.heap
+        n = len(heap)
+        entry = heap[i]
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and heap[child + 1][0] < heap[child][0]:
+                child += 1
+            if not heap[child][0] < entry[0]:
+                break
+            heap[i] = heap[child]
+            self.positions[heap[i][1]] = i
+            i = child
+        heap[i] = entry
+        self.positions[entry[1]] = i
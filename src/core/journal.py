@@ -0,0 +1,188 @@
+import bisect
+import mmap
+import os
+import pickle
+import struct
+from typing import Dict, Iterator, List, Optional, Tuple
+from src.core.codec import decode_frame, encode_frame
+from src.core.communication import Message
+
+class MessageJournal:
+    # Append-only, memory-mapped log of delivered messages: a header, then [kind:u8][length:u32][payload]
+    # records; every checkpoint_interval cycles an INDEX record lets a reopen skip to the last index
+    MAGIC = b'HJNL'
+    VERSION = 2
+    _HEADER = struct.Struct('<4sIQQ')
+    _RECORD = struct.Struct('<BI')
+    _CYCLE = struct.Struct('<q')
+    _PREVIOUS_INDEX = struct.Struct('<Q')
+
+    MESSAGE = 1
+    CYCLE = 2
+    INDEX = 3
+
+    def __init__(self, path: str, checkpoint_interval: int = 16, initial_size: int = 1 << 20):
+        self.path = path
+        self.checkpoint_interval = checkpoint_interval
+        self.pending: List[bytes] = []
+        self.index: Dict[int, int] = {}
+        self._cycles: List[int] = []
+        self._unindexed: Dict[int, int] = {}
+        self.last_cycle: Optional[int] = None
+
+        exists = os.path.exists(path) and os.path.getsize(path) >= self._HEADER.size
+        self._file = open(path, 'r+b' if exists else 'w+b')
+        if not exists:
+            self._file.truncate(max(initial_size, self._HEADER.size))
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        if exists:
+            magic, version, self.committed, self.last_index = self._HEADER.unpack_from(self._map, 0)
+            if magic != self.MAGIC or version != self.VERSION:
+                raise ValueError(f"{path} is not a message journal")
+            self._load_index()
+        else:
+            self.committed = self._HEADER.size
+            self.last_index = 0
+            self._write_header()
+
+    def record(self, message: Message, receiver_ids: Optional[List[str]] = None):
+        # Encoded now, so later changes to the message (or its content) don't leak into the record
+        self.pending.append(encode_frame(receiver_ids if receiver_ids is not None else [message.receiver_id], message))
+
+    def commit_cycle(self, cycle: int):
+        # Write the whole cycle in one go, then publish it through the header, so a crash loses
+        # at most the unfinished cycle
+        chunks = [self._RECORD.pack(self.CYCLE, self._CYCLE.size), self._CYCLE.pack(cycle)]
+        for frame in self.pending:
+            chunks.append(self._RECORD.pack(self.MESSAGE, len(frame)))
+            chunks.append(frame)
+        self.pending = []
+        offset = self.committed
+        self._append(b''.join(chunks))
+        self._note_cycle(cycle, offset)
+        self._unindexed[cycle] = offset
+        if len(self._unindexed) >= self.checkpoint_interval:
+            self._write_index()
+        self._write_header()
+
+    def cycles(self) -> List[int]:
+        return list(self._cycles)
+
+    def seek(self, cycle: int) -> Optional[int]:
+        # Offset of the first committed cycle at or after `cycle`
+        position = bisect.bisect_left(self._cycles, cycle)
+        if position == len(self._cycles):
+            return None
+        return self.index[self._cycles[position]]
+
+    def read(self, start_cycle: Optional[int] = None,
+             end_cycle: Optional[int] = None) -> Iterator[Tuple[int, List[str], Message]]:
+        offset = self._HEADER.size if start_cycle is None else self.seek(start_cycle)
+        if offset is None:
+            return
+        cycle = None
+        for kind, payload in self._records(offset):
+            if kind == self.CYCLE:
+                cycle = self._CYCLE.unpack(payload)[0]
+                if end_cycle is not None and cycle > end_cycle:
+                    return
+            elif kind == self.MESSAGE:
+                receiver_ids, message = decode_frame(payload)
+                yield cycle, receiver_ids, message
+
+    def replay(self, comm_protocol, start_cycle: Optional[int] = None, end_cycle: Optional[int] = None) -> int:
+        # Feeds the bus directly: no overflow handling, tracing or re-journaling on the way
+        message_bus = comm_protocol.message_bus
+        replayed = 0
+        for _, receiver_ids, message in self.read(start_cycle, end_cycle):
+            for receiver_id in receiver_ids:
+                message_bus.register_holon(receiver_id)
+            if message.receiver_id is None:
+                message_bus.multicast(message, receiver_ids)
+            else:
+                message_bus.send_message(message)
+            replayed += 1
+        return replayed
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        if self.pending:
+            self.commit_cycle(self.last_cycle + 1 if self.last_cycle is not None else 0)
+        if self._unindexed:
+            self._write_index()
+            self._write_header()
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+
+    def __getstate__(self):
+        raise TypeError("MessageJournal wraps an open memory map and can't be pickled")
+
+    def _note_cycle(self, cycle: int, offset: int):
+        if cycle not in self.index:
+            self.index[cycle] = offset
+            if self._cycles and cycle < self._cycles[-1]:
+                bisect.insort(self._cycles, cycle)
+            else:
+                self._cycles.append(cycle)
+        if self.last_cycle is None or cycle > self.last_cycle:
+            self.last_cycle = cycle
+
+    def _write_index(self):
+        payload = self._PREVIOUS_INDEX.pack(self.last_index) + pickle.dumps(self._unindexed, protocol=5)
+        offset = self.committed
+        self._append(self._RECORD.pack(self.INDEX, len(payload)) + payload)
+        self.last_index = offset
+        self._unindexed = {}
+
+    def _load_index(self):
+        # Walk the chain of INDEX records back from the newest one ...
+        chain = []
+        offset = self.last_index
+        while offset:
+            kind, length = self._RECORD.unpack_from(self._map, offset)
+            start = offset + self._RECORD.size
+            chain.append(pickle.loads(self._map[start + self._PREVIOUS_INDEX.size:start + length]))
+            offset = self._PREVIOUS_INDEX.unpack_from(self._map, start)[0]
+        for entries in reversed(chain):
+            for cycle, cycle_offset in entries.items():
+                self._note_cycle(cycle, cycle_offset)
+        # ... then scan only what was committed after it
+        scan_from = self._HEADER.size
+        if self.last_index:
+            length = self._RECORD.unpack_from(self._map, self.last_index)[1]
+            scan_from = self.last_index + self._RECORD.size + length
+        offset = scan_from
+        for kind, payload in self._records(scan_from):
+            if kind == self.CYCLE:
+                cycle = self._CYCLE.unpack(payload)[0]
+                self._note_cycle(cycle, offset)
+                self._unindexed[cycle] = offset
+            offset += self._RECORD.size + len(payload)
+
+    def _records(self, offset: int) -> Iterator[Tuple[int, bytes]]:
+        while offset < self.committed:
+            kind, length = self._RECORD.unpack_from(self._map, offset)
+            start = offset + self._RECORD.size
+            yield kind, self._map[start:start + length]
+            offset = start + length
+
+    def _append(self, data: bytes):
+        end = self.committed + len(data)
+        if end > len(self._map):
+            self._grow(end)
+        self._map[self.committed:end] = data
+        self.committed = end
+
+    def _grow(self, needed: int):
+        size = len(self._map)
+        while size < needed:
+            size *= 2
+        self._map.close()
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def _write_header(self):
+        self._HEADER.pack_into(self._map, 0, self.MAGIC, self.VERSION, self.committed, self.last_index)
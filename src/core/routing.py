@@ -0,0 +1,59 @@
+from typing import Dict, Optional, Tuple
+
+class RoutingTable:
+    # Holon id -> holon and -> path (tuple of ids) from its root; re-indexes only moved subtrees
+    def __init__(self):
+        self.holons: Dict[str, 'Holon'] = {}
+        self.paths: Dict[str, Tuple[str, ...]] = {}
+
+    def __contains__(self, holon_id: str) -> bool:
+        return holon_id in self.holons
+
+    def __len__(self) -> int:
+        return len(self.holons)
+
+    def add(self, holon: 'Holon'):
+        self.holons[holon.id] = holon
+        parent_path = self.paths.get(holon.parent.id, ()) if holon.parent else ()
+        self._reindex(holon, parent_path)
+
+    def discard(self, holon_id: str):
+        self.holons.pop(holon_id, None)
+        self.paths.pop(holon_id, None)
+
+    def attach(self, child: 'Holon', parent: 'Holon'):
+        self._reindex(child, self.paths.get(parent.id, (parent.id,)))
+
+    def detach(self, child: 'Holon'):
+        self._reindex(child, ())
+
+    def get(self, holon_id: str) -> Optional['Holon']:
+        return self.holons.get(holon_id)
+
+    def path(self, holon_id: str) -> Optional[Tuple[str, ...]]:
+        return self.paths.get(holon_id)
+
+    def next_hop(self, from_id: str, to_id: str) -> Optional[str]:
+        src = self.paths.get(from_id)
+        dst = self.paths.get(to_id)
+        if src is None or dst is None:
+            return None
+        if from_id == to_id:
+            return to_id
+        depth = len(src)
+        if len(dst) > depth and dst[depth - 1] == from_id:
+            # Receiver is below us: step down towards it
+            return dst[depth]
+        if depth > 1:
+            return src[-2]
+        # Root of a different holarchy than the receiver
+        return None
+
+    def _reindex(self, holon: 'Holon', parent_path: Tuple[str, ...]):
+        stack = [(holon, parent_path)]
+        while stack:
+            node, prefix = stack.pop()
+            path = prefix + (node.id,)
+            if node.id in self.holons:
+                self.paths[node.id] = path
+            stack.extend((child, path) for child in node.children)
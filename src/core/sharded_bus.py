@@ -0,0 +1,263 @@
+import itertools
+import multiprocessing
+import struct
+import time
+from multiprocessing import shared_memory
+from types import MappingProxyType
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from src.core import communication
+from src.core.codec import decode_frame, encode_frame
+from src.core.communication import AsyncMessageBus, Message, OverflowPolicy
+from src.core.tracing import tracer
+
+class SharedRingBuffer:
+    # SPSC ring of length-prefixed records; the first 16 bytes hold the read and write offsets
+    _OFFSETS = struct.Struct('<QQ')
+    _LENGTH = struct.Struct('<I')
+
+    def __init__(self, capacity: int = 1 << 20, name: Optional[str] = None):
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=self._OFFSETS.size + capacity)
+            self._OFFSETS.pack_into(self.shm.buf, 0, 0, 0)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.capacity = self.shm.size - self._OFFSETS.size
+        self.name = self.shm.name
+
+    def free_space(self) -> int:
+        head, tail = self._OFFSETS.unpack_from(self.shm.buf, 0)
+        return self.capacity - (tail - head)
+
+    def push(self, data: bytes) -> bool:
+        head, tail = self._OFFSETS.unpack_from(self.shm.buf, 0)
+        size = self._LENGTH.size + len(data)
+        if size > self.capacity - (tail - head):
+            return False
+        self._write(tail, self._LENGTH.pack(len(data)))
+        self._write(tail + self._LENGTH.size, data)
+        struct.pack_into('<Q', self.shm.buf, 8, tail + size)
+        return True
+
+    def pop_all(self) -> List[bytes]:
+        head, tail = self._OFFSETS.unpack_from(self.shm.buf, 0)
+        records = []
+        while head < tail:
+            length = self._LENGTH.unpack(self._read(head, self._LENGTH.size))[0]
+            records.append(self._read(head + self._LENGTH.size, length))
+            head += self._LENGTH.size + length
+        if records:
+            struct.pack_into('<Q', self.shm.buf, 0, head)
+        return records
+
+    def close(self):
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+    def _write(self, position: int, data: bytes):
+        start = self._OFFSETS.size + position % self.capacity
+        first = min(len(data), self._OFFSETS.size + self.capacity - start)
+        self.shm.buf[start:start + first] = data[:first]
+        if first < len(data):
+            self.shm.buf[self._OFFSETS.size:self._OFFSETS.size + len(data) - first] = data[first:]
+
+    def _read(self, position: int, length: int) -> bytes:
+        start = self._OFFSETS.size + position % self.capacity
+        first = min(length, self._OFFSETS.size + self.capacity - start)
+        data = bytes(self.shm.buf[start:start + first])
+        if first < length:
+            data += bytes(self.shm.buf[self._OFFSETS.size:self._OFFSETS.size + length - first])
+        return data
+
+class ShardedMessageBus:
+    # Partitions holons across shard processes; each endpoint owns a local AsyncMessageBus and
+    # reaches the others through one SharedRingBuffer per (sender, receiver) endpoint pair
+    # Each shard numbers its messages from (shard + 1) << _ID_SHIFT, so ids never collide with the driver's
+    _ID_SHIFT = 48
+
+    def __init__(self, num_shards: int, ring_capacity: int = 1 << 20, send_timeout: float = 5.0):
+        self.num_shards = num_shards
+        self.driver = num_shards
+        self.endpoint = self.driver
+        self.send_timeout = send_timeout
+        self.owners: Dict[str, int] = {}
+        self.registrations: Dict[str, Tuple[Optional[int], OverflowPolicy]] = {}
+        self.rings: Dict[Tuple[int, int], SharedRingBuffer] = {
+            (src, dst): SharedRingBuffer(ring_capacity)
+            for src in range(num_shards + 1) for dst in range(num_shards + 1) if src != dst
+        }
+        self.local = AsyncMessageBus()
+        self.processes: List[multiprocessing.Process] = []
+        self.backlog: Deque[Tuple[List[str], Message]] = deque()
+        self.protocol_deliver: Optional[Callable] = None
+
+    @property
+    def queues(self):
+        return self.local.queues
+
+    def register_holon(self, holon_id: str, capacity: Optional[int] = None,
+                       overflow: OverflowPolicy = OverflowPolicy.REJECT, shard: Optional[int] = None):
+        if holon_id in self.owners:
+            return
+        if self.processes:
+            raise RuntimeError("Holons must be registered before the shard processes are started")
+        if shard is None:
+            # Round-robin keeps shards balanced without knowing the holarchy
+            shard = len(self.owners) % self.num_shards
+        self.owners[holon_id] = shard
+        self.registrations[holon_id] = (capacity, overflow)
+        if shard == self.endpoint:
+            self.local.register_holon(holon_id, capacity, overflow)
+
+    def shard_of(self, holon_id: str) -> Optional[int]:
+        return self.owners.get(holon_id)
+
+    def owned(self, holon_ids: List[str]) -> List[str]:
+        return [holon_id for holon_id in holon_ids if self.owners.get(holon_id) == self.endpoint]
+
+    def bind(self, deliver: Callable):
+        # CommunicationProtocol._route, which applies SPILL_TO_PARENT and REJECT to pumped-in messages
+        self.protocol_deliver = deliver
+
+    def attach(self, endpoint: int):
+        self.endpoint = endpoint
+        self.local = AsyncMessageBus()
+        for holon_id, shard in self.owners.items():
+            if shard == endpoint:
+                self.local.register_holon(holon_id, *self.registrations[holon_id])
+
+    def start(self, target: Callable, *args) -> List[multiprocessing.Process]:
+        # Forks the shard processes (Linux only), so holons must already be registered
+        context = multiprocessing.get_context('fork')
+        self.processes = [context.Process(target=self._run_shard, args=(shard, target, args), daemon=True)
+                          for shard in range(self.num_shards)]
+        for process in self.processes:
+            process.start()
+        return self.processes
+
+    def join(self, timeout: Optional[float] = None):
+        for process in self.processes:
+            process.join(timeout)
+
+    def close(self):
+        for ring in self.rings.values():
+            ring.close()
+        if self.endpoint == self.driver:
+            for ring in self.rings.values():
+                ring.unlink()
+
+    def __getstate__(self):
+        raise TypeError("ShardedMessageBus owns shared memory segments and worker processes and can't be pickled")
+
+    def _run_shard(self, shard: int, target: Callable, args: tuple):
+        communication._message_ids = itertools.count(((shard + 1) << self._ID_SHIFT) + 1)
+        self.attach(shard)
+        target(self, shard, *args)
+
+    def send_message(self, message: Message) -> bool:
+        owner = self.owners.get(message.receiver_id)
+        if owner is None:
+            tracer.warning("communication", "Receiver %s not registered", message.receiver_id)
+            return False
+        if owner == self.endpoint:
+            return self.local.send_message(message)
+        return self._push(owner, [message.receiver_id], message)
+
+    def multicast(self, message: Message, receiver_ids: List[str]) -> int:
+        by_shard: Dict[int, List[str]] = {}
+        for receiver_id in receiver_ids:
+            owner = self.owners.get(receiver_id)
+            if owner is None:
+                tracer.warning("communication", "Receiver %s not registered", receiver_id)
+                continue
+            by_shard.setdefault(owner, []).append(receiver_id)
+        delivered = 0
+        for owner, ids in by_shard.items():
+            if owner == self.endpoint:
+                delivered += self.local.multicast(message, ids)
+            elif self._push(owner, ids, message):
+                delivered += len(ids)
+        return delivered
+
+    def get_message(self, receiver_id: str) -> Optional[Message]:
+        self.pump()
+        return self.local.get_message(receiver_id)
+
+    def drain(self, receiver_id: str, max_n: Optional[int] = None) -> List[Message]:
+        self.pump()
+        return self.local.drain(receiver_id, max_n)
+
+    def take_task(self, holon_id: str, task_id: int) -> Optional[Message]:
+        # Only tasks in this endpoint's own inboxes can be moved
+        if self.owners.get(holon_id) != self.endpoint:
+            return None
+        self.pump()
+        return self.local.take_task(holon_id, task_id)
+
+    def depth(self, holon_id: str) -> int:
+        self.pump()
+        return self.local.depth(holon_id)
+
+    def high_water_mark(self, holon_id: str) -> int:
+        return self.local.high_water_mark(holon_id)
+
+    def is_saturated(self, holon_id: str, threshold: float = 1.0) -> bool:
+        if self.owners.get(holon_id) != self.endpoint:
+            return False
+        self.pump()
+        return self.local.is_saturated(holon_id, threshold)
+
+    def overflow_policy(self, holon_id: str) -> Optional[OverflowPolicy]:
+        registration = self.registrations.get(holon_id)
+        return registration[1] if registration else None
+
+    def pump(self) -> int:
+        received = 0
+        pending, self.backlog = self.backlog, deque()
+        for src in range(self.num_shards + 1):
+            if src == self.endpoint:
+                continue
+            for frame in self.rings[(src, self.endpoint)].pop_all():
+                receiver_ids, message = decode_frame(frame)
+                if message.receiver_id is None:
+                    message.content = MappingProxyType(message.content)
+                pending.append((receiver_ids, message))
+                received += 1
+        for receiver_ids, message in pending:
+            for receiver_id in receiver_ids:
+                self._deliver_local(receiver_id, message)
+        return received
+
+    def _deliver_local(self, receiver_id: str, message: Message):
+        # A full BLOCK inbox keeps the message in the backlog instead of dropping it or raising
+        if self.local.overflow_policy(receiver_id) is OverflowPolicy.BLOCK and self.local.is_saturated(receiver_id):
+            self.backlog.append(([receiver_id], message))
+            return
+        unicast = message.receiver_id is not None
+        if self.protocol_deliver is not None:
+            if unicast:
+                self.protocol_deliver(message)
+            else:
+                self.protocol_deliver(message, receiver_id)
+        elif unicast:
+            self.local.send_message(message)
+        else:
+            self.local.multicast(message, [receiver_id])
+
+    def _push(self, owner: int, receiver_ids: List[str], message: Message) -> bool:
+        frame = encode_frame(receiver_ids, message)
+        ring = self.rings[(self.endpoint, owner)]
+        deadline = None
+        while not ring.push(frame):
+            # Keep draining our own inbound rings while we wait, so two shards
+            # sending to each other can't deadlock on full rings
+            self.pump()
+            if deadline is None:
+                deadline = time.monotonic() + self.send_timeout
+            elif time.monotonic() > deadline:
+                tracer.warning("communication", "Ring to shard %d is full, dropped message %s", owner, message.id)
+                return False
+            time.sleep(0)
+        return True
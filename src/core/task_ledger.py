@@ -0,0 +1,53 @@
+import itertools
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+_task_ids = itertools.count(1)
+
+def next_task_id() -> int:
+    return next(_task_ids)
+
+class TaskLedger:
+    # Pending tasks of one holon by task id, with per-type counts; entries keep their first enqueue
+    # time across migrations, so `oldest_age` covers the wait anywhere in the holarchy
+    def __init__(self):
+        self.tasks: Dict[int, Tuple[str, float]] = {}
+        self.counts: Counter = Counter()
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self.tasks
+
+    def add(self, task_id: int, task_type: str, enqueued_at: Optional[float] = None):
+        if task_id in self.tasks:
+            return
+        self.tasks[task_id] = (task_type, time.time() if enqueued_at is None else enqueued_at)
+        self.counts[task_type] += 1
+
+    def pop(self, task_id: int) -> Optional[Tuple[str, float]]:
+        entry = self.tasks.pop(task_id, None)
+        if entry is not None:
+            task_type = entry[0]
+            self.counts[task_type] -= 1
+            if not self.counts[task_type]:
+                del self.counts[task_type]
+        return entry
+
+    def count(self, task_type: str) -> int:
+        return self.counts.get(task_type, 0)
+
+    def task_types(self) -> List[str]:
+        return [task_type for task_type, _ in self.tasks.values()]
+
+    def task_ids(self, n: Optional[int] = None) -> List[int]:
+        # Oldest entries first: dicts keep insertion order
+        return list(itertools.islice(self.tasks, n))
+
+    def oldest_age(self, now: Optional[float] = None) -> float:
+        if not self.tasks:
+            return 0.0
+        now = time.time() if now is None else now
+        return now - min(enqueued_at for _, enqueued_at in self.tasks.values())
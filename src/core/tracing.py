@@ -0,0 +1,106 @@
+import json
+import logging
+import random
+import sys
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+class Tracer:
+    # Leveled, sampled tracing per component; arguments are only formatted once a call passes the
+    # level check and sampler, and message events stay raw tuples until `recent` or `dump`
+    EVENT_FIELDS = ('time', 'event', 'message_id', 'sender_id', 'receiver_id', 'type', 'priority')
+
+    def __init__(self, level: int = logging.WARNING, sample_rate: float = 1.0, buffer_size: int = 10000):
+        self.default_level = level
+        self.levels: Dict[str, int] = {}
+        self.sample_rate = sample_rate
+        self.record_messages = False
+        self.events = deque(maxlen=buffer_size)
+        # Checked inline on the message hot path; kept in sync by _refresh
+        self.message_tracing = False
+
+        self.logger = logging.getLogger("holonic")
+        if not self.logger.handlers:
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(logging.Formatter("[%(name)s] %(message)s"))
+            self.logger.addHandler(handler)
+            self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+        self._loggers: Dict[str, logging.Logger] = {}
+        self._refresh()
+
+    def configure(self, level: Optional[int] = None, levels: Optional[Dict[str, int]] = None,
+                  sample_rate: Optional[float] = None, record_messages: Optional[bool] = None,
+                  buffer_size: Optional[int] = None):
+        if level is not None:
+            self.default_level = level
+        if levels is not None:
+            self.levels.update(levels)
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if record_messages is not None:
+            self.record_messages = record_messages
+        if buffer_size is not None:
+            self.events = deque(self.events, maxlen=buffer_size)
+        self._refresh()
+
+    def set_level(self, component: str, level: int):
+        self.levels[component] = level
+        self._refresh()
+
+    def enabled(self, component: str, level: int) -> bool:
+        return level >= self.levels.get(component, self.default_level)
+
+    def log(self, component: str, level: int, msg: str, *args):
+        if level < self.levels.get(component, self.default_level):
+            return
+        # Warnings and errors are never sampled away
+        if level < logging.WARNING and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        logger = self._loggers.get(component)
+        if logger is None:
+            logger = self._loggers[component] = self.logger.getChild(component)
+        logger.log(level, msg, *args)
+
+    def debug(self, component: str, msg: str, *args):
+        self.log(component, logging.DEBUG, msg, *args)
+
+    def info(self, component: str, msg: str, *args):
+        self.log(component, logging.INFO, msg, *args)
+
+    def warning(self, component: str, msg: str, *args):
+        self.log(component, logging.WARNING, msg, *args)
+
+    def error(self, component: str, msg: str, *args):
+        self.log(component, logging.ERROR, msg, *args)
+
+    def trace_message(self, event: str, message, holon_name: Optional[str] = None):
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        if self.record_messages:
+            self.events.append((time.time(), event, message.id, message.sender_id, message.receiver_id,
+                                message.type.name, message.priority.name))
+        if logging.DEBUG >= self.levels.get("communication", self.default_level):
+            self.logger.getChild("communication").debug(
+                "%s %s %s (%s): %s", holon_name, event, message.type.name, message.priority.name, message.content)
+
+    def recent(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        events = list(self.events)
+        if n is not None:
+            events = events[-n:]
+        return [dict(zip(self.EVENT_FIELDS, event)) for event in events]
+
+    def dump(self, path: str):
+        with open(path, 'w') as f:
+            for event in self.recent():
+                f.write(json.dumps(event) + "\n")
+
+    def clear(self):
+        self.events.clear()
+
+    def _refresh(self):
+        self.message_tracing = (self.record_messages or
+                                logging.DEBUG >= self.levels.get("communication", self.default_level))
+
+tracer = Tracer()
@@ -1,6 +1,7 @@
 import random
 from typing import List, Dict, Any
 from src.core.holon import Holon
+from src.core.tracing import tracer
 
 class ExternalEvent:
     def __init__(self, event_type: str, target: str, duration: int, impact: Dict[str, Any]):
@@ -44,7 +45,7 @@ class ExternalEventGenerator:
             event.start_cycle = current_cycle
             new_events.append(event)
             self.active_events.append(event)
-            print(f"New external event: {event}")
+            tracer.info("events", "New external event: %s", event)
 
         return new_events
 
@@ -53,7 +54,7 @@ class ExternalEventGenerator:
         for event in self.active_events:
             if current_cycle - event.start_cycle >= event.duration:
                 resolved_events.append(event)
-                print(f"Resolved external event: {event}")
+                tracer.info("events", "Resolved external event: %s", event)
 
         self.active_events = [event for event in self.active_events if event not in resolved_events]
         return resolved_events
@@ -67,17 +68,17 @@ class ConstraintManager:
         for event in events:
             if event.target == holon.name:
                 if isinstance(event, HardwareFailure):
-                    holon.state['operational'] = event.impact['operational']
+                    holon.set_operational(event.impact['operational'])
                 elif isinstance(event, ResourceLimitation):
                     resource_type = list(event.impact.keys())[0]
-                    holon.state[f'{resource_type}_limit'] = event.impact[resource_type]
+                    holon.set_resource_limit(resource_type, event.impact[resource_type])
 
     @staticmethod
     def remove_constraints(holon: Holon, events: List[ExternalEvent]) -> None:
         for event in events:
             if event.target == holon.name:
                 if isinstance(event, HardwareFailure):
-                    holon.state['operational'] = True
+                    holon.set_operational(True)
                 elif isinstance(event, ResourceLimitation):
                     resource_type = list(event.impact.keys())[0]
-                    holon.state.pop(f'{resource_type}_limit', None)
\ No newline at end of file
+                    holon.set_resource_limit(resource_type, None)
\ No newline at end of file
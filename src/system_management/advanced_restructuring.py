@@ -1,12 +1,15 @@
 from typing import List, Dict, Any
 from src.core.holon import Holon
 from src.core.communication import MessageType, Priority
+from src.core.tracing import tracer
+from src.system_management.restructuring import workload_heap, workload_vector
 import numpy as np
 from sklearn.cluster import KMeans
 
 class AdvancedRestructuringManager:
-    def __init__(self, holons: List[Holon], performance_metrics):
+    def __init__(self, holons: List[Holon], performance_metrics, table=None):
         self.holons = holons
+        self.table = table
         self.performance_metrics = performance_metrics
         self.last_restructure_time = 0
         self.restructure_cooldown = 10
@@ -28,6 +31,31 @@ class AdvancedRestructuringManager:
         self.performance_history.append(performance)
         return performance
 
+    def _evaluate_completion_time(self) -> float:
+        avg_times = [self.performance_metrics.get_average_completion_time(task_type)
+                     for task_type in self.performance_metrics.task_completion_times]
+        return 1 / (1 + np.mean(avg_times)) if avg_times else 1
+
+    def _evaluate_energy_efficiency(self) -> float:
+        if self.table is not None and self.holons:
+            return 1 / (1 + self.table['energy'][self.table.rows_of(self.holons)].mean())
+        efficiencies = [self.performance_metrics.get_energy_efficiency(holon.id) for holon in self.holons]
+        return 1 / (1 + np.mean(efficiencies)) if efficiencies else 1
+
+    def _evaluate_success_rate(self) -> float:
+        success_rates = [self.performance_metrics.get_task_success_rate(task_type)
+                         for task_type in self.performance_metrics.task_success_rates]
+        return np.mean(success_rates) if success_rates else 1
+
+    def _evaluate_communication_efficiency(self) -> float:
+        return self.performance_metrics.get_communication_efficiency()
+
+    def _evaluate_resource_utilization(self) -> float:
+        if self.table is not None and self.holons:
+            return self.table['utilization'][self.table.rows_of(self.holons)].mean()
+        utilizations = [self.performance_metrics.get_average_resource_utilization(holon.id) for holon in self.holons]
+        return np.mean(utilizations) if utilizations else 0
+
     def needs_restructuring(self) -> bool:
         if len(self.performance_history) < 20:
             return False
@@ -36,7 +64,7 @@ class AdvancedRestructuringManager:
         return recent_performance < 0.9 * overall_performance
 
     def restructure(self):
-        print("Initiating advanced system restructuring...")
+        tracer.info("restructuring", "Initiating advanced system restructuring...")
         self._optimize_capabilities()
         self._adjust_hierarchy()
         self._balance_workload()
@@ -50,13 +78,13 @@ class AdvancedRestructuringManager:
             worst_task = min(task_performances, key=task_performances.get)
             
             if len(holon.capabilities) > 3 and task_performances[worst_task] < 0.5:
-                holon.capabilities.remove(worst_task)
-                print(f"Removed underperforming capability {worst_task} from {holon.name}")
+                holon.remove_capability(worst_task)
+                tracer.debug("restructuring", "Removed underperforming capability %s from %s", worst_task, holon.name)
             
             for task in best_tasks:
                 if task not in holon.capabilities:
-                    holon.capabilities.append(task)
-                    print(f"Added high-performing capability {task} to {holon.name}")
+                    holon.add_capability(task)
+                    tracer.debug("restructuring", "Added high-performing capability %s to %s", task, holon.name)
 
     def _adjust_hierarchy(self):
         # Create feature vectors for each holon
@@ -84,30 +112,50 @@ class AdvancedRestructuringManager:
         
         for cluster in clusters.values():
             leader = max(cluster, key=lambda h: sum(self.performance_metrics.get_task_success_rate(task) for task in h.capabilities))
+            # Lift the leader out if a cluster member sits above it, otherwise the moves below would form a cycle
+            ancestors = set()
+            ancestor = leader.parent
+            while ancestor is not None:
+                ancestors.add(ancestor)
+                ancestor = ancestor.parent
+            if any(holon in ancestors for holon in cluster):
+                leader.parent.remove_child(leader)
             for holon in cluster:
                 if holon != leader:
                     if holon.parent:
                         holon.parent.remove_child(holon)
                     leader.add_child(holon)
-                    print(f"Moved {holon.name} under {leader.name} based on clustering")
+                    tracer.debug("restructuring", "Moved %s under %s based on clustering", holon.name, leader.name)
 
     def _balance_workload(self):
-        workloads = [len(h.state.get('pending_tasks', [])) for h in self.holons]
-        avg_workload = np.mean(workloads)
-        for i, holon in enumerate(self.holons):
-            if workloads[i] > 1.5 * avg_workload:
-                tasks_to_offload = holon.state.get('pending_tasks', [])[:int(workloads[i] - avg_workload)]
-                for task in tasks_to_offload:
-                    target_holon = min(self.holons, key=lambda h: len(h.state.get('pending_tasks', [])))
-                    if target_holon != holon:
-                        holon.state['pending_tasks'].remove(task)
-                        target_holon.state.setdefault('pending_tasks', []).append(task)
-                        print(f"Offloaded task {task} from {holon.name} to {target_holon.name}")
+        if not self.holons:
+            return
+        workloads = workload_vector(self.holons, self.table)
+        avg_workload = workloads.mean()
+        least_loaded = workload_heap(workloads)
+        for i in np.flatnonzero(workloads > 1.5 * avg_workload):
+            holon = self.holons[i]
+            for task_id in holon.ledger.task_ids(int(workloads[i] - avg_workload)):
+                target = least_loaded.peek()
+                target_holon = self.holons[target]
+                if target != i and holon.migrate_task(task_id, target_holon):
+                    workloads[i] -= 1
+                    workloads[target] += 1
+                    least_loaded.update(i, (workloads[i], i))
+                    least_loaded.update(target, (workloads[target], target))
+                    tracer.debug("restructuring", "Offloaded task %s from %s to %s", task_id, holon.name, target_holon.name)
 
     def _notify_restructuring(self):
-        for holon in self.holons:
-            holon.send_message(holon.id, MessageType.RESTRUCTURE, {
-                "new_capabilities": holon.capabilities,
+        if not self.holons:
+            return
+        # One shared snapshot multicast to everyone; each holon reads its own entry
+        structure = {
+            holon.id: {
+                "new_capabilities": list(holon.capabilities),
                 "new_parent": holon.parent.id if holon.parent else None,
                 "new_children": [child.id for child in holon.children]
-            }, Priority.HIGH)
\ No newline at end of file
+            }
+            for holon in self.holons
+        }
+        self.holons[0].comm_protocol.multicast(None, list(structure), MessageType.RESTRUCTURE,
+                                               {"structure": structure}, Priority.HIGH)
\ No newline at end of file
@@ -0,0 +1,113 @@
+import io
+import itertools
+import pickle
+import struct
+from types import MappingProxyType
+from typing import Any, List
+from src.core import capabilities, communication, ethics, holon, task_ledger
+from src.core.capabilities import capability_bit, capability_mask
+from src.core.holon import Holon
+
+MAGIC = b'HCKP'
+VERSION = 1
+_HEADER = struct.Struct('<4sIII')
+_LENGTH = struct.Struct('<Q')
+
+# Id counters that restored objects were numbered from
+_COUNTERS = ((communication, '_message_ids'), (holon, '_holon_ids'), (task_ledger, '_task_ids'),
+             (ethics, '_rule_versions'))
+
+def _peek_counter(module, name: str) -> int:
+    # itertools.count can't be read without advancing, so put back a counter at the same value
+    value = next(getattr(module, name))
+    setattr(module, name, itertools.count(value))
+    return value
+
+def _mapping_proxy(mapping: dict) -> MappingProxyType:
+    return MappingProxyType(mapping)
+
+def _reduce_mapping_proxy(proxy):
+    # Multicast content is shared read-only; the type itself can't be pickled by reference
+    return _mapping_proxy, (dict(proxy),)
+
+class _CheckpointPickler(pickle.Pickler):
+    dispatch_table = {**pickle.dispatch_table, MappingProxyType: _reduce_mapping_proxy}
+
+    def __init__(self, file, buffer_callback):
+        super().__init__(file, protocol=5, buffer_callback=buffer_callback)
+        self.holons: List[Holon] = []
+
+    def reducer_override(self, obj):
+        if isinstance(obj, Holon):
+            self.holons.append(obj)
+        return NotImplemented
+
+def checkpoint(runtime: Any) -> bytes:
+    # One snapshot of `runtime` (a manager, or a dict/tuple of components) plus the capability bits
+    # and id counters; large buffers go out-of-band after the header, and journals are left out
+    buffers: List[pickle.PickleBuffer] = []
+    stream = io.BytesIO()
+    pickler = _CheckpointPickler(stream, buffers.append)
+    pickler.dump(runtime)
+    counters = [_peek_counter(module, name) for module, name in _COUNTERS]
+    # Same pickler, so the holon list refers back to the objects in `runtime`
+    pickler.dump((list(capabilities._capability_bits), counters, pickler.holons))
+    raws = [buffer.raw() for buffer in buffers]
+    header = _HEADER.pack(MAGIC, VERSION, len(raws), 0)
+    lengths = b''.join(_LENGTH.pack(raw.nbytes) for raw in raws)
+    return b''.join([header, lengths, *raws, stream.getvalue()])
+
+def restore(snapshot: bytes) -> Any:
+    # Copy once so restored arrays are writable and independent of other branches
+    data = memoryview(bytearray(snapshot))
+    magic, version, count, _ = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a holarchy checkpoint")
+    offset = _HEADER.size
+    lengths = [_LENGTH.unpack_from(data, offset + i * _LENGTH.size)[0] for i in range(count)]
+    offset += count * _LENGTH.size
+    buffers = []
+    for length in lengths:
+        buffers.append(data[offset:offset + length])
+        offset += length
+    unpickler = pickle.Unpickler(io.BytesIO(data[offset:]), buffers=buffers)
+    runtime = unpickler.load()
+    capability_order, counters, holons = unpickler.load()
+    _restore_capability_bits(capability_order, holons)
+    for (module, name), value in zip(_COUNTERS, counters):
+        current = _peek_counter(module, name)
+        setattr(module, name, itertools.count(max(current, value)))
+    return runtime
+
+def save_checkpoint(runtime: Any, path: str):
+    with open(path, 'wb') as f:
+        f.write(checkpoint(runtime))
+
+def load_checkpoint(path: str) -> Any:
+    with open(path, 'rb') as f:
+        return restore(f.read())
+
+def _restore_capability_bits(capability_order: List[str], holons: List[Holon]):
+    for capability in capability_order:
+        capability_bit(capability)
+    if all(capabilities._capability_bits[capability] == 1 << i for i, capability in enumerate(capability_order)):
+        return
+    # Another process interned the capabilities in a different order: rebuild the masks bottom-up
+    for restored in holons:
+        restored._capability_mask = capability_mask(restored.capabilities)
+    for restored in holons:
+        if restored.parent is None:
+            _rebuild_subtree_masks(restored)
+
+def _rebuild_subtree_masks(root: Holon):
+    order = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack.extend(node.children)
+    for node in reversed(order):
+        mask = node._capability_mask
+        for child in node.children:
+            mask |= child.subtree_mask
+        node.subtree_mask = mask
@@ -1,67 +1,127 @@
-from typing import List, Dict, Any, Tuple
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple
 from src.core.holon import Holon
+from src.core.indexed_heap import IndexedHeap
 from src.core.communication import MessageType, Priority
+from src.core.tracing import tracer
 import random
 import time
 import numpy as np
 from sklearn.cluster import KMeans
 
 class AdvancedPerformanceMetrics:
-    def __init__(self):
+    def __init__(self, table=None, latency_window: int = 4096):
+        # Optional HolonTable that also gets per-holon running means of energy and utilization
+        self.table = table
+        # Most recent completion times per task type (and overall under None), for tail percentiles
+        self.latency_window = latency_window
+        self._latencies: Dict[Optional[str], deque] = {}
         self.task_completion_times: Dict[str, List[float]] = {}
         self.energy_consumption: Dict[str, List[float]] = {}
         self.task_success_rates: Dict[str, List[bool]] = {}
         self.communication_overhead: Dict[Tuple[str, str], int] = {}
         self.resource_utilization: Dict[str, List[float]] = {}
+        # Running [sum, count] per key, so the getters don't re-average whole histories
+        self._completion_totals: Dict[str, List[float]] = {}
+        self._energy_totals: Dict[str, List[float]] = {}
+        self._success_totals: Dict[str, List[float]] = {}
+        self._utilization_totals: Dict[str, List[float]] = {}
+        self._message_total = 0
 
     def update_task_completion_time(self, task_type: str, completion_time: float):
         if task_type not in self.task_completion_times:
             self.task_completion_times[task_type] = []
         self.task_completion_times[task_type].append(completion_time)
+        self._add(self._completion_totals, task_type, completion_time)
+        for key in (task_type, None):
+            window = self._latencies.get(key)
+            if window is None:
+                window = self._latencies[key] = deque(maxlen=self.latency_window)
+            window.append(completion_time)
 
     def update_energy_consumption(self, holon_id: str, energy: float):
         if holon_id not in self.energy_consumption:
             self.energy_consumption[holon_id] = []
         self.energy_consumption[holon_id].append(energy)
+        self._add(self._energy_totals, holon_id, energy)
+        if self.table is not None:
+            self.table.record_energy(holon_id, energy)
 
     def update_task_success(self, task_type: str, success: bool):
         if task_type not in self.task_success_rates:
             self.task_success_rates[task_type] = []
         self.task_success_rates[task_type].append(success)
+        self._add(self._success_totals, task_type, float(success))
 
     def update_communication_overhead(self, sender_id: str, receiver_id: str):
         self.communication_overhead[(sender_id, receiver_id)] = self.communication_overhead.get((sender_id, receiver_id), 0) + 1
+        self._message_total += 1
 
     def update_resource_utilization(self, holon_id: str, utilization: float):
         if holon_id not in self.resource_utilization:
             self.resource_utilization[holon_id] = []
         self.resource_utilization[holon_id].append(utilization)
+        self._add(self._utilization_totals, holon_id, utilization)
+        if self.table is not None:
+            self.table.record_utilization(holon_id, utilization)
 
     def get_average_completion_time(self, task_type: str) -> float:
-        times = self.task_completion_times.get(task_type, [])
-        return np.mean(times) if times else 0
+        return self._mean(self._completion_totals, task_type)
 
     def get_energy_efficiency(self, holon_id: str) -> float:
-        energy = self.energy_consumption.get(holon_id, [])
-        return np.mean(energy) if energy else 0
+        return self._mean(self._energy_totals, holon_id)
 
     def get_task_success_rate(self, task_type: str) -> float:
-        successes = self.task_success_rates.get(task_type, [])
-        return np.mean(successes) if successes else 0
+        return self._mean(self._success_totals, task_type)
 
     def get_communication_efficiency(self) -> float:
-        total_messages = sum(self.communication_overhead.values())
         unique_paths = len(self.communication_overhead)
-        return unique_paths / total_messages if total_messages > 0 else 1
+        return unique_paths / self._message_total if self._message_total > 0 else 1
 
     def get_average_resource_utilization(self, holon_id: str) -> float:
-        utilization = self.resource_utilization.get(holon_id, [])
-        return np.mean(utilization) if utilization else 0
+        return self._mean(self._utilization_totals, holon_id)
+
+    def get_latency_percentiles(self, task_type: Optional[str] = None,
+                                percentiles: Tuple[float, ...] = (50, 95, 99)) -> Dict[float, float]:
+        # Over the latest `latency_window` completions of a task type, or of all tasks
+        window = self._latencies.get(task_type)
+        if not window:
+            return {p: 0.0 for p in percentiles}
+        values = np.percentile(np.fromiter(window, dtype=np.float64, count=len(window)), percentiles)
+        return dict(zip(percentiles, values.tolist()))
+
+    @staticmethod
+    def _add(totals: Dict[str, List[float]], key: str, value: float):
+        total = totals.get(key)
+        if total is None:
+            totals[key] = [value, 1]
+        else:
+            total[0] += value
+            total[1] += 1
+
+    @staticmethod
+    def _mean(totals: Dict[str, List[float]], key: str) -> float:
+        total = totals.get(key)
+        return total[0] / total[1] if total else 0
+
+def workload_vector(holons: List[Holon], table=None) -> np.ndarray:
+    # Pending task counts as floats, gathered from the HolonTable column when there is one
+    if table is not None:
+        return table['workload'][table.rows_of(holons)].astype(np.float64)
+    return np.fromiter((holon.workload for holon in holons), dtype=np.float64, count=len(holons))
+
+def workload_heap(workloads: np.ndarray) -> IndexedHeap:
+    # Holon indices keyed by (workload, index): the least-loaded one is a peek, ties go to the lowest index
+    heap = IndexedHeap()
+    for i, workload in enumerate(workloads.tolist()):
+        heap.push(i, (workload, i))
+    return heap
 
 class AdvancedRestructuringManager:
-    def __init__(self, holons: List[Holon]):
+    def __init__(self, holons: List[Holon], table=None):
         self.holons = holons
-        self.metrics = AdvancedPerformanceMetrics()
+        self.table = table
+        self.metrics = AdvancedPerformanceMetrics(table)
         self.last_restructure_time = 0
         self.restructure_cooldown = 5
         self.performance_history: List[float] = []
@@ -89,6 +149,8 @@ class AdvancedRestructuringManager:
         return 1 / (1 + np.mean(avg_times)) if avg_times else 1
 
     def _evaluate_energy_efficiency(self) -> float:
+        if self.table is not None and self.holons:
+            return 1 / (1 + self.table['energy'][self.table.rows_of(self.holons)].mean())
         efficiencies = [self.metrics.get_energy_efficiency(holon.id) for holon in self.holons]
         return 1 / (1 + np.mean(efficiencies)) if efficiencies else 1
 
@@ -101,6 +163,8 @@ class AdvancedRestructuringManager:
         return self.metrics.get_communication_efficiency()
 
     def _evaluate_resource_utilization(self) -> float:
+        if self.table is not None and self.holons:
+            return self.table['utilization'][self.table.rows_of(self.holons)].mean()
         utilizations = [self.metrics.get_average_resource_utilization(holon.id) for holon in self.holons]
         return np.mean(utilizations) if utilizations else 0
 
@@ -114,7 +178,7 @@ class AdvancedRestructuringManager:
         return recent_performance < 0.9 * overall_performance
 
     def restructure(self):
-        print("Initiating advanced system restructuring...")
+        tracer.info("restructuring", "Initiating advanced system restructuring...")
         self.last_restructure_time = time.time()
         
         self._optimize_task_allocation()
@@ -131,17 +195,17 @@ class AdvancedRestructuringManager:
             
             # Add new optimal capabilities
             for task in optimal_capabilities - current_capabilities:
-                holon.capabilities.append(task)
-                print(f"Added capability {task} to {holon.name} for optimization")
+                holon.add_capability(task)
+                tracer.debug("restructuring", "Added capability %s to %s for optimization", task, holon.name)
             
             # Remove underperforming capabilities
             for task in current_capabilities - optimal_capabilities:
                 if task in holon.capabilities:
-                    holon.capabilities.remove(task)
-                    print(f"Removed underperforming capability {task} from {holon.name}")
+                    holon.remove_capability(task)
+                    tracer.debug("restructuring", "Removed underperforming capability %s from %s", task, holon.name)
 
     def _identify_best_tasks(self, holon: Holon) -> List[str]:
-        holon_tasks = set(holon.capabilities) | set(holon.state.get('pending_tasks', []))
+        holon_tasks = set(holon.capabilities) | set(holon.ledger.counts)
         task_scores = {}
         for task in holon_tasks:
             completion_time = self.metrics.get_average_completion_time(task)
@@ -176,34 +240,54 @@ class AdvancedRestructuringManager:
         # Assign cluster leaders and reorganize
         for cluster in clusters.values():
             leader = max(cluster, key=lambda h: sum(self.metrics.get_task_success_rate(task) for task in h.capabilities))
+            # Lift the leader out if a cluster member sits above it, otherwise the moves below would form a cycle
+            ancestors = set()
+            ancestor = leader.parent
+            while ancestor is not None:
+                ancestors.add(ancestor)
+                ancestor = ancestor.parent
+            if any(holon in ancestors for holon in cluster):
+                leader.parent.remove_child(leader)
             for holon in cluster:
                 if holon != leader:
                     if holon.parent:
                         holon.parent.remove_child(holon)
                     leader.add_child(holon)
-                    print(f"Moved {holon.name} under {leader.name} based on clustering")
+                    tracer.debug("restructuring", "Moved %s under %s based on clustering", holon.name, leader.name)
 
     def _load_balancing(self):
-        workloads = [len(h.state.get('pending_tasks', [])) for h in self.holons]
-        avg_workload = np.mean(workloads)
-        for i, holon in enumerate(self.holons):
-            if workloads[i] > 1.5 * avg_workload:
-                # Offload tasks to less busy holons
-                tasks_to_offload = holon.state.get('pending_tasks', [])[:int(workloads[i] - avg_workload)]
-                for task in tasks_to_offload:
-                    target_holon = min(self.holons, key=lambda h: len(h.state.get('pending_tasks', [])))
-                    if target_holon != holon:
-                        holon.state['pending_tasks'].remove(task)
-                        target_holon.state.setdefault('pending_tasks', []).append(task)
-                        print(f"Offloaded task {task} from {holon.name} to {target_holon.name}")
+        if not self.holons:
+            return
+        workloads = workload_vector(self.holons, self.table)
+        avg_workload = workloads.mean()
+        least_loaded = workload_heap(workloads)
+        for i in np.flatnonzero(workloads > 1.5 * avg_workload):
+            # Offload tasks to less busy holons
+            holon = self.holons[i]
+            for task_id in holon.ledger.task_ids(int(workloads[i] - avg_workload)):
+                target = least_loaded.peek()
+                target_holon = self.holons[target]
+                if target != i and holon.migrate_task(task_id, target_holon):
+                    workloads[i] -= 1
+                    workloads[target] += 1
+                    least_loaded.update(i, (workloads[i], i))
+                    least_loaded.update(target, (workloads[target], target))
+                    tracer.debug("restructuring", "Offloaded task %s from %s to %s", task_id, holon.name, target_holon.name)
 
     def _notify_restructuring(self):
-        for holon in self.holons:
-            holon.send_message(holon.id, MessageType.RESTRUCTURE, {
-                "new_capabilities": holon.capabilities,
+        if not self.holons:
+            return
+        # One shared snapshot multicast to everyone; each holon reads its own entry
+        structure = {
+            holon.id: {
+                "new_capabilities": list(holon.capabilities),
                 "new_parent": holon.parent.id if holon.parent else None,
                 "new_children": [child.id for child in holon.children]
-            }, Priority.HIGH)
+            }
+            for holon in self.holons
+        }
+        self.holons[0].comm_protocol.multicast(None, list(structure), MessageType.RESTRUCTURE,
+                                               {"structure": structure}, Priority.HIGH)
 
 # The AdaptiveHolonManager class would need to be updated to use AdvancedRestructuringManager
 # and AdvancedPerformanceMetrics instead of their previous versions.
\ No newline at end of file
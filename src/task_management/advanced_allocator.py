@@ -1,15 +1,25 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from src.core.holon import Holon
 from src.core.communication import MessageType, Priority
+from src.task_management.task_queue import SchedulingPolicy, band_key
 import numpy as np
 
 class AdvancedTaskAllocator:
-    def __init__(self, holons: List[Holon], performance_metrics):
+    def __init__(self, holons: List[Holon], performance_metrics, saturation_threshold: float = 0.9,
+                 capability_registry=None, table=None, policy: SchedulingPolicy = SchedulingPolicy.PRIORITY,
+                 deadline_slack: float = 1.0):
         self.holons = holons
         self.performance_metrics = performance_metrics
+        self.saturation_threshold = saturation_threshold
+        self.capability_registry = capability_registry
+        # With a HolonTable the workload and energy scores are gathered from its columns in one pass
+        self.table = table
+        # How allocate_batch orders tasks of the same priority
+        self.policy = policy
+        self.deadline_slack = deadline_slack
 
     def allocate_task(self, task: Dict[str, Any]) -> Holon:
-        capable_holons = [h for h in self.holons if task['type'] in h.capabilities]
+        capable_holons = [h for h in self._capable_holons(task['type']) if not self._is_saturated(h)]
         if not capable_holons:
             return None
 
@@ -17,7 +27,74 @@ class AdvancedTaskAllocator:
         chosen_holon = capable_holons[np.argmax(scores)]
         return chosen_holon
 
+    def allocate_batch(self, tasks: List[Dict[str, Any]]) -> List[Optional[Holon]]:
+        # The chosen holon (or None) per task; performance and priority only depend on the task, so each
+        # task takes the argmax of the holon scores over its capable holons, updated after every assignment
+        assignments: List[Optional[Holon]] = [None] * len(tasks)
+        types = {task['type']: None for task in tasks}
+        capable_by_type = {task_type: list(self._capable_holons(task_type)) for task_type in types}
+        holons = list(dict.fromkeys(holon for capable in capable_by_type.values() for holon in capable
+                                    if not self._is_saturated(holon)))
+        if not holons:
+            return assignments
+        columns = {holon: j for j, holon in enumerate(holons)}
+        capable = np.zeros((len(types), len(holons)), dtype=bool)
+        type_rows = {}
+        for i, (task_type, capable_holons) in enumerate(capable_by_type.items()):
+            type_rows[task_type] = i
+            capable[i, [columns[holon] for holon in capable_holons if holon in columns]] = True
+
+        if self.table is not None:
+            rows = self.table.rows_of(holons)
+            workloads = self.table['workload'][rows].astype(np.float64)
+            capacities = self.table.capacity(rows)
+            energy_scores = 1 / (1 + self.table['energy'][rows])
+        else:
+            workloads = np.fromiter((holon.workload for holon in holons), dtype=np.float64, count=len(holons))
+            capacities = np.fromiter((holon.capacity for holon in holons), dtype=np.float64, count=len(holons))
+            energy_scores = np.fromiter((self._calculate_energy_score(holon) for holon in holons),
+                                        dtype=np.float64, count=len(holons))
+        room = self._inbox_room(holons)
+        holon_scores = 0.3 / (1 + workloads / capacities) + 0.2 * energy_scores
+        holon_scores[room <= 0] = -np.inf
+
+        # Highest priority first, so later tasks spread out instead of piling onto the same holon
+        order = sorted(range(len(tasks)), key=lambda k: (-tasks[k]['priority'].value,
+                                                         band_key(self.policy, tasks[k], self.deadline_slack)))
+        for k in order:
+            scores = np.where(capable[type_rows[tasks[k]['type']]], holon_scores, -np.inf)
+            j = int(np.argmax(scores))
+            if scores[j] == -np.inf:
+                continue
+            assignments[k] = holons[j]
+            workloads[j] += 1
+            room[j] -= 1
+            holon_scores[j] = (0.3 / (1 + workloads[j] / capacities[j]) + 0.2 * energy_scores[j]
+                               if room[j] > 0 else -np.inf)
+        return assignments
+
+    def _inbox_room(self, holons: List[Holon]) -> np.ndarray:
+        # Messages each holon can still take before it counts as saturated; inf when unbounded
+        room = np.full(len(holons), np.inf)
+        for j, holon in enumerate(holons):
+            message_bus = holon.comm_protocol.message_bus
+            capacity = getattr(message_bus, 'capacities', {}).get(holon.id)
+            if capacity is not None:
+                room[j] = np.ceil(capacity * self.saturation_threshold) - message_bus.depth(holon.id)
+        return room
+
+    def _capable_holons(self, task_type: str):
+        if self.capability_registry is not None:
+            return self.capability_registry.holons_with(task_type, operational_only=True)
+        return [h for h in self.holons if task_type in h.capabilities and h.state.get('operational', True)]
+
+    def _is_saturated(self, holon: Holon) -> bool:
+        # Skip holons whose bounded inbox is (nearly) full instead of piling on more work
+        return holon.comm_protocol.message_bus.is_saturated(holon.id, self.saturation_threshold)
+
     def _calculate_allocation_scores(self, holons: List[Holon], task: Dict[str, Any]) -> List[float]:
+        if self.table is not None:
+            return self._calculate_allocation_scores_vectorized(holons, task)
         scores = []
         for holon in holons:
             workload_score = self._calculate_workload_score(holon)
@@ -34,15 +111,27 @@ class AdvancedTaskAllocator:
         
         return scores
 
+    def _calculate_allocation_scores_vectorized(self, holons: List[Holon], task: Dict[str, Any]) -> np.ndarray:
+        rows = self.table.rows_of(holons)
+        workload_scores = 1 / (1 + self.table['workload'][rows] / self.table.capacity(rows))
+        energy_scores = 1 / (1 + self.table['energy'][rows])
+        # Performance and priority don't depend on the holon
+        performance_score = self.performance_metrics.get_task_success_rate(task['type'])
+        priority_score = self._calculate_priority_score(task['priority'])
+        return (0.3 * workload_scores +
+                0.3 * performance_score +
+                0.2 * priority_score +
+                0.2 * energy_scores)
+
     def _calculate_workload_score(self, holon: Holon) -> float:
-        pending_tasks = len(holon.state.get('pending_tasks', []))
-        return 1 / (1 + pending_tasks)  # Higher score for fewer pending tasks
+        # Higher score for fewer pending tasks, relative to what resource limits leave the holon
+        return 1 / (1 + holon.workload / holon.capacity)
 
     def _calculate_performance_score(self, holon: Holon, task_type: str) -> float:
         return self.performance_metrics.get_task_success_rate(task_type)
 
     def _calculate_priority_score(self, priority: Priority) -> float:
-        return {Priority.LOW: 0.33, Priority.MEDIUM: 0.66, Priority.HIGH: 1.0}[priority]
+        return {Priority.LOW: 0.33, Priority.MEDIUM: 0.66, Priority.HIGH: 1.0, Priority.URGENT: 1.0}[priority]
 
     def _calculate_energy_score(self, holon: Holon) -> float:
         energy_consumption = self.performance_metrics.get_energy_efficiency(holon.id)
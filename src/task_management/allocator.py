@@ -1,89 +1,114 @@
-from typing import List, Dict, Any
+import logging
+import time
+from typing import Callable, List, Dict, Any, Optional
 from src.core.holon import Holon
 from src.core.communication import MessageType, Priority
+from src.core.task_ledger import next_task_id
+from src.core.tracing import tracer
+from src.task_management.task_queue import SchedulingPolicy, TaskQueue
 
 class Task:
     def __init__(self, task_type: str, content: Dict[str, Any], priority: Priority = Priority.MEDIUM):
+        self.id = next_task_id()
         self.type = task_type
         self.content = content
         self.priority = priority
 
 class TaskAllocator:
-    def __init__(self):
-        self.task_queue: List[Task] = []
-
-    def add_task(self, task: Task):
-        self.task_queue.append(task)
-        self.task_queue.sort(key=lambda x: x.priority.value, reverse=True)
-
-    def allocate_tasks(self, holons: List[Holon]):
-        allocated_tasks = 0
-        for task in self.task_queue[:]:
-            allocated = self._allocate_single_task(task, holons)
-            if allocated:
-                self.task_queue.remove(task)
-                allocated_tasks += 1
-        return allocated_tasks
-
-    def _allocate_single_task(self, task: Task, holons: List[Holon]) -> bool:
-        capable_holons = [h for h in holons if task.type in h.capabilities]
-        if not capable_holons:
-            return False
+    def __init__(self, capability_registry=None, aging_interval: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, policy: SchedulingPolicy = SchedulingPolicy.PRIORITY):
+        self.task_queue = TaskQueue(aging_interval, clock, policy)
+        self.capability_registry = capability_registry
+
+    def add_task(self, task: Task, now: Optional[float] = None):
+        self.task_queue.push(task, now)
+
+    def allocate_tasks(self, holons: List[Holon], max_tasks: Optional[int] = None):
+        managed = set(holons)
+        allocated = self.task_queue.pop_allocatable(lambda task: self._allocate_single_task(task, holons, managed),
+                                                    max_tasks)
+        return len(allocated)
 
+    def _allocate_single_task(self, task: Task, holons: List[Holon], managed: Optional[set] = None) -> bool:
         # Simple load balancing: choose the holon with the least pending tasks
-        chosen_holon = min(capable_holons, key=lambda h: len(h.state.get('pending_tasks', [])))
+        if self.capability_registry is not None:
+            chosen_holon = self.capability_registry.least_loaded(task.type, among=managed or set(holons))
+        else:
+            capable_holons = [h for h in holons if task.type in h.capabilities]
+            chosen_holon = min(capable_holons, key=lambda h: h.workload) if capable_holons else None
+        if chosen_holon is None:
+            return False
+
+        # Update holon state first, so a spilled message takes its ledger entry along
+        chosen_holon.assign_task(task.id, task.type)
 
         # Allocate the task
         chosen_holon.send_message(chosen_holon.id, MessageType.TASK, {
+            'id': task.id,
             'type': task.type,
             'content': task.content,
             'priority': task.priority
         })
 
-        # Update holon state
-        if 'pending_tasks' not in chosen_holon.state:
-            chosen_holon.state['pending_tasks'] = []
-        chosen_holon.state['pending_tasks'].append(task.type)
-
-        print(f"Allocated task {task.type} to {chosen_holon.name}")
+        tracer.debug("allocator", "Allocated task %s to %s", task.type, chosen_holon.name)
         return True
 
 class HolonManager:
-    def __init__(self, comm_protocol):
+    def __init__(self, comm_protocol, aging_interval: Optional[int] = 10, max_tasks_per_cycle: Optional[int] = None,
+                 executor=None, policy: SchedulingPolicy = SchedulingPolicy.PRIORITY):
         self.holons: List[Holon] = []
-        self.task_allocator = TaskAllocator()
+        # Waiting tasks gain a priority level every `aging_interval` cycles
+        self.task_allocator = TaskAllocator(comm_protocol.capability_registry, aging_interval, policy=policy)
+        self.max_tasks_per_cycle = max_tasks_per_cycle
+        # Optional WorkStealingExecutor; without one inboxes are drained one holon at a time
+        self.executor = executor
         self.comm_protocol = comm_protocol
+        self.current_cycle = 0
 
     def add_holon(self, holon: Holon):
         self.holons.append(holon)
 
     def submit_task(self, task_type: str, content: Dict[str, Any], priority: Priority = Priority.MEDIUM):
         task = Task(task_type, content, priority)
-        self.task_allocator.add_task(task)
+        self.task_allocator.add_task(task, now=self.current_cycle)
 
     def process_cycle(self):
         # Allocate tasks
-        allocated_tasks = self.task_allocator.allocate_tasks(self.holons)
-        print(f"Allocated {allocated_tasks} tasks")
+        allocated_tasks = self.task_allocator.allocate_tasks(self.holons, self.max_tasks_per_cycle)
+        tracer.info("allocator", "Allocated %d tasks", allocated_tasks)
 
         # Process messages for each holon
-        for holon in self.holons:
-            while True:
-                message = holon.receive_message()
-                if not message:
-                    break
-                if message.type == MessageType.TASK:
-                    result = holon.execute_task(message.content)
-                    holon.send_message(message.sender_id, MessageType.RESULT, result)
-                    # Update holon state
-                    holon.state['pending_tasks'].remove(message.content['type'])
-                elif message.type == MessageType.RESULT:
-                    print(f"{holon.name} received result: {message.content}")
+        if self.executor is not None:
+            self.executor.process(self.holons, lambda holon, message: holon.execute_task(message.content),
+                                  self._finish_task, self._handle_message)
+        else:
+            for holon in self.holons:
+                while True:
+                    messages = holon.receive_messages()
+                    if not messages:
+                        break
+                    for message in messages:
+                        if message.type == MessageType.TASK:
+                            self._finish_task(holon, holon, message, holon.execute_task(message.content))
+                        else:
+                            self._handle_message(holon, message)
 
         # Check for completed tasks and system status
         self._check_system_status()
+        self.comm_protocol.mark_cycle(self.current_cycle)
+        self.current_cycle += 1
+
+    def _finish_task(self, owner: Holon, executor: Holon, message, result: Dict[str, Any]):
+        executor.send_message(message.sender_id, MessageType.RESULT, result)
+        # Update holon state; a stolen task is still on its original holon's ledger
+        owner.complete_task(message.content['id'])
+
+    def _handle_message(self, holon: Holon, message):
+        if message.type == MessageType.RESULT:
+            tracer.debug("allocator", "%s received result: %s", holon.name, message.content)
 
     def _check_system_status(self):
+        if not tracer.enabled("allocator", logging.DEBUG):
+            return
         for holon in self.holons:
-            pending_tasks = len(holon.state.get('pending_tasks', []))
-            print(f"{holon.name} has {pending_tasks} pending tasks")
\ No newline at end of file
+            tracer.debug("allocator", "%s has %d pending tasks", holon.name, holon.workload)
\ No newline at end of file
@@ -0,0 +1,87 @@
+import itertools
+from collections import Counter
+from typing import Any, Dict, Hashable, List, Tuple
+
+Key = Tuple[str, Hashable]
+
+class DependencyTracker:
+    # Holds tasks until no task of a type in `dependencies` or id in `depends_on` is held here
+    def __init__(self):
+        self.pending: Dict[int, Dict[str, Any]] = {}
+        # Holders per key; a blocked task waits on one outstanding key at a time
+        self.outstanding: Counter = Counter()
+        self.waiters: Dict[Key, List[int]] = {}
+        self.ready: Dict[int, None] = {}
+        self.ready_by_key: Dict[Key, Dict[int, None]] = {}
+        self._keys: Dict[int, Tuple[Tuple[Key, ...], Tuple[Key, ...]]] = {}
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def add(self, task: Dict[str, Any]):
+        seq = next(self._seq)
+        held = [('type', task['type'])]
+        if task.get('id') is not None:
+            held.append(('task', task['id']))
+        needs = [('type', task_type) for task_type in task.get('dependencies', ())]
+        needs.extend(('task', task_id) for task_id in task.get('depends_on', ()))
+        self.pending[seq] = task
+        self._keys[seq] = (tuple(held), tuple(needs))
+        for key in held:
+            self.outstanding[key] += 1
+            if self.outstanding[key] == 1:
+                self._block(key)
+        self._place(seq)
+
+    def release(self) -> List[Dict[str, Any]]:
+        # Tasks that were ready when called, in arrival order; tasks this frees come out next time
+        released = sorted(self.ready)
+        self.ready = {}
+        for seq in released:
+            for key in self._keys[seq][1]:
+                self._unindex(key, seq)
+        tasks = []
+        for seq in released:
+            tasks.append(self.pending.pop(seq))
+            held, _ = self._keys.pop(seq)
+            for key in held:
+                self.outstanding[key] -= 1
+                if not self.outstanding[key]:
+                    del self.outstanding[key]
+                    self._wake(key)
+        return tasks
+
+    def tasks(self) -> List[Dict[str, Any]]:
+        # Everything still held, in arrival order
+        return list(self.pending.values())
+
+    def _place(self, seq: int):
+        needs = self._keys[seq][1]
+        for key in needs:
+            if key in self.outstanding:
+                self.waiters.setdefault(key, []).append(seq)
+                return
+        self.ready[seq] = None
+        for key in needs:
+            self.ready_by_key.setdefault(key, {})[seq] = None
+
+    def _block(self, key: Key):
+        # `key` just became outstanding: ready tasks that need it have to wait again
+        for seq in self.ready_by_key.pop(key, {}):
+            del self.ready[seq]
+            for other in self._keys[seq][1]:
+                if other != key:
+                    self._unindex(other, seq)
+            self.waiters.setdefault(key, []).append(seq)
+
+    def _wake(self, key: Key):
+        for seq in self.waiters.pop(key, ()):
+            self._place(seq)
+
+    def _unindex(self, key: Key, seq: int):
+        index = self.ready_by_key.get(key)
+        if index is not None:
+            index.pop(seq, None)
+            if not index:
+                del self.ready_by_key[key]
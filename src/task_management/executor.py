@@ -0,0 +1,128 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+from src.core.communication import Message, MessageType
+from src.core.holon import Holon
+
+class WorkStealingExecutor:
+    # Runs holon tasks on a thread pool; idle holons steal work they can run from their closest relatives
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers
+        self.steals = 0
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_pool'] = None
+        return state
+
+    def process(self, holons: Iterable[Holon], execute: Callable[[Holon, Message], Any],
+                merge: Callable[[Holon, Holon, Message, Any], None],
+                handle: Callable[[Holon, Message], None],
+                active: Callable[[Holon], bool] = lambda holon: True) -> int:
+        # Returns the number of messages processed
+        holons = [holon for holon in holons if active(holon)]
+        processed = 0
+        while True:
+            queues: Dict[Holon, Deque[Message]] = {}
+            others: List[Tuple[Holon, Message]] = []
+            for holon in holons:
+                queue = queues[holon] = deque()
+                while True:
+                    messages = holon.receive_messages()
+                    if not messages:
+                        break
+                    for message in messages:
+                        if message.type == MessageType.TASK:
+                            queue.append(message)
+                        else:
+                            others.append((holon, message))
+            if not others and not any(queues.values()):
+                return processed
+
+            # Workers only call `execute`; everything with side effects is applied here, in message id order
+            results = self._run(queues, execute)
+            entries = [(message.id, holon, None, message, None) for holon, message in others]
+            entries.extend((message.id, owner, thief, message, value) for owner, thief, message, value in results)
+            entries.sort(key=lambda entry: entry[0])
+            for _, holon, thief, message, value in entries:
+                if thief is None:
+                    handle(holon, message)
+                else:
+                    merge(holon, thief, message, value)
+            processed += len(entries)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _run(self, queues: Dict[Holon, Deque[Message]], execute) -> List[Tuple[Holon, Holon, Message, Any]]:
+        if not any(queues.values()):
+            return []
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="holon")
+        locks = {holon: threading.Lock() for holon in queues}
+        futures = [self._pool.submit(self._work, holon, queues, locks, execute) for holon in queues]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        self.steals += sum(owner is not thief for owner, thief, _, _ in results)
+        return results
+
+    def _work(self, holon: Holon, queues, locks, execute) -> List[Tuple[Holon, Holon, Message, Any]]:
+        results = []
+        own = queues[holon]
+        tiers = None
+        while True:
+            with locks[holon]:
+                message = own.popleft() if own else None
+            owner = holon
+            if message is None:
+                if tiers is None:
+                    tiers = self._victim_tiers(holon, queues)
+                owner, message = self._steal(holon, tiers, queues, locks)
+                if message is None:
+                    return results
+            results.append((owner, holon, message, execute(holon, message)))
+
+    def _steal(self, thief: Holon, tiers, queues, locks) -> Tuple[Optional[Holon], Optional[Message]]:
+        capabilities = set(thief.capabilities)
+        for tier in tiers:
+            # Busiest victim in the closest tier that has something the thief can run
+            for victim in sorted(tier, key=lambda holon: len(queues[holon]), reverse=True):
+                with locks[victim]:
+                    queue = queues[victim]
+                    for i in range(len(queue) - 1, -1, -1):
+                        if queue[i].content['type'] in capabilities:
+                            message = queue[i]
+                            del queue[i]
+                            return victim, message
+        return None, None
+
+    @staticmethod
+    def _victim_tiers(thief: Holon, queues) -> List[List[Holon]]:
+        # Siblings, then each enclosing subtree in turn (own descendants come with the parent's),
+        # then everything else, e.g. other roots of a flat swarm
+        tiers = []
+        seen = {thief}
+        if thief.parent is not None:
+            siblings = [holon for holon in thief.parent.children if holon is not thief]
+            tiers.append([holon for holon in siblings if holon in queues])
+            seen.update(siblings)
+        scope = thief.parent or thief
+        while scope is not None:
+            tier = []
+            stack = [scope]
+            while stack:
+                holon = stack.pop()
+                if holon not in seen:
+                    seen.add(holon)
+                    if holon in queues:
+                        tier.append(holon)
+                stack.extend(holon.children)
+            tiers.append(tier)
+            scope = scope.parent
+        tiers.append([holon for holon in queues if holon not in seen])
+        return tiers
@@ -0,0 +1,114 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+from src.core.tracing import tracer
+
+_DONE = None
+
+Batch = List[Dict[str, Any]]
+
+class StageMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.batches = 0
+        self.items_in = 0
+        self.items_out = 0
+        self.busy_seconds = 0.0
+        self.queue_high_water = 0
+
+class TaskPipeline:
+    # generate -> assess -> allocate -> execute as asyncio stages joined by bounded queues; the
+    # steps run in worker threads, so steps that share state have to lock it themselves
+    STAGES = ('generate', 'assess', 'allocate', 'execute')
+
+    def __init__(self, generator, assess: Callable[[Batch], Batch], allocate: Callable[[Batch], Batch],
+                 execute: Callable[[Batch], Batch], queue_size: int = 8, max_batch: int = 256,
+                 interval: float = 0.0):
+        self.generator = generator
+        self.steps = {'assess': assess, 'allocate': allocate, 'execute': execute}
+        self.queue_size = queue_size
+        self.max_batch = max_batch
+        self.interval = interval
+        self.stats = {name: StageMetrics(name) for name in self.STAGES}
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self.elapsed = 0.0
+        self._started: Optional[float] = None
+
+    async def run(self, steps: int):
+        # Queue feeding each stage after the generator
+        self.queues = {name: asyncio.Queue(self.queue_size) for name in self.STAGES[1:]}
+        self._started = time.perf_counter()
+        try:
+            await asyncio.gather(
+                self._generate(steps, self.queues['assess']),
+                self._stage('assess', self.queues['assess'], self.queues['allocate']),
+                self._stage('allocate', self.queues['allocate'], self.queues['execute']),
+                self._stage('execute', self.queues['execute'], None),
+            )
+        finally:
+            self.elapsed += time.perf_counter() - self._started
+            self._started = None
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        elapsed = self.elapsed + (time.perf_counter() - self._started if self._started is not None else 0.0)
+        metrics = {}
+        for name, stats in self.stats.items():
+            queue = self.queues.get(name)
+            metrics[name] = {
+                'batches': stats.batches,
+                'items_in': stats.items_in,
+                'items_out': stats.items_out,
+                'busy_seconds': stats.busy_seconds,
+                'throughput': stats.items_out / elapsed if elapsed > 0 else 0.0,
+                'utilization': stats.busy_seconds / elapsed if elapsed > 0 else 0.0,
+                'queue_depth': queue.qsize() if queue is not None else 0,
+                'queue_high_water': stats.queue_high_water,
+            }
+        return metrics
+
+    async def _generate(self, steps: int, output: asyncio.Queue):
+        stats = self.stats['generate']
+        for _ in range(steps):
+            started = time.perf_counter()
+            # One batch per step even when empty, so execute still runs on quiet steps
+            tasks = self.generator.generate_tasks(1)
+            stats.busy_seconds += time.perf_counter() - started
+            stats.batches += 1
+            stats.items_out += len(tasks)
+            await self._put(output, 'assess', tasks)
+            # Yields to the other stages even when there is no pacing
+            await asyncio.sleep(self.interval)
+        await output.put(_DONE)
+
+    async def _stage(self, name: str, source: asyncio.Queue, output: Optional[asyncio.Queue]):
+        stats = self.stats[name]
+        step = self.steps[name]
+        done = False
+        while not done:
+            batch = await source.get()
+            if batch is _DONE:
+                break
+            tasks = list(batch)
+            # Coalesce whatever is already waiting, so a stage that fell behind catches up in one call
+            while len(tasks) < self.max_batch and not source.empty():
+                batch = source.get_nowait()
+                if batch is _DONE:
+                    done = True
+                    break
+                tasks.extend(batch)
+            started = time.perf_counter()
+            results = await asyncio.to_thread(step, tasks)
+            stats.busy_seconds += time.perf_counter() - started
+            stats.batches += 1
+            stats.items_in += len(tasks)
+            stats.items_out += len(results)
+            if output is not None:
+                await self._put(output, self.STAGES[self.STAGES.index(name) + 1], results)
+        tracer.debug("pipeline", "%s stage finished after %d batches", name, stats.batches)
+        if output is not None:
+            await output.put(_DONE)
+
+    async def _put(self, queue: asyncio.Queue, name: str, tasks: Batch):
+        await queue.put(tasks)
+        stats = self.stats[name]
+        stats.queue_high_water = max(stats.queue_high_water, queue.qsize())
@@ -1,6 +1,8 @@
 import random
 from typing import List, Dict, Any
 from src.core.communication import Priority
+from src.core.task_ledger import next_task_id
+from src.task_management.dependencies import DependencyTracker
 import numpy as np
 
 class TaskPattern:
@@ -16,29 +18,28 @@ class TaskGenerator:
     def __init__(self, patterns: List[TaskPattern]):
         self.patterns = patterns
         self.current_time = 0
-        self.task_queue = []
+        # Generated tasks wait here until no task of a type they depend on is still waiting
+        self.dependencies = DependencyTracker()
 
     def generate_tasks(self, time_step: int) -> List[Dict[str, Any]]:
         self.current_time += time_step
-        new_tasks = []
 
         for pattern in self.patterns:
             if random.random() < pattern.frequency * time_step:
-                task = self._create_task(pattern)
-                new_tasks.append(task)
-                self.task_queue.append(task)
+                self.dependencies.add(self._create_task(pattern))
 
-        # Process task queue for dependencies
-        ready_tasks = [task for task in self.task_queue if self._dependencies_met(task)]
-        self.task_queue = [task for task in self.task_queue if task not in ready_tasks]
+        return self.dependencies.release()
 
-        return ready_tasks
+    def add_task(self, task: Dict[str, Any]):
+        # For tasks from outside the patterns; `depends_on` may list ids of specific tasks to wait for
+        self.dependencies.add(task)
 
     def _create_task(self, pattern: TaskPattern) -> Dict[str, Any]:
         priority = random.choices(list(pattern.priority_distribution.keys()),
                                   weights=list(pattern.priority_distribution.values()))[0]
         complexity = random.uniform(*pattern.complexity_range)
         return {
+            "id": next_task_id(),
             "type": pattern.task_type,
             "priority": priority,
             "complexity": complexity,
@@ -46,8 +47,20 @@ class TaskGenerator:
             "created_at": self.current_time
         }
 
-    def _dependencies_met(self, task: Dict[str, Any]) -> bool:
-        return all(dep not in [t["type"] for t in self.task_queue] for dep in task["dependencies"])
+class DynamicScenarioGenerator(TaskGenerator):
+    # A subclass rather than a patched generate_tasks closure, so generators can be checkpointed
+    def generate_tasks(self, time_step: int) -> List[Dict[str, Any]]:
+        self._add_crisis_tasks(self.current_time)
+        return super().generate_tasks(time_step)
+
+    def _add_crisis_tasks(self, time: int):
+        if 100 <= time < 150:
+            crisis_pattern = TaskPattern("crisis_response", 0.8, {Priority.HIGH: 1.0}, (5, 10))
+            self.patterns.append(crisis_pattern)
+        elif time >= 150:
+            self.patterns = [p for p in self.patterns if p.task_type != "crisis_response"]
+            recovery_pattern = TaskPattern("recovery_task", 0.4, {Priority.MEDIUM: 0.7, Priority.HIGH: 0.3}, (3, 7))
+            self.patterns.append(recovery_pattern)
 
 class RealWorldScenarioGenerator:
     @staticmethod
@@ -104,25 +117,7 @@ class RealWorldScenarioGenerator:
             TaskPattern("urgent_task", 0.2, {Priority.HIGH: 1.0},
                         (3, 8))
         ]
-        
-        task_generator = TaskGenerator(base_patterns)
-        
-        def add_crisis_tasks(time: int):
-            if 100 <= time < 150:
-                crisis_pattern = TaskPattern("crisis_response", 0.8, {Priority.HIGH: 1.0}, (5, 10))
-                task_generator.patterns.append(crisis_pattern)
-            elif time >= 150:
-                task_generator.patterns = [p for p in task_generator.patterns if p.task_type != "crisis_response"]
-                recovery_pattern = TaskPattern("recovery_task", 0.4, {Priority.MEDIUM: 0.7, Priority.HIGH: 0.3}, (3, 7))
-                task_generator.patterns.append(recovery_pattern)
-        
-        original_generate = task_generator.generate_tasks
-        def new_generate(time_step: int):
-            add_crisis_tasks(task_generator.current_time)
-            return original_generate(time_step)
-        
-        task_generator.generate_tasks = new_generate
-        return task_generator
+        return DynamicScenarioGenerator(base_patterns)
 
 # Usage example:
 # scenario_generator = RealWorldScenarioGenerator()
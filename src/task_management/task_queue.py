@@ -0,0 +1,120 @@
+import heapq
+import itertools
+import math
+import time
+from enum import Enum, auto
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+def _task_type(task) -> Any:
+    return task.get('type') if isinstance(task, dict) else getattr(task, 'type', None)
+
+class SchedulingPolicy(Enum):
+    PRIORITY = auto()            # FIFO within a priority band
+    EARLIEST_DEADLINE = auto()   # Earliest deadline first within a band
+    SHORTEST_WORK = auto()       # Lowest complexity first within a band
+
+def task_metadata(task, name: str, default: Any = None) -> Any:
+    # Generator metadata (complexity, created_at, deadline) sits on the task itself or on the content it wraps
+    if isinstance(task, dict):
+        value, content = task.get(name), task.get('content')
+    else:
+        value, content = getattr(task, name, None), getattr(task, 'content', None)
+    if value is None and isinstance(content, dict):
+        value = content.get(name)
+    return default if value is None else value
+
+def band_key(policy: SchedulingPolicy, task, deadline_slack: float = 1.0) -> float:
+    # Order within a priority band, lower first; without a deadline a task is due
+    # deadline_slack per unit of complexity after it was created
+    if policy is SchedulingPolicy.EARLIEST_DEADLINE:
+        deadline = task_metadata(task, 'deadline')
+        if deadline is None:
+            deadline = task_metadata(task, 'created_at', 0.0) + deadline_slack * task_metadata(task, 'complexity', 0.0)
+        return deadline
+    if policy is SchedulingPolicy.SHORTEST_WORK:
+        return task_metadata(task, 'complexity', 0.0)
+    return 0.0
+
+class TaskQueue:
+    # Pending tasks by priority, then `band_key`, then arrival; with aging_interval set, waiting
+    # tasks gain a priority level per interval, so LOW work isn't starved
+    def __init__(self, aging_interval: Optional[float] = None, clock: Callable[[], float] = time.monotonic,
+                 policy: SchedulingPolicy = SchedulingPolicy.PRIORITY, deadline_slack: float = 1.0):
+        self.aging_interval = aging_interval
+        self.clock = clock
+        self.policy = policy
+        self.deadline_slack = deadline_slack
+        # One heap per task type, plus a heap of each type's first entry, so a refused type is set aside whole
+        self.heaps: Dict[Any, List[Tuple[int, float, int, object]]] = {}
+        self.heads: List[Tuple[int, float, int, Any]] = []
+        self._size = 0
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def push(self, task, now: Optional[float] = None):
+        entry = (self._key(task, now), band_key(self.policy, task, self.deadline_slack), next(self._seq), task)
+        task_type = _task_type(task)
+        heap = self.heaps.setdefault(task_type, [])
+        heapq.heappush(heap, entry)
+        if heap[0] is entry:
+            # The type's previous head entry in `heads` goes stale and is skipped by _first
+            heapq.heappush(self.heads, (*entry[:3], task_type))
+        self._size += 1
+
+    def peek(self):
+        task_type = self._first()
+        return self.heaps[task_type][0][-1] if task_type is not None else None
+
+    def pop(self):
+        task_type = self._first()
+        return self._pop_first(task_type) if task_type is not None else None
+
+    def pop_allocatable(self, allocate: Callable[[object], bool], n: Optional[int] = None) -> List[object]:
+        # Pops tasks in order until `allocate` has taken `n`; refused tasks keep their place
+        allocated = []
+        refused = []
+        while n is None or len(allocated) < n:
+            task_type = self._first()
+            if task_type is None:
+                break
+            if allocate(self.heaps[task_type][0][-1]):
+                allocated.append(self._pop_first(task_type))
+            else:
+                # The whole type sits out the rest of the round
+                refused.append(heapq.heappop(self.heads))
+        for head in refused:
+            heapq.heappush(self.heads, head)
+        return allocated
+
+    def _first(self) -> Any:
+        # Type of the next task, dropping stale heads on the way
+        while self.heads:
+            _, _, seq, task_type = self.heads[0]
+            heap = self.heaps.get(task_type)
+            if heap and heap[0][2] == seq:
+                return task_type
+            heapq.heappop(self.heads)
+        return None
+
+    def _pop_first(self, task_type):
+        heap = self.heaps[task_type]
+        task = heapq.heappop(heap)[-1]
+        heapq.heappop(self.heads)
+        if heap:
+            heapq.heappush(self.heads, (*heap[0][:3], task_type))
+        else:
+            del self.heaps[task_type]
+        self._size -= 1
+        return task
+
+    def _key(self, task, now: Optional[float]) -> int:
+        if self.aging_interval is None:
+            return -task.priority.value
+        # Aging every waiting task alike never reorders them, so the key is fixed at push time
+        now = self.clock() if now is None else now
+        return math.floor(now / self.aging_interval) - task.priority.value
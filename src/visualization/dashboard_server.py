@@ -1,9 +1,10 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from flask_socketio import SocketIO
 from flask_cors import CORS
 import threading
 import time
 import numpy as np
+from src.core.tracing import tracer
 
 app = Flask(__name__)
 CORS(app)
@@ -28,7 +29,7 @@ class DashboardServer:
 
     def get_system_data(self):
         return {
-            'holons': [self.holon_to_dict(h) for h in self.holon_manager.holons],
+            'holons': self.holons_to_dicts(self.holon_manager.holons),
             'performance': self.holon_manager.restructuring_manager.evaluate_system_performance(),
             'active_events': [str(e) for e in self.holon_manager.event_generator.get_active_events()],
             'current_scenario': self.holon_manager.current_scenario,
@@ -60,11 +61,32 @@ class DashboardServer:
             'capabilities': holon.capabilities,
             'parent': holon.parent.name if holon.parent else None,
             'children': [child.name for child in holon.children],
-            'pending_tasks': holon.state.get('pending_tasks', []),
+            'pending_tasks': holon.ledger.task_types(),
             'operational': holon.state.get('operational', True),
             'resource_limits': {k: v for k, v in holon.state.items() if k.endswith('_limit')}
         }
 
+    def holons_to_dicts(self, holons):
+        table = getattr(self.holon_manager, 'holon_table', None)
+        if table is None or not holons:
+            return [self.holon_to_dict(h) for h in holons]
+        # Gather the table-backed fields for the whole fleet at once
+        rows = table.rows_of(holons)
+        operational = table['operational'][rows].tolist()
+        limits = {f'{resource}_limit': table[f'{resource}_limit'][rows] for resource in table.RESOURCES}
+        constrained = {key: (~np.isnan(column)).tolist() for key, column in limits.items()}
+        limits = {key: column.tolist() for key, column in limits.items()}
+        return [{
+            'id': holon.id,
+            'name': holon.name,
+            'capabilities': holon.capabilities,
+            'parent': holon.parent.name if holon.parent else None,
+            'children': [child.name for child in holon.children],
+            'pending_tasks': holon.ledger.task_types(),
+            'operational': operational[i],
+            'resource_limits': {key: limits[key][i] for key in limits if constrained[key][i]}
+        } for i, holon in enumerate(holons)]
+
     def get_holon_performance(self):
         performance_data = {}
         for holon in self.holon_manager.holons:
@@ -101,6 +123,41 @@ def system_data():
 def holon_performance_history():
     return jsonify(dashboard_server.holon_performance_history)
 
+@app.route('/trace')
+def trace():
+    limit = request.args.get('limit', type=int)
+    return jsonify(tracer.recent(limit))
+
+@app.route('/audit')
+def audit():
+    audit_log = getattr(dashboard_server.holon_manager, 'audit_log', None)
+    if audit_log is None:
+        return jsonify({'decisions': [], 'summary': {}})
+    filters = {
+        'start_cycle': request.args.get('start_cycle', type=int),
+        'end_cycle': request.args.get('end_cycle', type=int),
+        'since': request.args.get('since', type=float),
+        'until': request.args.get('until', type=float),
+        'holon_id': request.args.get('holon'),
+        'task_type': request.args.get('task_type'),
+        'rule_version': request.args.get('rule_version', type=int),
+    }
+    columns = audit_log.query(limit=request.args.get('limit', 100, type=int), **filters)
+    scores = np.where(np.isnan(columns['scores']), None, columns['scores'].astype(object)).tolist()
+    decisions = [{
+        'cycle': cycle,
+        'time': timestamp,
+        'task_type': task_type,
+        'holon': holon,
+        'approved': approved,
+        'rule_version': rule_version,
+        'reason': reason,
+        'scores': dict(zip(columns['criteria'], row_scores))
+    } for cycle, timestamp, task_type, holon, approved, rule_version, reason, row_scores in zip(
+        columns['cycle'].tolist(), columns['time'].tolist(), columns['task_type'], columns['holon'],
+        columns['approved'].tolist(), columns['rule_version'].tolist(), columns['reason'], scores)]
+    return jsonify({'decisions': decisions, 'summary': audit_log.summary(**filters)})
+
 @socketio.on('intervene')
 def handle_intervention(data):
     intervention_type = data['type']
@@ -108,11 +165,11 @@ def handle_intervention(data):
     if intervention_type == 'add_capability':
         holon = next((h for h in dashboard_server.holon_manager.holons if h.name == target), None)
         if holon:
-            holon.capabilities.append(data['capability'])
+            holon.add_capability(data['capability'])
     elif intervention_type == 'remove_capability':
         holon = next((h for h in dashboard_server.holon_manager.holons if h.name == target), None)
         if holon and data['capability'] in holon.capabilities:
-            holon.capabilities.remove(data['capability'])
+            holon.remove_capability(data['capability'])
     elif intervention_type == 'trigger_restructuring':
         dashboard_server.holon_manager.restructuring_manager.restructure()
     
@@ -0,0 +1,52 @@
+import zlib
+import numpy as np
+from src.core.audit import EthicalAuditLog
+from src.core.ethics import EthicalHolon, SixPillarsEthicalFramework
+from src.core.holon import Holon
+
+def test_queries_span_sealed_chunks_and_active_block(monkeypatch):
+    log = EthicalAuditLog(("a", "b"), chunk_size=4, max_chunks=1)
+    for cycle in range(10):
+        log.record("analyze", f"holon-{cycle % 2}", cycle % 3 != 0, 1 + cycle // 5, [1.0, 0.5],
+                   None if cycle % 3 else "vetoed", cycle=cycle, timestamp=100.0 + cycle)
+    # One sealed chunk is kept (cycles 4-7 rotated out 0-3) plus two active rows
+    assert log.rotated == 1 and len(log) == 6
+
+    rows = log.query(start_cycle=5, end_cycle=8, holon_id="holon-1")
+    assert rows["cycle"].tolist() == [5, 7]
+    assert rows["holon"] == ["holon-1", "holon-1"]
+    assert rows["scores"].shape == (2, 2)
+
+    rejected = log.query(approved=False)
+    assert rejected["cycle"].tolist() == [6, 9] and rejected["reason"] == ["vetoed", "vetoed"]
+    assert log.query(rule_version=2, since=107.5)["cycle"].tolist() == [8, 9]
+    assert log.query(holon_id="unknown")["cycle"].tolist() == []
+    assert log.query(limit=3)["cycle"].tolist() == [7, 8, 9]
+    assert log.summary(start_cycle=8) == {"holon-0": {"approved": 1, "rejected": 0},
+                                         "holon-1": {"approved": 0, "rejected": 1}}
+
+    # A chunk's filter columns are decompressed once, not again for the output
+    decompressed = []
+    decompress = zlib.decompress
+    monkeypatch.setattr(zlib, "decompress", lambda data: decompressed.append(data) or decompress(data))
+    log.query(start_cycle=5, holon_id="holon-1", approved=True)
+    assert len(decompressed) == len(set(decompressed)) == len(log.chunks[0].compressed)
+
+def test_framework_records_decisions():
+    framework = SixPillarsEthicalFramework()
+    framework.audit_log = log = EthicalAuditLog(framework.criteria, chunk_size=2)
+    log.mark_cycle(3)
+    tasks = [{"type": "collect"}, {"type": "move", "impact": "environmental_damage"}, {"type": "collect"}]
+    framework.assess_batch(tasks)
+
+    holon = EthicalHolon(Holon("Worker", ["collect"]), framework)
+    verdict = framework.stamp(tasks[0])
+    assert holon.execute_task(tasks[0], verdict)["status"] == "success"
+    assert holon.execute_task(tasks[1])["status"] == "rejected"
+
+    rows = log.query(start_cycle=3)
+    assert rows["approved"].tolist() == [True, False, True, True, False]
+    assert rows["holon"][:3] == [None, None, None] and rows["holon"][3] == holon.id
+    assert rows["reason"][1] == "Causes environmental damage"
+    # Fairness and caring cost more than citizenship, so the veto stopped them from running
+    assert np.isnan(rows["scores"][1]).sum() == 2
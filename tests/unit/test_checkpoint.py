@@ -0,0 +1,70 @@
+import itertools
+from src.core import capabilities, ethics
+from src.core.communication import CommunicationProtocol, MessageBus, MessageType
+from src.core.ethics import EthicalFramework
+from src.core.holon import Holon
+from src.core.holon_table import HolonTable
+from src.system_management.checkpoint import checkpoint, restore
+from src.system_management.restructuring import AdvancedPerformanceMetrics
+from src.task_management.task_generator import RealWorldScenarioGenerator
+
+def build_runtime():
+    comm_protocol = CommunicationProtocol(MessageBus(), inbox_capacity=10)
+    table = HolonTable()
+    metrics = AdvancedPerformanceMetrics(table)
+    leader = Holon("Leader", ["coordinate"], comm_protocol)
+    worker = Holon("Worker", ["checkpoint_only_capability"], comm_protocol)
+    leader.add_child(worker)
+    for holon in (leader, worker):
+        table.attach(holon)
+    worker.assign_task(1, "checkpoint_only_capability")
+    metrics.update_energy_consumption(worker.id, 2.5)
+    comm_protocol.multicast(leader, [leader.id, worker.id], MessageType.STATUS_UPDATE, {"cycle": 3})
+    generator = RealWorldScenarioGenerator.create_dynamic_scenario(200)
+    generator.generate_tasks(1)
+    return {"holons": [leader, worker], "table": table, "metrics": metrics, "generator": generator}
+
+def test_restore_is_an_independent_copy():
+    runtime = build_runtime()
+    branch = restore(checkpoint(runtime))
+    leader, worker = branch["holons"]
+
+    assert worker.parent is leader and branch["table"].holons == [leader, worker]
+    assert leader.can_handle("checkpoint_only_capability")
+    assert branch["table"]["energy"][worker.row] == 2.5
+    # The multicast is still shared by both restored inboxes
+    assert leader.receive_messages()[0] is worker.receive_messages()[0]
+    assert branch["generator"].current_time == 1
+
+    worker.assign_task(2, "checkpoint_only_capability")
+    assert branch["table"]["workload"].tolist() == [0, 2]
+    assert runtime["table"]["workload"].tolist() == [0, 1]
+    assert runtime["holons"][1].receive_messages()
+
+def test_restore_remaps_capability_bits(monkeypatch):
+    snapshot = checkpoint(build_runtime())
+    # Simulate a process that interned capabilities in a different order
+    monkeypatch.setattr(capabilities, "_capability_bits", {"something_else": 1})
+    leader, worker = restore(snapshot)["holons"]
+    assert leader.can_handle("checkpoint_only_capability") and leader.can_handle("coordinate")
+    assert not leader.can_handle("something_else")
+    assert worker.subtree_mask == capabilities.capability_bit("checkpoint_only_capability")
+
+def test_rule_versions_continue_after_restore(monkeypatch):
+    framework = EthicalFramework()
+    approved = {"type": "t", "impact": "none", "method": "communicate"}
+    assert framework.evaluate(approved)
+    snapshot = checkpoint(framework)
+    # A fresh process starts numbering rule sets from 1 again
+    monkeypatch.setattr(ethics, "_rule_versions", itertools.count(1))
+    restored = restore(snapshot)
+    old_version = restored.rules.version
+    restored.update_rules({"forbidden_impacts": [], "allowed_methods": []})
+    assert restored.rules.version > old_version
+    assert not restored.evaluate(approved)
+
+def test_checkpoint_and_restore_leave_no_gaps_in_ids():
+    from src.core.task_ledger import next_task_id
+    first = next_task_id()
+    restore(checkpoint({"task": first}))
+    assert next_task_id() == first + 1
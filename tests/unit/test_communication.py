@@ -0,0 +1,279 @@
+import asyncio
+from queue import Full
+import pytest
+from src.core.communication import (HOLON_ID_KIND, AsyncMessageBus, CommunicationProtocol, Message, MessageBus,
+                                    MessageType, OverflowPolicy, Priority, id_to_uuid)
+
+@pytest.mark.parametrize("bus_class", [MessageBus, AsyncMessageBus])
+def test_drain_returns_messages_in_priority_order(bus_class):
+    bus = bus_class()
+    bus.register_holon("h1")
+    for priority in [Priority.LOW, Priority.URGENT, Priority.MEDIUM, Priority.HIGH]:
+        bus.send_message(Message("h0", "h1", MessageType.TASK, {"p": priority.name}, priority))
+
+    messages = bus.drain("h1")
+    assert [m.priority for m in messages] == [Priority.URGENT, Priority.HIGH, Priority.MEDIUM, Priority.LOW]
+    assert bus.drain("h1") == []
+    assert bus.get_message("h1") is None
+
+@pytest.mark.parametrize("bus_class", [MessageBus, AsyncMessageBus])
+def test_drain_respects_max_n(bus_class):
+    bus = bus_class()
+    bus.register_holon("h1")
+    for _ in range(5):
+        bus.send_message(Message("h0", "h1", MessageType.TASK, {}))
+
+    assert len(bus.drain("h1", 2)) == 2
+    assert len(bus.drain("h1", 10)) == 3
+    assert bus.drain("unknown") == []
+
+def test_async_bus_wait_message():
+    bus = AsyncMessageBus()
+    bus.register_holon("h1")
+
+    async def scenario():
+        waiter = asyncio.ensure_future(bus.wait_message("h1"))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        bus.send_message(Message("h0", "h1", MessageType.QUERY, {"q": 1}))
+        return await asyncio.wait_for(waiter, timeout=1)
+
+    message = asyncio.run(scenario())
+    assert message.content == {"q": 1}
+
+def test_protocol_receive_messages_with_async_bus():
+    from src.core.holon import Holon
+
+    comm_protocol = CommunicationProtocol(AsyncMessageBus())
+    sender = Holon("Sender", [], comm_protocol)
+    receiver = Holon("Receiver", ["process_data"], comm_protocol)
+    sender.send_message(receiver.id, MessageType.TASK, {"type": "process_data"}, Priority.HIGH)
+    sender.send_message(receiver.id, MessageType.QUERY, {"status": True}, Priority.LOW)
+
+    messages = receiver.receive_messages()
+    assert [m.type for m in messages] == [MessageType.TASK, MessageType.QUERY]
+    assert receiver.receive_messages() == []
+
+@pytest.mark.parametrize("bus_class", [MessageBus, AsyncMessageBus])
+def test_equal_priorities_are_delivered_fifo(bus_class):
+    bus = bus_class()
+    bus.register_holon("h1")
+    sent = [Message("h0", "h1", MessageType.TASK, {"n": n}) for n in range(20)]
+    for message in sent:
+        bus.send_message(message)
+
+    assert [bus.get_message("h1").content["n"] for _ in range(3)] == [0, 1, 2]
+    assert [m.content["n"] for m in bus.drain("h1")] == list(range(3, 20))
+
+def test_message_is_compact_with_monotonic_ids():
+    first = Message("h0", "h1", MessageType.TASK, {})
+    second = Message("h0", "h1", MessageType.TASK, {})
+    assert not hasattr(first, "__dict__")
+    assert isinstance(first.id, int) and second.id > first.id
+    assert first.uuid != second.uuid
+    assert first.uuid.int & ((1 << 64) - 1) == first.id
+    # Holons count from 1 too, but their UUIDs never collide with a message's
+    assert id_to_uuid(first.id, HOLON_ID_KIND) != first.uuid
+    assert first < second
+
+def test_routing_table_tracks_hierarchy_changes():
+    from src.core.holon import Holon
+
+    comm_protocol = CommunicationProtocol()
+    root = Holon("Root", [], comm_protocol)
+    left = Holon("Left", [], comm_protocol)
+    right = Holon("Right", [], comm_protocol)
+    leaf = Holon("Leaf", [], comm_protocol)
+    root.add_child(left)
+    root.add_child(right)
+    left.add_child(leaf)
+
+    assert comm_protocol.path(leaf.id) == (root.id, left.id, leaf.id)
+    assert comm_protocol.next_hop(root.id, leaf.id) == left.id
+    assert comm_protocol.next_hop(left.id, leaf.id) == leaf.id
+    assert comm_protocol.next_hop(leaf.id, right.id) == left.id
+    assert comm_protocol.next_hop(right.id, leaf.id) == root.id
+
+    left.remove_child(leaf)
+    right.add_child(leaf)
+    assert comm_protocol.path(leaf.id) == (root.id, right.id, leaf.id)
+    assert comm_protocol.next_hop(root.id, leaf.id) == right.id
+
+    root.remove_child(right)
+    assert comm_protocol.path(leaf.id) == (right.id, leaf.id)
+    assert comm_protocol.next_hop(root.id, leaf.id) is None
+
+    with pytest.raises(ValueError):
+        leaf.add_child(right)
+
+def test_route_message_reaches_any_registered_holon():
+    from src.core.holon import Holon
+
+    comm_protocol = CommunicationProtocol()
+    root = Holon("Root", [], comm_protocol)
+    child = Holon("Child", [], comm_protocol)
+    grandchild = Holon("Grandchild", [], comm_protocol)
+    root.add_child(child)
+    child.add_child(grandchild)
+
+    comm_protocol.route_message(Message(root.id, grandchild.id, MessageType.QUERY, {}), [root])
+    assert grandchild.receive_message() is not None
+
+def test_multicast_shares_one_read_only_message():
+    from src.core.holon import Holon
+
+    comm_protocol = CommunicationProtocol(AsyncMessageBus())
+    leader = Holon("Leader", [], comm_protocol)
+    team = [Holon(f"Member{i}", [], comm_protocol) for i in range(3)]
+
+    sent = comm_protocol.broadcast(leader, team, MessageType.STATUS_UPDATE, {"phase": "go"})
+    received = [member.receive_message() for member in team]
+    assert all(message is sent for message in received)
+    assert sent.receiver_id is None and sent.sender_id == leader.id
+    with pytest.raises(TypeError):
+        sent.content["phase"] = "stop"
+
+def test_broadcast_subtree_fans_out_along_hierarchy():
+    from src.core.holon import Holon
+
+    comm_protocol = CommunicationProtocol(AsyncMessageBus())
+    root = Holon("Root", [], comm_protocol)
+    child = Holon("Child", [], comm_protocol)
+    grandchild = Holon("Grandchild", [], comm_protocol)
+    outsider = Holon("Outsider", [], comm_protocol)
+    root.add_child(child)
+    child.add_child(grandchild)
+
+    comm_protocol.broadcast_subtree(None, child, MessageType.QUERY, {"ping": True})
+    assert root.receive_message() is None
+    assert outsider.receive_message() is None
+    assert child.receive_message().content["ping"]
+    assert grandchild.receive_message().content["ping"]
+
+    comm_protocol.broadcast_subtree(root, root, MessageType.QUERY, {}, include_root=False)
+    assert root.receive_message() is None
+    assert child.receive_message() is not None and grandchild.receive_message() is not None
+
+def test_restructure_notification_is_one_multicast():
+    from src.core.holon import Holon
+    from src.system_management.restructuring import AdvancedRestructuringManager
+
+    comm_protocol = CommunicationProtocol(AsyncMessageBus())
+    holons = [Holon(f"H{i}", [f"cap{i}"], comm_protocol) for i in range(4)]
+    holons[0].add_child(holons[1])
+    AdvancedRestructuringManager(holons)._notify_restructuring()
+
+    messages = [holon.receive_message() for holon in holons]
+    assert len({id(message) for message in messages}) == 1
+    structure = messages[0].content["structure"]
+    assert structure[holons[1].id]["new_parent"] == holons[0].id
+    assert structure[holons[2].id]["new_capabilities"] == ["cap2"]
+
+@pytest.mark.parametrize("bus_class", [MessageBus, AsyncMessageBus])
+def test_drop_lowest_keeps_highest_priorities(bus_class):
+    bus = bus_class()
+    bus.register_holon("h1", capacity=2, overflow=OverflowPolicy.DROP_LOWEST)
+    assert bus.send_message(Message("h0", "h1", MessageType.TASK, {"n": 1}, Priority.LOW))
+    assert bus.send_message(Message("h0", "h1", MessageType.TASK, {"n": 2}, Priority.HIGH))
+    assert bus.send_message(Message("h0", "h1", MessageType.TASK, {"n": 3}, Priority.MEDIUM))
+    assert not bus.send_message(Message("h0", "h1", MessageType.TASK, {"n": 4}, Priority.LOW))
+
+    assert bus.high_water_mark("h1") == 2
+    assert bus.dropped["h1"] == 2
+    assert bus.is_saturated("h1")
+    assert [m.content["n"] for m in bus.drain("h1")] == [2, 3]
+    assert not bus.is_saturated("h1")
+
+@pytest.mark.parametrize("bus_class", [MessageBus, AsyncMessageBus])
+def test_take_task_leaves_the_rest_of_the_inbox_in_order(bus_class):
+    bus = bus_class()
+    bus.register_holon("h1", capacity=4, overflow=OverflowPolicy.DROP_LOWEST)
+    sent = [Message("h0", "h1", MessageType.TASK, {"id": n}, Priority.HIGH if n % 2 else Priority.LOW)
+            for n in range(4)]
+    for message in sent:
+        bus.send_message(message)
+
+    assert bus.take_task("h1", 1) is sent[1] and bus.take_task("h1", 1) is None
+    assert bus.depth("h1") == 3
+    # Taken tasks free their slot and don't come back out of the inbox
+    assert bus.send_message(Message("h0", "h1", MessageType.TASK, {"id": 4}, Priority.MEDIUM))
+    assert bus.dropped["h1"] == 0
+    assert bus.get_message("h1") is sent[3]
+    # A task can be put back into the inbox it was taken from
+    assert bus.take_task("h1", 2) is sent[2]
+    assert bus.send_message(sent[2])
+    assert [m.content["id"] for m in bus.drain("h1")] == [4, 0, 2]
+    assert bus.depth("h1") == 0 and bus.take_task("h1", 0) is None
+
+def test_full_inbox_rejects_with_failed_result():
+    from src.core.holon import Holon
+
+    comm_protocol = CommunicationProtocol(AsyncMessageBus())
+    sender = Holon("Sender", [], comm_protocol)
+    receiver = Holon("Receiver", [], comm_protocol)
+    comm_protocol.message_bus.capacities[receiver.id] = 1
+
+    assert sender.send_message(receiver.id, MessageType.TASK, {"type": "a"})
+    assert not sender.send_message(receiver.id, MessageType.TASK, {"type": "b"})
+    notice = sender.receive_message()
+    assert notice.type == MessageType.RESULT
+    assert notice.content["status"] == "failure" and notice.content["type"] == "b"
+
+def test_full_inbox_spills_to_parent():
+    from src.core.holon import Holon
+
+    comm_protocol = CommunicationProtocol(AsyncMessageBus(), inbox_capacity=1,
+                                          overflow=OverflowPolicy.SPILL_TO_PARENT)
+    parent = Holon("Parent", [], comm_protocol)
+    child = Holon("Child", [], comm_protocol)
+    parent.add_child(child)
+
+    assert parent.send_message(child.id, MessageType.TASK, {"n": 1})
+    assert parent.send_message(child.id, MessageType.TASK, {"n": 2})
+    assert child.receive_message().content["n"] == 1
+    assert parent.receive_message().content["n"] == 2
+
+def test_multicast_spills_and_rejects_per_receiver():
+    from src.core.holon import Holon
+
+    comm_protocol = CommunicationProtocol(AsyncMessageBus(), inbox_capacity=1,
+                                          overflow=OverflowPolicy.SPILL_TO_PARENT)
+    sender = Holon("Sender", [], comm_protocol)
+    parent = Holon("Parent", [], comm_protocol)
+    child = Holon("Child", [], comm_protocol)
+    parent.add_child(child)
+    comm_protocol.message_bus.overflow_policies[sender.id] = OverflowPolicy.REJECT
+    rejecting = Holon("Rejecting", [], comm_protocol)
+    comm_protocol.message_bus.overflow_policies[rejecting.id] = OverflowPolicy.REJECT
+    comm_protocol.multicast(None, [child.id, rejecting.id], MessageType.QUERY, {"n": 1})
+
+    comm_protocol.multicast(sender, [child.id, rejecting.id], MessageType.QUERY, {"n": 2})
+    assert parent.receive_message().content["n"] == 2
+    assert child.receive_message().content["n"] == 1
+    notice = sender.receive_message()
+    assert notice.type == MessageType.RESULT and notice.sender_id == rejecting.id
+
+def test_block_policy_times_out_on_a_full_inbox():
+    bus = MessageBus(block_timeout=0.01)
+    bus.register_holon("h1", capacity=1, overflow=OverflowPolicy.BLOCK)
+    assert bus.send_message(Message("h1", "h1", MessageType.TASK, {"n": 1}))
+    with pytest.raises(Full):
+        bus.send_message(Message("h1", "h1", MessageType.TASK, {"n": 2}))
+    assert bus.depth("h1") == 1
+
+def test_async_block_policy_waits_for_space():
+    bus = AsyncMessageBus()
+    bus.register_holon("h1", capacity=1, overflow=OverflowPolicy.BLOCK)
+    bus.send_message(Message("h0", "h1", MessageType.TASK, {"n": 1}))
+    with pytest.raises(asyncio.QueueFull):
+        bus.send_message(Message("h0", "h1", MessageType.TASK, {"n": 2}))
+
+    async def scenario():
+        putter = asyncio.ensure_future(bus.put_message(Message("h0", "h1", MessageType.TASK, {"n": 3})))
+        await asyncio.sleep(0)
+        assert not putter.done()
+        assert bus.get_message("h1").content["n"] == 1
+        return await asyncio.wait_for(putter, timeout=1)
+
+    assert asyncio.run(scenario())
+    assert bus.get_message("h1").content["n"] == 3
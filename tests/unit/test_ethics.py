@@ -0,0 +1,113 @@
+import pytest
+from src.core.ethics import EthicalFramework, EthicalHolon
+from src.core.holon import Holon
+
+def test_decisions_are_cached_per_rule_version():
+    framework = EthicalFramework()
+    task = {"type": "analyze", "impact": "none", "method": "process_data"}
+    assert framework.evaluate(task)
+    assert list(framework.decisions) == [("analyze", "none", "process_data")]
+
+    version = framework.rules.version
+    framework.update_rules({"forbidden_impacts": ["none"], "allowed_methods": ["process_data"]})
+    assert framework.rules.version != version
+    assert not framework.evaluate(task)
+    assert framework.assess_task(task) == {"approved": False, "reason": "Forbidden impact: none",
+                                           "scores": {"impact": 0.0, "method": 1.0}}
+    assert len(framework.decisions) == 1
+
+def test_ethical_holon_uses_shared_framework():
+    framework = EthicalFramework()
+    holon = EthicalHolon(Holon("Worker", ["analyze"]), framework)
+    assert holon.execute_task({"type": "analyze", "method": "process_data"})["status"] == "success"
+    assert holon.execute_task({"type": "analyze", "impact": "harm_human", "method": "process_data"})["status"] == "rejected"
+    assert len(framework.decisions) == 2
+
+def test_assess_batch_returns_parallel_arrays():
+    framework = EthicalFramework()
+    tasks = [
+        {"type": "analyze", "method": "process_data"},
+        {"type": "analyze", "method": "scrape"},
+        {"type": "analyze", "method": "process_data"},
+        {"type": "move", "impact": "harm_human", "method": "communicate"},
+    ]
+    batch = framework.assess_batch(tasks)
+    assert batch.approved.tolist() == [True, False, True, False]
+    assert batch.reasons == [None, "Method not allowed: scrape", None, "Forbidden impact: harm_human"]
+    assert batch.scores.shape == (4, len(framework.CRITERIA))
+    assert batch.scores[3].tolist() == [0.0, 1.0]
+    assert batch.select(tasks) == [tasks[0], tasks[2]]
+    # Repeated signatures are assessed once
+    assert len(framework.decisions) == 3
+    assert len(framework.assess_batch([])) == 0
+
+def test_verdicts_survive_transport_but_not_rule_changes():
+    from src.core.codec import decode_message, encode_message
+    from src.core.communication import Message, MessageType
+
+    framework = EthicalFramework()
+    task = {"type": "analyze", "method": "process_data"}
+    verdict = framework.stamp(task)
+    assert framework.stamp({"type": "analyze", "method": "scrape"}) is None
+
+    decoded = decode_message(encode_message(Message("a", "b", MessageType.TASK, task, verdict=verdict)))
+    assert decoded.verdict == verdict and framework.verify(decoded.content, decoded.verdict)
+    # The stamp is bound to the task signature and to the framework that issued it
+    assert not framework.verify({"type": "analyze", "method": "make_decision"}, verdict)
+    assert not EthicalFramework().verify(task, verdict)
+
+    framework.update_rules({"forbidden_impacts": [], "allowed_methods": ["communicate"]})
+    assert not framework.verify(task, verdict)
+    assert not framework.approves(task, verdict)
+
+def test_local_verdicts_skip_hashing_and_assessment(monkeypatch):
+    from src.core import ethics
+
+    framework = EthicalFramework()
+    task = {"type": "analyze", "method": "process_data"}
+    verdict = framework.stamp(task)
+    calls = []
+    monkeypatch.setattr(ethics.hashlib, "blake2b", lambda *args, **kwargs: calls.append("hash"))
+    monkeypatch.setattr(framework, "_assessment", lambda action: calls.append("assess"))
+    assert framework.verify(task, verdict) and framework.verify(dict(task), verdict)
+    assert framework.approves(task, verdict)
+    assert calls == []
+
+def test_six_pillars_run_cheapest_first_and_stop_at_veto():
+    from src.core.communication import Priority
+    from src.core.ethics import PillarEvaluator, SixPillarsEthicalFramework
+
+    calls = []
+
+    class Expensive(PillarEvaluator):
+        name = 'expensive'
+        cost = 100.0
+        fields = ('payload',)
+
+        def evaluate(self, task, rules):
+            calls.append(task.get('payload'))
+            return 1.0, None
+
+    framework = SixPillarsEthicalFramework()
+    version = framework.rules.version
+    framework.add_evaluator(Expensive())
+    assert framework.rules.version != version
+    assert framework.criteria[-1] == 'expensive' and 'payload' in framework.signature_fields
+
+    # Generator-style tasks without a method are fine; the expensive pillar runs last
+    assert framework.assess_task({"type": "data_collection", "priority": Priority.LOW, "payload": 1})["approved"]
+    assert calls == [1]
+
+    assessment = framework.assess_task({"type": "move", "impact": "violate_privacy", "payload": 2})
+    assert not assessment["approved"] and assessment["reason"] == "Violates privacy"
+    assert calls == [1]
+    assert framework.stats['respect'].vetoes == 1
+    assert framework.stats['caring'].evaluations == 1
+    assert framework.stats['expensive'].evaluations == 1
+    assert assessment["scores"]["expensive"] != assessment["scores"]["expensive"]  # NaN: never ran
+
+    class Unfinished(PillarEvaluator):
+        name = 'unfinished'
+
+    with pytest.raises(TypeError):
+        Unfinished()
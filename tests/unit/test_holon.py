@@ -1,4 +1,5 @@
 import pytest
+from src.core.communication import CommunicationProtocol, MessageType
 from src.core.holon import Holon
 
 def test_holon_creation():
@@ -25,5 +26,85 @@ def test_holon_task_execution():
     result = holon.execute_task(invalid_task)
     assert result["status"] == "failure"
 
+def test_capability_registry_follows_capability_changes():
+    comm_protocol = CommunicationProtocol()
+    registry = comm_protocol.capability_registry
+    worker = Holon("Worker", ["process_data"], comm_protocol)
+    other = Holon("Other", ["process_data", "report"], comm_protocol)
+    assert list(registry.holons_with("process_data")) == [worker, other]
+
+    worker.add_capability("report")
+    other.remove_capability("process_data")
+    assert list(registry.holons_with("process_data")) == [worker]
+    assert list(registry.holons_with("report")) == [other, worker]
+
+    worker.capabilities = ["analysis"]
+    assert list(registry.holons_with("process_data")) == []
+    assert list(registry.holons_with("analysis")) == [worker]
+
+def test_capability_registry_operational_view():
+    comm_protocol = CommunicationProtocol()
+    registry = comm_protocol.capability_registry
+    worker = Holon("Worker", ["process_data"], comm_protocol)
+
+    worker.set_operational(False)
+    assert list(registry.holons_with("process_data")) == [worker]
+    assert list(registry.holons_with("process_data", operational_only=True)) == []
+    worker.add_capability("report")
+    assert list(registry.holons_with("report", operational_only=True)) == []
+
+    worker.set_operational(True)
+    assert list(registry.holons_with("report", operational_only=True)) == [worker]
+
+def test_capability_registry_tracks_least_loaded_holon():
+    comm_protocol = CommunicationProtocol()
+    registry = comm_protocol.capability_registry
+    first = Holon("First", ["process_data"], comm_protocol)
+    second = Holon("Second", ["process_data", "report"], comm_protocol)
+    assert registry.least_loaded("process_data") is first
+
+    first.assign_task(1, "process_data")
+    assert registry.least_loaded("process_data") is second
+    second.assign_task(2, "process_data")
+    second.assign_task(3, "report")
+    assert registry.least_loaded("process_data") is first
+
+    # Only a task whose message is still waiting in the inbox can move
+    assert not second.migrate_task(2, first)
+    second.send_message(second.id, MessageType.TASK, {'id': 2, 'type': "process_data"})
+    assert second.migrate_task(2, first)
+    assert first.receive_message().content['id'] == 2
+    first.set_operational(False)
+    assert registry.least_loaded("process_data") is second
+    second.set_operational(False)
+    assert registry.least_loaded("process_data", operational_only=True) is None
+    second.remove_capability("process_data")
+    assert registry.least_loaded("process_data") is first
+
+def test_delegation_only_descends_into_capable_branches():
+    root = Holon("Root", [])
+    left, right = Holon("Left", []), Holon("Right", [])
+    left_leaf, right_leaf = Holon("LeftLeaf", ["cleaning"]), Holon("RightLeaf", ["analysis"])
+    root.add_child(left)
+    root.add_child(right)
+    left.add_child(left_leaf)
+    right.add_child(right_leaf)
+
+    def unexpected(task):
+        raise AssertionError("delegated into a branch that cannot handle the task")
+    left.execute_task = unexpected
+
+    assert root.can_handle("analysis") and not root.can_handle("unheard_of")
+    assert root.execute_task({"type": "analysis"})["status"] == "success"
+    assert root.execute_task({"type": "unheard_of"})["status"] == "failure"
+
+    right_leaf.remove_capability("analysis")
+    assert not root.can_handle("analysis")
+    right.remove_child(right_leaf)
+    right_leaf.add_capability("analysis")
+    assert not root.can_handle("analysis")
+    left_leaf.add_child(right_leaf)
+    assert left.can_handle("analysis") and root.can_handle("analysis")
+
 if __name__ == "__main__":
     pytest.main()
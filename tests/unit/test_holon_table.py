@@ -0,0 +1,59 @@
+import numpy as np
+from src.core.communication import AsyncMessageBus, CommunicationProtocol, Priority
+from src.core.holon import Holon
+from src.core.holon_table import HolonTable
+from src.system_management.restructuring import AdvancedPerformanceMetrics, AdvancedRestructuringManager
+from src.task_management.advanced_allocator import AdvancedTaskAllocator
+
+def test_holon_table_mirrors_holon_state():
+    table = HolonTable(capacity=1)
+    first = Holon("First", ["a"])
+    first.assign_task(1, "a")
+    second = Holon("Second", ["a"])
+    table.attach(first)
+    table.attach(second)
+
+    second.assign_task(2, "a")
+    second.assign_task(3, "a")
+    first.set_operational(False)
+    second.set_resource_limit("cpu", 0.5)
+    assert table['workload'].tolist() == [1, 2]
+    assert table['operational'].tolist() == [False, True]
+    assert np.isnan(table['cpu_limit'][first.row]) and table['cpu_limit'][second.row] == 0.5
+
+    second.complete_task(2)
+    second.set_resource_limit("cpu", None)
+    assert table['workload'].tolist() == [1, 1]
+    assert np.isnan(table['cpu_limit']).all()
+    assert "cpu_limit" not in second.state
+
+def test_vectorized_allocation_matches_per_holon_scores():
+    comm_protocol = CommunicationProtocol(AsyncMessageBus())
+    table = HolonTable()
+    metrics = AdvancedPerformanceMetrics(table)
+    holons = [Holon(f"Worker{i}", ["process_data"], comm_protocol) for i in range(3)]
+    for i, holon in enumerate(holons):
+        table.attach(holon)
+        for task_id in range(i):
+            holon.assign_task(task_id, "process_data")
+        metrics.update_energy_consumption(holon.id, 2.0 - i)
+        metrics.update_energy_consumption(holon.id, 4.0 - i)
+    task = {"type": "process_data", "priority": Priority.HIGH}
+
+    plain = AdvancedTaskAllocator(holons, metrics)
+    vectorized = AdvancedTaskAllocator(holons, metrics, table=table)
+    assert np.allclose(vectorized._calculate_allocation_scores(holons, task),
+                       plain._calculate_allocation_scores(holons, task))
+    assert vectorized.allocate_task(task) is plain.allocate_task(task)
+
+def test_load_balancing_keeps_table_workloads_in_sync():
+    table = HolonTable()
+    holons = [Holon(f"Worker{i}", ["a"]) for i in range(3)]
+    for holon in holons:
+        table.attach(holon)
+    for task_id in range(6):
+        holons[0].assign_task(task_id, "a")
+
+    AdvancedRestructuringManager(holons, table)._load_balancing()
+    assert table['workload'].tolist() == [holon.workload for holon in holons]
+    assert table['workload'].sum() == 6 and table['workload'][0] < 6
@@ -0,0 +1,66 @@
+from src.core.communication import AsyncMessageBus, CommunicationProtocol, MessageType, OverflowPolicy, Priority
+from src.core.holon import Holon
+from src.core.journal import MessageJournal
+
+def _run(journal, cycles=5):
+    comm_protocol = CommunicationProtocol(AsyncMessageBus(), journal=journal)
+    leader = Holon("Leader", [], comm_protocol)
+    workers = [Holon(f"Worker{i}", ["process_data"], comm_protocol) for i in range(3)]
+    for cycle in range(cycles):
+        for worker in workers:
+            leader.send_message(worker.id, MessageType.TASK, {"type": "process_data", "cycle": cycle}, Priority.HIGH)
+        if cycle % 2 == 0:
+            comm_protocol.broadcast(leader, workers, MessageType.STATUS_UPDATE, {"cycle": cycle})
+        comm_protocol.mark_cycle(cycle)
+    return leader, workers
+
+def test_journal_survives_reopen_and_seeks_to_cycle(tmp_path):
+    path = str(tmp_path / "run.journal")
+    journal = MessageJournal(path, checkpoint_interval=2, initial_size=64)
+    _run(journal)
+    journal.close()
+
+    reopened = MessageJournal(path, checkpoint_interval=2)
+    assert reopened.cycles() == [0, 1, 2, 3, 4]
+    records = list(reopened.read(start_cycle=3))
+    assert {cycle for cycle, _, _ in records} == {3, 4}
+    assert len(records) == 3 + 3 + 1
+    multicast = [message for _, receiver_ids, message in records if len(receiver_ids) == 3]
+    assert multicast[0].content == {"cycle": 4}
+    assert list(reopened.read(start_cycle=1, end_cycle=1))[0][2].content["cycle"] == 1
+    assert reopened.seek(10) is None
+
+    reopened.commit_cycle(5)
+    assert reopened.cycles()[-1] == 5
+    reopened.close()
+
+def test_journal_replays_into_fresh_protocol(tmp_path):
+    path = str(tmp_path / "run.journal")
+    journal = MessageJournal(path)
+    _, workers = _run(journal, cycles=3)
+    journal.close()
+
+    fresh = CommunicationProtocol(AsyncMessageBus())
+    assert MessageJournal(path).replay(fresh) == 3 * 3 + 2
+    inbox = fresh.message_bus.drain(workers[0].id)
+    assert [m.content["cycle"] for m in inbox if m.type == MessageType.TASK] == [0, 1, 2]
+    assert sum(m.type == MessageType.STATUS_UPDATE for m in inbox) == 2
+
+def test_journal_records_what_the_bus_accepted(tmp_path):
+    journal = MessageJournal(str(tmp_path / "run.journal"))
+    comm_protocol = CommunicationProtocol(AsyncMessageBus(), inbox_capacity=1, overflow=OverflowPolicy.REJECT,
+                                          journal=journal)
+    sender = Holon("Sender", [], comm_protocol)
+    receiver = Holon("Receiver", [], comm_protocol)
+    content = {"type": "process_data", "n": 1}
+    assert [sender.send_message(receiver.id, MessageType.TASK, content) for _ in range(3)] == [True, False, False]
+    # Changes after the send don't reach the record
+    content["n"] = 2
+    comm_protocol.mark_cycle(0)
+
+    records = [(receiver_ids, message) for _, receiver_ids, message in journal.read()]
+    # The accepted task and the one rejection notice that fitted in the sender's inbox
+    assert [(receiver_ids, message.type) for receiver_ids, message in records] == [
+        ([receiver.id], MessageType.TASK), ([sender.id], MessageType.RESULT)]
+    assert records[0][1].content["n"] == 1
+    journal.close()
@@ -0,0 +1,87 @@
+import time
+from src.core.communication import CommunicationProtocol, Message, MessageType, OverflowPolicy, Priority
+from src.core.holon import Holon
+from src.core.codec import decode_message, encode_frame, encode_message
+from src.core.sharded_bus import SharedRingBuffer, ShardedMessageBus
+
+def test_message_codec_round_trip():
+    message = Message("holon-1", "holon-2", MessageType.TASK, {"type": "process_data", "n": [1, 2]}, Priority.URGENT)
+    decoded = decode_message(encode_message(message))
+    assert (decoded.id, decoded.sender_id, decoded.receiver_id) == (message.id, "holon-1", "holon-2")
+    assert decoded.type is MessageType.TASK and decoded.priority is Priority.URGENT
+    assert decoded.timestamp == message.timestamp
+    assert decoded.content == message.content
+
+    multicast = Message(None, None, MessageType.QUERY, {})
+    decoded = decode_message(encode_message(multicast))
+    assert decoded.sender_id is None and decoded.receiver_id is None
+
+def test_ring_buffer_wraps_and_applies_backpressure():
+    ring = SharedRingBuffer(capacity=64)
+    try:
+        for round_ in range(10):
+            records = [bytes([round_]) * 10, bytes([round_ + 1]) * 20]
+            assert all(ring.push(record) for record in records)
+            assert ring.pop_all() == records
+        assert ring.push(b"x" * 60)
+        assert not ring.push(b"y")
+        assert ring.pop_all() == [b"x" * 60]
+        assert ring.free_space() == 64
+    finally:
+        ring.close()
+        ring.unlink()
+
+def _echo_worker(bus, shard, holons, stop_after):
+    # Each shard answers every task addressed to its holons with a RESULT
+    owned = [holon for holon in holons if bus.shard_of(holon.id) == shard]
+    handled = 0
+    deadline = time.monotonic() + 10
+    while handled < stop_after and time.monotonic() < deadline:
+        for holon in owned:
+            for message in holon.receive_messages():
+                holon.send_message(message.sender_id, MessageType.RESULT,
+                                   {"shard": shard, "holon": holon.name, "n": message.content["n"]})
+                handled += 1
+        time.sleep(0.001)
+
+def test_sharded_bus_delivers_across_processes():
+    bus = ShardedMessageBus(num_shards=2, ring_capacity=1 << 16)
+    comm_protocol = CommunicationProtocol(bus)
+    workers = [Holon(f"Worker{i}", [], comm_protocol) for i in range(4)]
+    driver = Holon("Driver", [], None)
+    bus.register_holon(driver.id, shard=bus.driver)
+    driver.comm_protocol = comm_protocol
+    try:
+        bus.start(_echo_worker, workers, 4)
+        for n in range(8):
+            driver.send_message(workers[n % 4].id, MessageType.TASK, {"n": n})
+
+        results, ids = [], []
+        deadline = time.monotonic() + 10
+        while len(results) < 8 and time.monotonic() < deadline:
+            for message in driver.receive_messages():
+                results.append(message.content)
+                ids.append(message.id)
+            time.sleep(0.001)
+        bus.join(timeout=5)
+    finally:
+        bus.close()
+
+    assert sorted(result["n"] for result in results) == list(range(8))
+    assert {result["shard"] for result in results} == {0, 1}
+    assert all(result["shard"] == bus.shard_of(workers[result["n"] % 4].id) for result in results)
+    # Forked shards number their messages in separate ranges
+    assert len(set(ids)) == len(ids)
+
+def test_pump_holds_messages_for_a_full_block_inbox():
+    bus = ShardedMessageBus(num_shards=1, ring_capacity=1 << 12)
+    try:
+        bus.register_holon("h1", capacity=1, overflow=OverflowPolicy.BLOCK, shard=bus.driver)
+        for n in range(2):
+            assert bus.rings[(0, bus.driver)].push(encode_frame(["h1"], Message("h0", "h1", MessageType.TASK, {"n": n})))
+        assert bus.depth("h1") == 1 and len(bus.backlog) == 1
+        assert bus.get_message("h1").content["n"] == 0
+        assert bus.get_message("h1").content["n"] == 1
+        assert not bus.backlog
+    finally:
+        bus.close()
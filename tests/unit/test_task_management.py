@@ -0,0 +1,254 @@
+import asyncio
+import threading
+import time
+import pytest
+from src.core.communication import AsyncMessageBus, CommunicationProtocol, MessageType, OverflowPolicy, Priority
+from src.core.holon import Holon
+from src.system_management import advanced_restructuring
+from src.system_management.restructuring import AdvancedPerformanceMetrics, AdvancedRestructuringManager
+from src.task_management.advanced_allocator import AdvancedTaskAllocator
+from src.task_management.allocator import Task, TaskAllocator
+from src.task_management.dependencies import DependencyTracker
+from src.task_management.executor import WorkStealingExecutor
+from src.task_management.pipeline import TaskPipeline
+from src.task_management.task_queue import SchedulingPolicy, TaskQueue
+
+def test_advanced_allocator_skips_saturated_holons():
+    comm_protocol = CommunicationProtocol(AsyncMessageBus(), inbox_capacity=2)
+    busy = Holon("Busy", ["process_data"], comm_protocol)
+    idle = Holon("Idle", ["process_data"], comm_protocol)
+    allocator = AdvancedTaskAllocator([busy, idle], AdvancedPerformanceMetrics())
+    task = {"type": "process_data", "priority": Priority.MEDIUM}
+
+    for _ in range(2):
+        busy.send_message(busy.id, MessageType.TASK, task)
+    assert allocator.allocate_task(task) is idle
+
+    for _ in range(2):
+        idle.send_message(idle.id, MessageType.TASK, task)
+    assert allocator.allocate_task(task) is None
+
+def test_allocate_batch_spreads_tasks_within_inbox_room():
+    comm_protocol = CommunicationProtocol(AsyncMessageBus(), inbox_capacity=2)
+    first = Holon("First", ["process_data"], comm_protocol)
+    second = Holon("Second", ["process_data", "report"], comm_protocol)
+    allocator = AdvancedTaskAllocator([first, second], AdvancedPerformanceMetrics(), saturation_threshold=1.0)
+    tasks = [{"type": "process_data", "priority": Priority.LOW} for _ in range(4)]
+    tasks.append({"type": "report", "priority": Priority.URGENT})
+
+    assignments = allocator.allocate_batch(tasks)
+    # The urgent report goes first, so one data task is left without room
+    assert assignments[4] is second
+    assert assignments[:4].count(first) == 2 and assignments[:4].count(second) == 1
+    assert assignments[:4].count(None) == 1
+
+def test_allocator_only_assigns_to_the_holons_it_manages():
+    comm_protocol = CommunicationProtocol()
+    outside = Holon("Outside", ["a"], comm_protocol)
+    managed = [Holon(f"Managed{i}", ["a"], comm_protocol) for i in range(2)]
+    allocator = TaskAllocator(comm_protocol.capability_registry)
+    for _ in range(3):
+        allocator.add_task(Task("a", {}))
+    assert allocator.allocate_tasks(managed) == 3
+    assert outside.workload == 0 and sorted(holon.workload for holon in managed) == [1, 2]
+
+def test_task_ledger_tracks_tasks_by_id():
+    source = Holon("Source", ["a", "b"])
+    target = Holon("Target", ["a", "b"])
+    source.assign_task(1, "a", enqueued_at=10.0)
+    source.assign_task(2, "a", enqueued_at=12.0)
+    source.assign_task(3, "b", enqueued_at=11.0)
+    assert source.workload == 3 and source.ledger.count("a") == 2
+
+    # Completing by id removes that task even when another one shares its type
+    assert source.complete_task(2) == "a"
+    assert source.ledger.task_ids() == [1, 3]
+    assert source.complete_task(2) is None
+
+    assert source.migrate_task(1, target)
+    assert source.ledger.count("a") == 0 and "a" not in source.ledger.counts
+    assert target.ledger.tasks[1] == ("a", 10.0)
+    assert target.ledger.oldest_age(now=15.0) == 5.0
+
+def test_rebalanced_and_spilled_tasks_complete_where_they_are_processed():
+    comm_protocol = CommunicationProtocol()
+    holons = [Holon(f"H{i}", ["a"], comm_protocol) for i in range(3)]
+    for task_id in range(6):
+        holons[0].assign_task(task_id, "a")
+        holons[0].send_message(holons[0].id, MessageType.TASK, {'id': task_id, 'type': "a"})
+    AdvancedRestructuringManager(holons)._load_balancing()
+    assert [holon.workload for holon in holons] == [2, 2, 2]
+
+    # A child whose inbox is full passes both the message and the ledger entry to its parent
+    child = Holon("Child", ["a"], comm_protocol)
+    holons[1].add_child(child)
+    comm_protocol.message_bus.capacities[child.id] = 1
+    comm_protocol.message_bus.overflow_policies[child.id] = OverflowPolicy.SPILL_TO_PARENT
+    for task_id in (6, 7):
+        child.assign_task(task_id, "a")
+        child.send_message(child.id, MessageType.TASK, {'id': task_id, 'type': "a"})
+    assert child.workload == 1 and holons[1].workload == 3
+
+    for holon in holons + [child]:
+        for message in holon.receive_messages():
+            assert holon.complete_task(message.content['id']) == "a"
+    assert [holon.workload for holon in holons + [child]] == [0, 0, 0, 0]
+
+def test_clustering_works_on_holons_without_a_protocol():
+    holons = [Holon(f"H{i}", ["a"]) for i in range(6)]
+    holons[0].add_child(holons[1])
+    AdvancedRestructuringManager(holons)._adjust_hierarchy_using_clustering()
+    assert sum(holon.parent is None for holon in holons) >= 1
+
+    holons = [Holon(f"H{i}", ["a"]) for i in range(6)]
+    holons[0].add_child(holons[1])
+    advanced_restructuring.AdvancedRestructuringManager(holons, AdvancedPerformanceMetrics())._adjust_hierarchy()
+    assert sum(holon.parent is None for holon in holons) >= 1
+
+def test_task_queue_orders_by_priority_and_ages_waiting_tasks():
+    queue = TaskQueue(aging_interval=5)
+    old_low = Task("report", {}, Priority.LOW)
+    queue.push(old_low, now=0)
+    first_high = Task("process_data", {}, Priority.HIGH)
+    second_high = Task("process_data", {}, Priority.HIGH)
+    queue.push(first_high, now=3)
+    queue.push(second_high, now=3)
+    # Two aging intervals later the LOW task has caught up with HIGH ones pushed now
+    late_high = Task("process_data", {}, Priority.HIGH)
+    queue.push(late_high, now=10)
+
+    assert queue.pop_allocatable(lambda task: task.type != "report", n=2) == [first_high, second_high]
+    # The refused LOW task keeps its place ahead of the later HIGH one
+    assert len(queue) == 2 and queue.pop() is old_low and queue.pop() is late_high
+
+    # A refused type is asked once per round, however many of its tasks are queued
+    asked = []
+    for _ in range(1000):
+        queue.push(Task("report", {}, Priority.HIGH), now=20)
+    queue.push(Task("process_data", {}, Priority.LOW), now=20)
+    allocated = queue.pop_allocatable(lambda task: asked.append(task.type) or task.type != "report")
+    assert asked == ["report", "process_data"] and len(allocated) == 1 and len(queue) == 1000
+
+def test_work_stealing_executor_shares_tasks_with_idle_siblings():
+    comm_protocol = CommunicationProtocol(AsyncMessageBus())
+    parent = Holon("Parent", ["coordinate"], comm_protocol)
+    busy = Holon("Busy", ["process_data"], comm_protocol)
+    idle = Holon("Idle", ["process_data"], comm_protocol)
+    parent.add_child(busy)
+    parent.add_child(idle)
+    for task_id in range(1, 21):
+        busy.assign_task(task_id, "process_data")
+        busy.send_message(busy.id, MessageType.TASK, {"id": task_id, "type": "process_data"})
+    busy.send_message(busy.id, MessageType.RESULT, {"status": "success"})
+
+    stolen = threading.Event()
+    def execute(holon, message):
+        # Hold the busy holon on its first task until the idle one has stolen something
+        if holon is idle:
+            stolen.set()
+        elif message.content["id"] == 1:
+            stolen.wait(timeout=5)
+        return holon.name
+
+    merged = []
+    executor = WorkStealingExecutor(max_workers=2)
+    processed = executor.process([parent, busy, idle], execute,
+                                 lambda owner, thief, message, value: merged.append((message.id, owner, value)),
+                                 lambda holon, message: merged.append((message.id, holon, None)))
+    executor.shutdown()
+    assert processed == 21
+    # Merged in message order whoever ran each task; all tasks stay on the busy holon's ledger
+    assert [entry[0] for entry in merged] == sorted(entry[0] for entry in merged)
+    assert all(owner is busy for _, owner, _ in merged)
+    assert "Idle" in {value for _, _, value in merged} and executor.steals >= 1
+
+def test_task_pipeline_runs_stages_over_bounded_queues():
+    class Generator:
+        def generate_tasks(self, time_step):
+            return [{"type": "process_data", "priority": Priority.LOW}, {"type": "harm", "priority": Priority.LOW}]
+
+    executed = []
+    pipeline = TaskPipeline(Generator(),
+                            lambda tasks: [task for task in tasks if task["type"] != "harm"],
+                            lambda tasks: tasks,
+                            lambda tasks: executed.extend(tasks) or tasks,
+                            queue_size=2)
+    asyncio.run(pipeline.run(10))
+
+    metrics = pipeline.metrics()
+    assert len(executed) == 10
+    assert metrics["generate"]["items_out"] == 20 and metrics["generate"]["batches"] == 10
+    assert metrics["assess"]["items_in"] == 20 and metrics["assess"]["items_out"] == 10
+    assert metrics["execute"]["items_out"] == 10 and metrics["execute"]["queue_depth"] == 0
+    assert all(stage["queue_high_water"] <= 2 for stage in metrics.values())
+
+def test_task_pipeline_overlaps_stages():
+    class Generator:
+        def generate_tasks(self, time_step):
+            return [{"type": "process_data"}]
+
+    lock = threading.Lock()
+    in_flight = [0, 0]
+
+    def step(tasks):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight[0] -= 1
+        return tasks
+
+    pipeline = TaskPipeline(Generator(), step, step, step)
+    asyncio.run(pipeline.run(10))
+    assert pipeline.metrics()["execute"]["items_out"] == 10
+    # More than one stage was running at the same time
+    assert in_flight[1] >= 2
+
+def test_deadline_and_capacity_aware_scheduling():
+    queue = TaskQueue(policy=SchedulingPolicy.EARLIEST_DEADLINE)
+    large_old = Task("report", {"complexity": 8, "created_at": 0})
+    small_new = Task("report", {"complexity": 1, "created_at": 5})
+    urgent = Task("report", {"complexity": 9, "created_at": 9}, Priority.URGENT)
+    for task in (large_old, small_new, urgent):
+        queue.push(task)
+    # Due at 14, 6 and 18: priority first, then earliest deadline
+    assert [queue.pop() for _ in range(3)] == [urgent, small_new, large_old]
+
+    comm_protocol = CommunicationProtocol(AsyncMessageBus())
+    limited = Holon("Limited", ["process_data"], comm_protocol)
+    free = Holon("Free", ["process_data"], comm_protocol)
+    limited.set_resource_limit("cpu", 0.25)
+    free.assign_task(1, "process_data")
+    # Load is relative to capacity: one task on a quarter-capacity holon counts as four
+    assert comm_protocol.capability_registry.least_loaded("process_data") is limited
+    limited.assign_task(2, "process_data")
+    assert comm_protocol.capability_registry.least_loaded("process_data") is free
+    # A zero limit leaves a small capacity floor rather than dividing by zero
+    free.set_resource_limit("memory", 0.0)
+    assert 0 < free.capacity < limited.capacity
+    assert comm_protocol.capability_registry.least_loaded("process_data") is limited
+
+    metrics = AdvancedPerformanceMetrics()
+    for latency in range(1, 101):
+        metrics.update_task_completion_time("report", float(latency))
+    percentiles = metrics.get_latency_percentiles("report")
+    assert percentiles[50] == pytest.approx(50.5) and percentiles[99] == pytest.approx(99.01)
+
+def test_dependency_tracker_releases_by_type_and_instance():
+    tracker = DependencyTracker()
+    collect = {"id": 1, "type": "data_collection"}
+    clean = {"id": 2, "type": "data_cleaning", "dependencies": ["data_collection"]}
+    report = {"id": 3, "type": "report", "depends_on": [2]}
+    unrelated = {"id": 4, "type": "maintenance", "depends_on": [99]}
+    for task in (clean, report, collect, unrelated):
+        tracker.add(task)
+    assert tracker.release() == [collect, unrelated]
+
+    # A new collection task arriving before the next release blocks cleaning again
+    another = {"id": 5, "type": "data_collection"}
+    tracker.add(another)
+    assert tracker.release() == [another]
+    assert tracker.release() == [clean]
+    assert tracker.release() == [report]
+    assert len(tracker) == 0 and not tracker.outstanding
@@ -0,0 +1,59 @@
+import logging
+import pytest
+from src.core.communication import CommunicationProtocol, MessageType
+from src.core.holon import Holon
+from src.core.tracing import Tracer, tracer
+
+@pytest.fixture
+def recording_tracer():
+    tracer.configure(record_messages=True)
+    tracer.clear()
+    yield tracer
+    tracer.configure(record_messages=False)
+    tracer.clear()
+
+class CountingRepr:
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "counted"
+
+def test_disabled_levels_do_not_format():
+    local = Tracer(level=logging.WARNING)
+    arg = CountingRepr()
+    local.debug("allocator", "value %s", arg)
+    local.info("allocator", "value %s", arg)
+    assert arg.calls == 0
+    assert not local.message_tracing
+
+    local.set_level("allocator", logging.DEBUG)
+    assert local.enabled("allocator", logging.DEBUG)
+    assert not local.enabled("events", logging.DEBUG)
+
+def test_sampling_drops_message_events():
+    local = Tracer(sample_rate=0.0)
+    local.configure(record_messages=True)
+    assert local.message_tracing
+    comm_protocol = CommunicationProtocol()
+    holon = Holon("H", [], comm_protocol)
+    message = comm_protocol.multicast(holon, [holon.id], MessageType.QUERY, {})
+    local.trace_message("sent", message, holon.name)
+    assert local.recent() == []
+
+def test_message_events_are_kept_in_ring_buffer(recording_tracer):
+    recording_tracer.configure(buffer_size=3)
+    comm_protocol = CommunicationProtocol()
+    sender = Holon("Sender", [], comm_protocol)
+    receiver = Holon("Receiver", [], comm_protocol)
+    for n in range(2):
+        sender.send_message(receiver.id, MessageType.TASK, {"n": n})
+    receiver.receive_messages()
+
+    events = recording_tracer.recent()
+    assert len(events) == 3
+    assert [e["event"] for e in events] == ["sent", "received", "received"]
+    assert events[-1]["receiver_id"] == receiver.id
+    assert recording_tracer.recent(1) == events[-1:]
+    recording_tracer.configure(buffer_size=10000)